@@ -1,11 +1,13 @@
 """Flask Web UI for GBaseMeetSub"""
 import os
+import io
 import sys
 import json
 import time
-from flask import Flask, render_template, request, jsonify, send_file, send_from_directory
+from flask import Flask, render_template, request, jsonify, send_file, send_from_directory, Response, stream_with_context
 from werkzeug.utils import secure_filename
 from datetime import datetime
+import subprocess
 import threading
 import uuid
 
@@ -18,6 +20,18 @@ sys.path.insert(0, APP_ROOT)
 # 现在导入项目模块
 from src.main_pipeline import SpeechProcessingPipeline
 from src.enhanced_pipeline import EnhancedPipeline
+from src.term_manager import TermManager
+from src.model_registry import configure_model_registry, get_model_registry
+from src.recognizer_backends import QuantizedWhisperBackend, StubBackend
+from src.job_scheduler import JobScheduler, QueueFullError
+from src.task_events import TaskEventHub
+from src.subtitle_generator import read_partial_subtitle
+from src.decoded_audio import DecodedAudioStore
+from src.job_checkpoint import JobCheckpoint
+from src.task_store import ACTIVE_STATUSES, TaskStore
+from src.job_control import JobControl, JobPaused
+from src.chunked_upload import ChunkedUpload, UploadOffsetError
+from src.preview_audio import PreviewRenditions
 
 # 创建Flask应用，指定模板和静态文件的绝对路径
 app = Flask(__name__,
@@ -29,20 +43,121 @@ app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB max file size
 app.config['UPLOAD_FOLDER'] = os.path.join(APP_ROOT, 'uploads')
 app.config['OUTPUT_FOLDER'] = os.path.join(APP_ROOT, 'output')
 app.config['DATA_FOLDER'] = os.path.join(APP_ROOT, 'data')
+# 分块上传：上传状态和边上传边解码的PCM；每个分块的大小
+app.config['CHUNKED_UPLOAD_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], 'chunked')
+app.config['UPLOAD_CHUNK_SIZE'] = int(float(os.environ.get('UPLOAD_CHUNK_MB', 8)) * 1024 * 1024)
+# 超过此时长没有新数据的上传视为放弃，连同未完成的数据一起删除
+app.config['UPLOAD_TTL_SECONDS'] = float(os.environ.get('UPLOAD_TTL_HOURS', 24)) * 3600
+
+# 并行识别设置：工作进程数及每个进程的torch线程数
+app.config['TRANSCRIBE_WORKERS'] = int(os.environ.get('TRANSCRIBE_WORKERS', 1))
+app.config['TORCH_THREADS'] = int(os.environ['TORCH_THREADS']) if os.environ.get('TORCH_THREADS') else None
+# 单进程模式下每次一起解码的片段数（CPU上批量编码更能利用BLAS）
+app.config['TRANSCRIBE_BATCH_SIZE'] = int(os.environ.get('TRANSCRIBE_BATCH_SIZE', 1))
+# 识别后端：whisper / whisper-int8（仅CPU，线性层int8量化）
+app.config['RECOGNIZER_BACKEND'] = os.environ.get('RECOGNIZER_BACKEND', 'whisper')
+
+# 语音检测：识别前跳过静音（默认关闭，音量很小的语音可能被当作静音）
+app.config['VAD_ENABLED'] = os.environ.get('VAD_ENABLED', '0') == '1'
+
+# 已有字幕与新识别结果重叠时的合并策略：prefer_new / prefer_existing / split
+app.config['SUBTITLE_MERGE_POLICY'] = os.environ.get('SUBTITLE_MERGE_POLICY', 'prefer_new')
+
+# 识别结果缓存：重新处理同一录音时跳过Whisper（0表示关闭）
+app.config['TRANSCRIPTION_CACHE_MB'] = float(os.environ.get('TRANSCRIPTION_CACHE_MB', 500))
+
+# 识别语言（ja等语言代码，auto表示自动检测）
+app.config['TRANSCRIBE_LANGUAGE'] = os.environ.get('TRANSCRIBE_LANGUAGE', 'ja')
+
+# 词级时间戳（较慢，默认关闭）；设置每行最大字符数时按词边界拆分过长的字幕
+app.config['WORD_TIMESTAMPS'] = os.environ.get('WORD_TIMESTAMPS', '0') == '1'
+app.config['SUBTITLE_MAX_LINE_CHARS'] = int(os.environ.get('SUBTITLE_MAX_LINE_CHARS', 0)) or None
+
+# 模型缓存：多个任务共享已加载的模型，超出内存预算时淘汰空闲模型
+if os.environ.get('MODEL_MEMORY_BUDGET_MB'):
+    configure_model_registry(float(os.environ['MODEL_MEMORY_BUDGET_MB']))
+
+# 任务检查点：已完成片段的识别结果，任务中断后可从中断处继续
+app.config['CHECKPOINT_FOLDER'] = os.path.join(app.config['DATA_FOLDER'], 'checkpoints')
+# 启动时自动继续上次未完成（排队中或处理中）的任务
+app.config['AUTO_RESUME_JOBS'] = os.environ.get('AUTO_RESUME_JOBS', '0') == '1'
 
 # 确保必要的目录存在
 for folder in [app.config['UPLOAD_FOLDER'], app.config['OUTPUT_FOLDER'], app.config['DATA_FOLDER']]:
     os.makedirs(folder, exist_ok=True)
 
-# 存储处理任务状态
-processing_tasks = {}
+# 各任务的字幕日志（处理中的字幕预览，按游标读取增量）
+segment_logs = {}
+
+# 任务事件流：通过 /events/<task_id> 推送进度和新字幕的增量
+task_events = TaskEventHub()
+
+# 排队中和处理中任务的暂停/取消控制（暂停后让出槽位的任务不在其中）
+job_controls = {}
+job_controls_lock = threading.Lock()  # 暂停让出槽位与继续之间的同步
+
+def release_task_memory(task_id):
+    """任务移出内存时释放字幕日志和事件流（完整字幕已保存在磁盘上）"""
+    segment_logs.pop(task_id, None)
+    task_events.remove(task_id)
+
+# 任务状态：SQLite持久化，内存中只保留进行中和最近使用的任务，已结束的任务按TTL删除
+processing_tasks = TaskStore(
+    os.path.join(app.config['DATA_FOLDER'], 'tasks.db'),
+    os.path.join(app.config['DATA_FOLDER'], 'task_segments'),
+    max_cached=int(os.environ.get('TASK_CACHE_SIZE', 100)),
+    ttl_seconds=float(os.environ.get('TASK_TTL_HOURS', 72)) * 3600,
+    on_evict=release_task_memory
+)
+# 上次运行时未结束的任务已无进程执行，可通过 /resume/<task_id> 从检查点继续
+processing_tasks.mark_interrupted('服务重启，任务中断')
+
+# 解码后的音频（按文件内容缓存）：分析、语言检测、切分和识别共享同一份PCM
+decoded_audio = DecodedAudioStore(
+    os.path.join(app.config['DATA_FOLDER'], 'decoded_audio'),
+    float(os.environ.get('DECODED_AUDIO_MB', 2048))
+)
+
+# 审阅界面播放用的低码率音频：从解码结果编码，按内容缓存
+preview_renditions = PreviewRenditions(
+    os.path.join(app.config['DATA_FOLDER'], 'preview_audio'),
+    codec=os.environ.get('PREVIEW_AUDIO_CODEC', 'opus'),
+    bitrate=os.environ.get('PREVIEW_AUDIO_BITRATE', '24k'),
+    max_size_mb=float(os.environ.get('PREVIEW_AUDIO_MB', 1024))
+)
+# 请求预览时预览音频正在生成，最多等待的秒数（超时则返回原始文件）
+PREVIEW_WAIT_SECONDS = float(os.environ.get('PREVIEW_WAIT_SECONDS', 10))
+
+# 原始文件播放时的MIME类型
+AUDIO_MIMETYPES = {
+    'mp3': 'audio/mpeg',
+    'wav': 'audio/wav',
+    'm4a': 'audio/mp4',
+    'mp4': 'video/mp4',
+    'webm': 'video/webm'
+}
+
+# 任务调度：有界等待队列 + 固定数量的并发识别槽位
+scheduler = JobScheduler(
+    max_concurrent=int(os.environ.get('MAX_CONCURRENT_JOBS', 1)),
+    max_queue=int(os.environ.get('MAX_QUEUED_JOBS', 20))
+)
 
 # 允许的文件扩展名
 ALLOWED_EXTENSIONS = {'mp4', 'mp3', 'wav', 'm4a', 'webm'}
 
+# 识别片段时长（秒）
+CHUNK_DURATION = 30
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def get_term_manager():
+    """获取进程内共享的术语管理器（与处理管道使用同一实例）"""
+    terms_file = os.path.join(app.config['DATA_FOLDER'], 'terms.json')
+    log_file = os.path.join(app.config['DATA_FOLDER'], 'corrections_log.json')
+    return TermManager.shared(terms_file, log_file)
+
 @app.route('/')
 def index():
     """主页"""
@@ -85,13 +200,9 @@ def upload_file():
         # 生成唯一任务ID
         task_id = str(uuid.uuid4())
         filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         # 保存文件
-        base_name = os.path.splitext(filename)[0]
-        ext = os.path.splitext(filename)[1]
-        saved_filename = f"{base_name}_{timestamp}{ext}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], saved_filename)
+        filepath = upload_path(filename)
         file.save(filepath)
         
         # 获取处理选项
@@ -106,33 +217,155 @@ def upload_file():
             if subtitle_file and subtitle_file.filename:
                 existing_subtitle = subtitle_file.read().decode('utf-8')
         
-        # 初始化任务状态
-        processing_tasks[task_id] = {
-            'status': 'processing',
-            'progress': 0,
-            'filename': filename,
-            'filepath': filepath,
-            'start_time': datetime.now().isoformat(),
-            'model_size': model_size,
-            'subtitle_format': subtitle_format
-        }
-        
-        # 在后台线程中处理
-        thread = threading.Thread(
-            target=process_audio_task,
-            args=(task_id, filepath, model_size, subtitle_format, start_time, existing_subtitle)
-        )
-        thread.start()
+        try:
+            enqueue_task(task_id, {
+                'filename': filename,
+                'filepath': filepath,
+                'model_size': model_size,
+                'subtitle_format': subtitle_format,
+                'start_time': start_time,
+                'existing_subtitle': existing_subtitle
+            })
+        except QueueFullError:
+            os.remove(filepath)
+            return jsonify({'error': '服务器繁忙，等待队列已满，请稍后再试'}), 503
         
         return jsonify({
             'task_id': task_id,
-            'message': '文件上传成功，开始处理...'
+            'message': '文件上传成功，已加入处理队列...'
         })
     
     return jsonify({'error': '不支持的文件格式'}), 400
 
+def upload_path(filename):
+    """上传文件的保存路径（文件名加时间戳）"""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    base_name, ext = os.path.splitext(filename)
+    return os.path.join(app.config['UPLOAD_FOLDER'], f"{base_name}_{timestamp}{ext}")
+
+def pipeline_config(model_size, start_time=0, existing_subtitle=None, checkpoint=None, control=None):
+    """任务使用的处理管道配置"""
+    return {
+        'model_size': model_size,
+        'backend': app.config['RECOGNIZER_BACKEND'],
+        'language': app.config['TRANSCRIBE_LANGUAGE'],
+        'chunk_duration': CHUNK_DURATION,  # 30秒片段，更快的初始反馈
+        'start_time': start_time,
+        'existing_subtitle': existing_subtitle,
+        'merge_policy': app.config['SUBTITLE_MERGE_POLICY'],
+        'vad': app.config['VAD_ENABLED'],  # 跳过静音片段
+        'workers': app.config['TRANSCRIBE_WORKERS'],
+        'torch_threads': app.config['TORCH_THREADS'],
+        'batch_size': app.config['TRANSCRIBE_BATCH_SIZE'],
+        'cache': app.config['TRANSCRIPTION_CACHE_MB'] > 0,
+        'cache_dir': os.path.join(app.config['DATA_FOLDER'], 'transcription_cache'),
+        'cache_max_mb': app.config['TRANSCRIPTION_CACHE_MB'],
+        'word_timestamps': app.config['WORD_TIMESTAMPS'],
+        'max_line_chars': app.config['SUBTITLE_MAX_LINE_CHARS'],
+        'checkpoint': checkpoint,  # 每完成一个片段即保存，中断后可继续
+        'control': control  # 暂停/取消
+    }
+
+def chunk_plan(duration):
+    """按固定时长划分的片段列表（供选择开始位置）"""
+    chunks = []
+    for start in range(0, int(duration), CHUNK_DURATION):
+        end = min(start + CHUNK_DURATION, duration)
+        chunks.append({
+            'index': len(chunks),
+            'start': start,
+            'end': end,
+            'label': f'{start}秒 - {end}秒 (片段{len(chunks)+1})'
+        })
+    return {'duration': duration, 'chunks': chunks, 'chunk_duration': CHUNK_DURATION}
+
+def enqueue_task(task_id, params):
+    """创建任务状态和检查点，并提交到调度器（队列已满时抛出QueueFullError）
+    
+    Args:
+        params: filename, filepath, model_size, subtitle_format,
+            start_time（开始处理的位置，秒）, existing_subtitle
+    """
+    processing_tasks.create(task_id, {
+        'status': 'queued',
+        'progress': 0,
+        'filename': params['filename'],
+        'filepath': params['filepath'],
+        'start_time': datetime.now().isoformat(),
+        'model_size': params['model_size'],
+        'subtitle_format': params['subtitle_format'],
+        'status_message': '排队等待处理...'
+    })
+    segment_logs.pop(task_id, None)
+    task_events.remove(task_id)  # 继续已结束的任务时重新开始事件流
+    task_events.publish(task_id, 'state', {'status': 'queued'})
+    checkpoint = JobCheckpoint(app.config['CHECKPOINT_FOLDER'], task_id)
+    checkpoint.save_meta({**params, 'status': 'queued', 'created': datetime.now().isoformat()})
+    try:
+        submit_task(task_id, params)
+    except QueueFullError:
+        processing_tasks.delete(task_id)
+        checkpoint.remove()
+        raise
+
+def submit_task(task_id, params):
+    """提交到调度器，文件越小越先处理（队列已满时抛出QueueFullError）"""
+    # 暂停时任务结束并让出槽位，继续时重新提交
+    job_controls[task_id] = JobControl(release_on_pause=True)
+    file_size = os.path.getsize(params['filepath'])
+    try:
+        scheduler.submit(
+            task_id, process_audio_task,
+            task_id, params['filepath'], params['model_size'], params['subtitle_format'],
+            params['start_time'], params['existing_subtitle'],
+            priority=file_size, cost=file_size
+        )
+    except QueueFullError:
+        job_controls.pop(task_id, None)
+        raise
+
+def requeue_paused_task(task_id):
+    """继续已让出槽位的暂停任务：从检查点重新排队，已完成的片段不再识别
+    
+    保留任务状态和事件流，客户端收到带restart的state事件后重新接收字幕。
+    队列已满时抛出QueueFullError，任务保持暂停。
+    """
+    checkpoint = JobCheckpoint(app.config['CHECKPOINT_FOLDER'], task_id)
+    # 先更新状态再提交，任务可能立即开始
+    checkpoint.save_meta({'status': 'queued'})
+    processing_tasks.update(task_id, {
+        'paused': False,
+        'status': 'queued',
+        'status_message': '排队等待处理...'
+    })
+    task_events.publish(task_id, 'state', {'status': 'queued', 'restart': True})
+    try:
+        submit_task(task_id, checkpoint.load_meta())
+    except QueueFullError:
+        checkpoint.save_meta({'status': 'paused'})
+        processing_tasks.update(task_id, {
+            'paused': True,
+            'status': 'paused',
+            'status_message': '已暂停（等待队列已满）'
+        })
+        task_events.publish(task_id, 'state', {'status': 'paused'})
+        raise
+
 def process_audio_task(task_id, filepath, model_size, subtitle_format, start_time=0, existing_subtitle=None):
-    """后台处理音频任务"""
+    """后台处理音频任务（由调度器在空闲槽位中执行）"""
+    control = job_controls.get(task_id) or JobControl(release_on_pause=True)
+    if control.cancelled:
+        job_controls.pop(task_id, None)
+        return
+    processing_tasks.update(task_id, {
+        'status': 'processing',
+        'status_message': '开始处理...'
+    })
+    task_events.publish(task_id, 'state', {'status': 'processing'})
+    checkpoint = JobCheckpoint(app.config['CHECKPOINT_FOLDER'], task_id)
+    checkpoint.save_meta({'status': 'processing'})
+    last_progress = {}
+    segment_cursor = [0]  # 已推送到的字幕日志游标
     try:
         # 进度回调函数
         def update_progress(progress_info):
@@ -144,44 +377,63 @@ def process_audio_task(task_id, filepath, model_size, subtitle_format, start_tim
                 'chunk_start_time': datetime.now().isoformat()  # 记录当前片段开始时间
             }
             
-            # 保存所有片段，而不是只保存最后几个
-            if 'partial_results' in progress_info:
-                task_update['partial_segments'] = progress_info['partial_results']
+            # 推送增量事件：进度有变化时推送进度，新识别的字幕只推送一次
+            progress_event = {key: task_update[key] for key in
+                              ('progress', 'status_message', 'current_chunk', 'total_chunks')}
+            if progress_event != last_progress:
+                last_progress.clear()
+                last_progress.update(progress_event)
+                task_events.publish(task_id, 'progress', progress_event)
+            segment_log = progress_info.get('segment_log')
+            if segment_log is not None:
+                segment_logs[task_id] = segment_log
+                new_segments, cursor = segment_log.since(segment_cursor[0])
+                if new_segments:
+                    segment_cursor[0] = cursor
+                    task_events.publish(task_id, 'segments', {
+                        'segments': [{'start': seg['start'], 'end': seg['end'], 'text': seg['text']}
+                                     for seg in new_segments],
+                        'cursor': cursor
+                    })
+            
+            # 增量写入中的字幕文件（供下载已完成的部分）
+            if 'partial_subtitle' in progress_info:
+                task_update['partial_subtitle'] = dict(progress_info['partial_subtitle'])
             
             # 添加时间统计信息
             if 'chunk_times' in progress_info:
                 task_update['chunk_times'] = progress_info['chunk_times']
                 
-            processing_tasks[task_id].update(task_update)
-            
-            # 检查是否暂停或取消
-            while processing_tasks[task_id].get('paused', False):
-                time.sleep(1)  # 暂停时等待
-                if processing_tasks[task_id].get('cancelled', False):
-                    raise Exception('处理已取消')
-            
-            if processing_tasks[task_id].get('cancelled', False):
-                raise Exception('处理已取消')
+            processing_tasks.update(task_id, task_update)
         
-        # 创建增强处理管道
-        pipeline = EnhancedPipeline({
-            'model_size': model_size,
-            'chunk_duration': 30,  # 30秒片段，更快的初始反馈
-            'start_time': start_time,
-            'existing_subtitle': existing_subtitle
-        })
+        # 解码一次（分析音频时已解码过的文件直接复用）
+        decoded = decoded_audio.get(filepath)
+        
+        # 后台生成预览音频，识别完成时通常已可播放
+        preview_renditions.build_async(decoded)
+        processing_tasks.update(task_id, {'preview_path': preview_renditions.path_for(decoded)})
+        
+        # 创建增强处理管道（模型从进程内缓存借出）
+        # 暂停和取消由管道在片段之间及解码过程中响应
+        pipeline = EnhancedPipeline(pipeline_config(model_size, start_time, existing_subtitle,
+                                                    checkpoint, control))
         
         # 处理音频
-        result = pipeline.process_audio_chunked(
-            audio_path=filepath,
-            output_dir=app.config['OUTPUT_FOLDER'],
-            progress_callback=update_progress,
-            subtitle_format=subtitle_format
-        )
+        try:
+            result = pipeline.process_audio_chunked(
+                audio_path=filepath,
+                output_dir=app.config['OUTPUT_FOLDER'],
+                progress_callback=update_progress,
+                subtitle_format=subtitle_format,
+                decoded=decoded
+            )
+        finally:
+            pipeline.close()
         
         if result['success']:
-            # 保存结果
-            processing_tasks[task_id].update({
+            # 完整字幕保存到磁盘，只在预览时读取
+            processing_tasks.save_segments(task_id, result['segments'])
+            processing_tasks.update(task_id, {
                 'status': 'completed',
                 'progress': 100,
                 'status_message': '处理完成！',
@@ -192,20 +444,50 @@ def process_audio_task(task_id, filepath, model_size, subtitle_format, start_tim
                     'corrections': result['corrections'][:5],
                     'high_freq_terms': result['high_freq_terms'],
                     'processing_time': result['processing_time'],
-                    'chunks_processed': result['chunks_processed']
+                    'chunks_processed': result['chunks_processed'],
+                    'resumed_chunks': result['resumed_chunks'],
+                    'skipped_seconds': result['skipped_seconds']
                 },
-                'segments': result['segments'],  # 保存所有片段供预览
                 'end_time': datetime.now().isoformat()
             })
+            segment_logs.pop(task_id, None)
+            task_events.close(task_id, 'state', {'status': 'completed'})
+            checkpoint.remove()
         else:
             raise Exception(result.get('error', '处理失败'))
         
+    except JobPaused:
+        # 让出槽位；暂停期间已完成的片段保存在检查点中
+        with job_controls_lock:
+            if job_controls.get(task_id) is control:
+                del job_controls[task_id]
+            resumed = not control.paused
+            if not resumed:
+                checkpoint.save_meta({'status': 'paused'})
+                processing_tasks.update(task_id, {'paused': True, 'status': 'paused',
+                                                  'status_message': '已暂停'})
+                task_events.publish(task_id, 'state', {'status': 'paused'})
+        if resumed:
+            # 让出槽位前已被继续
+            try:
+                requeue_paused_task(task_id)
+            except QueueFullError:
+                pass  # 保持暂停，可稍后再继续
     except Exception as e:
-        processing_tasks[task_id].update({
-            'status': 'error',
+        status = 'cancelled' if control.cancelled else 'error'
+        processing_tasks.update(task_id, {
+            'status': status,
             'error': str(e),
             'end_time': datetime.now().isoformat()
         })
+        task_events.close(task_id, 'state', {'status': status, 'error': str(e)})
+        # 保留检查点，之后可通过 /resume/<task_id> 继续
+        checkpoint.save_meta({'status': status, 'error': str(e)})
+    finally:
+        # 重新排队的任务已换用新的控制对象
+        with job_controls_lock:
+            if job_controls.get(task_id) is control:
+                del job_controls[task_id]
 
 @app.route('/status/<task_id>')
 def get_status(task_id):
@@ -213,17 +495,105 @@ def get_status(task_id):
     if task_id not in processing_tasks:
         return jsonify({'error': '任务不存在'}), 404
     
-    return jsonify(processing_tasks[task_id])
+    # 预览字幕由 /preview_subtitles 或 /events 提供，状态查询不含处理中的字幕
+    task = processing_tasks.get(task_id)
+    if task is None:
+        return jsonify({'error': '任务不存在'}), 404
+    if task.get('status') == 'queued':
+        task.update(_queue_status(task_id))
+    
+    return jsonify(task)
+
+def _queue_status(task_id):
+    """排队中任务的队列位置和预计开始时间"""
+    info = scheduler.queue_info(task_id)
+    if not info or info['state'] != 'queued':
+        return {}
+    wait_seconds = info['estimated_start_in']
+    return {
+        'queue_position': info['position'],
+        'estimated_start': datetime.fromtimestamp(time.time() + wait_seconds).isoformat(),
+        'status_message': f"排队中：第 {info['position']} 位，预计 {int(wait_seconds)} 秒后开始"
+    }
+
+@app.route('/events/<task_id>')
+def task_event_stream(task_id):
+    """以Server-Sent Events推送任务事件
+    
+    事件类型：state（状态变化）、progress（进度）、segments（新识别的字幕）、
+    queue（排队信息）。每条事件带ID，断线重连时浏览器通过Last-Event-ID
+    从断点继续，只补发缺少的事件。
+    """
+    task = processing_tasks.get(task_id)
+    if task is None:
+        return jsonify({'error': '任务不存在'}), 404
+    
+    if task['status'] not in ACTIVE_STATUSES and task_id not in task_events:
+        # 事件流已随任务移出内存释放，只返回最终状态
+        task_events.close(task_id, 'state', {'status': task['status']})
+    stream = task_events.get(task_id)
+    cursor = request.headers.get('Last-Event-ID') or request.args.get('cursor') or 0
+    try:
+        cursor = int(cursor)
+    except ValueError:
+        cursor = 0
+    
+    def format_event(event_id, event_type, data):
+        payload = json.dumps(data, ensure_ascii=False)
+        return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n"
+    
+    def generate(cursor):
+        yield 'retry: 3000\n\n'
+        last_queue = None
+        while True:
+            # 排队期间定期检查队列位置，其余时间只在有新事件时唤醒
+            queued = (processing_tasks.get(task_id) or {}).get('status') == 'queued'
+            events, closed = stream.read_since(cursor, timeout=2 if queued else 15)
+            for event_id, event_type, data in events:
+                yield format_event(event_id, event_type, data)
+                cursor = event_id
+            if closed:
+                return
+            
+            if queued:
+                queue = _queue_status(task_id)
+                if queue and queue != last_queue:
+                    last_queue = queue
+                    yield f"event: queue\ndata: {json.dumps(queue, ensure_ascii=False)}\n\n"
+            elif not events:
+                yield ': keepalive\n\n'
+    
+    return Response(
+        stream_with_context(generate(cursor)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/download/<task_id>')
 def download_subtitle(task_id):
     """下载字幕文件"""
-    if task_id not in processing_tasks:
+    task = processing_tasks.get(task_id)
+    if task is None:
         return jsonify({'error': '任务不存在'}), 404
     
-    task = processing_tasks[task_id]
     if task['status'] != 'completed':
-        return jsonify({'error': '任务尚未完成'}), 400
+        # 处理中：返回已完整写入的部分（只包含完整的字幕条目）
+        partial = task.get('partial_subtitle')
+        if not partial:
+            return jsonify({'error': '任务尚未完成'}), 400
+        try:
+            data = read_partial_subtitle(partial['path'], partial['final_path'], partial['size'])
+        except FileNotFoundError:
+            return jsonify({'error': '文件不存在'}), 404
+        response = send_file(
+            io.BytesIO(data),
+            as_attachment=True,
+            download_name=os.path.basename(partial['final_path']),
+            mimetype='text/plain'
+        )
+        response.headers['X-Subtitle-Partial'] = '1'
+        response.headers['Cache-Control'] = 'no-store'
+        return response
     
     subtitle_path = task['result']['subtitle_path']
     if os.path.exists(subtitle_path):
@@ -234,13 +604,8 @@ def download_subtitle(task_id):
 @app.route('/terms')
 def get_terms():
     """获取术语库"""
-    try:
-        terms_file = os.path.join(app.config['DATA_FOLDER'], 'terms.json')
-        with open(terms_file, 'r', encoding='utf-8') as f:
-            terms = json.load(f)
-        return jsonify(terms)
-    except FileNotFoundError:
-        return jsonify({})
+    # terms.json只是快照，最新内容以术语管理器为准
+    return jsonify(get_term_manager().get_all_terms())
 
 @app.route('/add_correction', methods=['POST'])
 def add_correction():
@@ -253,11 +618,8 @@ def add_correction():
     if not original or not corrected:
         return jsonify({'error': '缺少必要参数'}), 400
     
-    # 使用术语管理器添加纠正，传入正确的路径
-    from src.term_manager import TermManager
-    terms_file = os.path.join(app.config['DATA_FOLDER'], 'terms.json')
-    log_file = os.path.join(app.config['DATA_FOLDER'], 'corrections_log.json')
-    term_manager = TermManager(terms_file, log_file)
+    # 使用共享的术语管理器，正在运行的任务会通过术语索引增量获得更新
+    term_manager = get_term_manager()
     term_manager.add_correction(original, corrected, context, confidence=1.0)
     
     return jsonify({
@@ -265,46 +627,81 @@ def add_correction():
         'term': {
             'original': original,
             'corrected': corrected
-        }
+        },
+        'version': term_manager.index.version
     })
 
 @app.route('/preview/<task_id>')
 def preview_audio(task_id):
-    """获取音频文件用于预览"""
-    if task_id not in processing_tasks:
+    """获取音频文件用于预览
+    
+    优先返回低码率的预览音频（内容不变，可长期缓存）；尚未生成时返回原始文件。
+    两者都支持范围请求（拖动进度条时只读取需要的部分）和ETag条件请求。
+    """
+    task = processing_tasks.get(task_id)
+    if task is None:
         return jsonify({'error': '任务不存在'}), 404
     
-    task = processing_tasks[task_id]
+    preview_path = task.get('preview_path')
+    if preview_path:
+        path = preview_renditions.get(preview_path, timeout=PREVIEW_WAIT_SECONDS)
+        if path:
+            # 文件名即内容的哈希，作为ETag（最近使用时间会更新，不能用默认的mtime）
+            response = send_file(path, mimetype=preview_renditions.mimetype,
+                                 conditional=True, etag=os.path.basename(path))
+            response.headers['Cache-Control'] = 'private, max-age=86400'
+            return response
+    
     audio_path = task.get('filepath')
     
     if audio_path and os.path.exists(audio_path):
-        # 返回音频文件，支持范围请求（用于拖动进度条）
-        return send_file(audio_path, mimetype='audio/mpeg', as_attachment=False)
+        ext = audio_path.rsplit('.', 1)[-1].lower()
+        response = send_file(audio_path, mimetype=AUDIO_MIMETYPES.get(ext, 'application/octet-stream'),
+                             conditional=True, etag=True)
+        # 预览音频生成后应改用预览音频，每次重新验证
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     
     return jsonify({'error': '音频文件不存在'}), 404
 
+def _preview_segment(seg):
+    """预览只需要时间和文本"""
+    return {'start': seg['start'], 'end': seg['end'], 'text': seg['text']}
+
 @app.route('/preview_subtitles/<task_id>')
 def preview_subtitles(task_id):
-    """获取实时字幕预览"""
-    if task_id not in processing_tasks:
+    """获取实时字幕预览
+    
+    带 ?since=<cursor> 时只返回该游标之后新增的字幕（按识别完成顺序），
+    否则返回按时间排序的完整预览。两种情况都返回新的cursor。
+    """
+    task = processing_tasks.get(task_id)
+    if task is None:
         return jsonify({'error': '任务不存在'}), 404
     
-    task = processing_tasks[task_id]
+    since = request.args.get('since', type=int)
     
     # 返回当前已处理的片段
+    segments, cursor = [], since or 0
+    segment_log = segment_logs.get(task_id)
+    if segment_log is not None:
+        segments, cursor = (segment_log.since(since) if since is not None
+                            else segment_log.snapshot())
+    
+    # 如果已完成，完整预览返回最终字幕（从磁盘读取）
+    if since is None and task.get('status') == 'completed':
+        segments = processing_tasks.load_segments(task_id)
+    
     preview_data = {
         'status': task.get('status'),
         'progress': task.get('progress', 0),
         'current_chunk': task.get('current_chunk', 0),
         'total_chunks': task.get('total_chunks', 0),
-        'segments': task.get('partial_segments', []),
+        'segments': [_preview_segment(seg) for seg in segments],
+        'cursor': cursor,
         'status_message': task.get('status_message', '')
     }
     
-    # 如果已完成，返回所有片段
-    if task.get('status') == 'completed' and 'segments' in task:
-        preview_data['segments'] = task['segments']
-    
     return jsonify(preview_data)
 
 @app.route('/analyze_audio', methods=['POST'])
@@ -324,29 +721,14 @@ def analyze_audio():
             file.save(tmp_file.name)
             
             try:
-                # 获取音频时长
-                from src.audio_splitter import AudioSplitter
-                splitter = AudioSplitter(30)  # 30秒分片
-                duration = splitter.get_audio_duration(tmp_file.name)
+                # 解码并获取时长（解码结果按内容缓存，上传处理时直接复用）
+                try:
+                    duration = decoded_audio.get(tmp_file.name).duration
+                except subprocess.CalledProcessError:
+                    return jsonify({'error': '无法解码音频文件'}), 400
                 
                 # 计算分片
-                chunks = []
-                chunk_duration = 30
-                for i in range(0, int(duration), chunk_duration):
-                    start = i
-                    end = min(i + chunk_duration, duration)
-                    chunks.append({
-                        'index': len(chunks),
-                        'start': start,
-                        'end': end,
-                        'label': f'{start}秒 - {end}秒 (片段{len(chunks)+1})'
-                    })
-                
-                return jsonify({
-                    'duration': duration,
-                    'chunks': chunks,
-                    'chunk_duration': chunk_duration
-                })
+                return jsonify(chunk_plan(duration))
                 
             finally:
                 # 清理临时文件
@@ -354,35 +736,342 @@ def analyze_audio():
     
     return jsonify({'error': '不支持的文件格式'}), 400
 
+# 进行中的分块上传（服务重启后从上传状态文件重新读取）
+chunked_uploads = {}
+chunked_uploads_lock = threading.Lock()
+transcribe_ahead_lock = threading.Lock()  # 保护各上传的预先识别状态
+
+def get_chunked_upload(upload_id):
+    with chunked_uploads_lock:
+        upload = chunked_uploads.get(upload_id)
+        if upload is None:
+            upload = ChunkedUpload.load(app.config['CHUNKED_UPLOAD_FOLDER'], upload_id)
+            if upload is not None:
+                chunked_uploads[upload_id] = upload
+        return upload
+
+def upload_status(upload):
+    decoded = upload.decoded_prefix()
+    return {
+        'upload_id': upload.upload_id,
+        'received': upload.received,
+        'size': upload.size,
+        'finished': upload.finished,
+        'decoded_seconds': decoded.duration if decoded is not None else 0,
+        'transcribed_chunks': len(JobCheckpoint(app.config['CHECKPOINT_FOLDER'],
+                                                upload.upload_id).completed_chunks())
+    }
+
+@app.route('/uploads', methods=['POST'])
+def create_chunked_upload():
+    """开始分块上传
+    
+    JSON参数：filename, size（字节数），可选 model_size, subtitle_format。
+    给出模型时，上传过程中就用该模型预先识别已到达的片段；之后用
+    PUT /uploads/<id>?offset=N 按顺序上传各分块。
+    """
+    data = request.get_json(silent=True) or {}
+    filename = secure_filename(data.get('filename') or '')
+    size = data.get('size')
+    if not filename or not allowed_file(filename):
+        return jsonify({'error': '不支持的文件格式'}), 400
+    if not isinstance(size, int) or size <= 0:
+        return jsonify({'error': '缺少文件大小'}), 400
+    if size > app.config['MAX_CONTENT_LENGTH']:
+        return jsonify({'error': '文件过大'}), 413
+    
+    upload_id = str(uuid.uuid4())  # 上传完成后即为任务ID
+    params = {'filename': filename}
+    if data.get('model_size'):
+        params.update(model_size=data['model_size'], subtitle_format=data.get('subtitle_format', 'srt'))
+    upload = ChunkedUpload.create(app.config['CHUNKED_UPLOAD_FOLDER'], upload_id,
+                                  upload_path(filename), size, params)
+    with chunked_uploads_lock:
+        chunked_uploads[upload_id] = upload
+    return jsonify({**upload_status(upload), 'chunk_size': app.config['UPLOAD_CHUNK_SIZE']}), 201
+
+@app.route('/uploads/<upload_id>', methods=['GET'])
+def get_chunked_upload_status(upload_id):
+    """上传进度：已接收的字节数（续传时从这里继续）、已解码时长、已预先识别的片段数"""
+    upload = get_chunked_upload(upload_id)
+    if upload is None:
+        return jsonify({'error': '上传不存在'}), 404
+    return jsonify(upload_status(upload))
+
+@app.route('/uploads/<upload_id>', methods=['PUT'])
+def put_upload_chunk(upload_id):
+    """上传一个分块（请求体为原始字节，offset为分块的起始位置）"""
+    upload = get_chunked_upload(upload_id)
+    if upload is None:
+        return jsonify({'error': '上传不存在'}), 404
+    offset = request.args.get('offset', type=int)
+    if offset is None:
+        return jsonify({'error': '缺少offset参数'}), 400
+    try:
+        upload.write(offset, request.stream)
+    except UploadOffsetError as e:
+        return jsonify({'error': str(e), 'received': e.received}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    schedule_transcribe_ahead(upload)
+    return jsonify(upload_status(upload))
+
+@app.route('/uploads/<upload_id>/complete', methods=['POST'])
+def complete_chunked_upload(upload_id):
+    """完成上传，返回时长和片段划分（取代单独的 /analyze_audio）"""
+    upload = get_chunked_upload(upload_id)
+    if upload is None:
+        return jsonify({'error': '上传不存在'}), 404
+    try:
+        decoded = upload.finish(decoded_audio)
+    except UploadOffsetError as e:
+        return jsonify({'error': '数据尚未全部上传', 'received': e.received}), 409
+    except subprocess.CalledProcessError:
+        return jsonify({'error': '无法解码音频文件'}), 400
+    
+    # 最后一段数据到达后，预先识别剩余的完整片段，同时生成预览音频
+    schedule_transcribe_ahead(upload)
+    preview_renditions.build_async(decoded)
+    return jsonify({**chunk_plan(decoded.duration), **upload_status(upload)})
+
+@app.route('/uploads/<upload_id>/process', methods=['POST'])
+def process_chunked_upload(upload_id):
+    """处理已上传完成的文件（任务ID与上传ID相同）
+    
+    JSON参数：model_size, subtitle_format, start_time, existing_subtitle（字幕文本）。
+    模型或字幕格式与预先识别时不同，则丢弃预先识别的结果。
+    """
+    upload = get_chunked_upload(upload_id)
+    if upload is None:
+        return jsonify({'error': '上传不存在'}), 404
+    if not upload.finished:
+        return jsonify({'error': '数据尚未全部上传', 'received': upload.received}), 409
+    
+    data = request.get_json(silent=True) or {}
+    params = {
+        'filename': upload.params['filename'],
+        'filepath': upload.audio_path,
+        'model_size': data.get('model_size', 'medium'),
+        'subtitle_format': data.get('subtitle_format', 'srt'),
+        'start_time': float(data.get('start_time', 0)),
+        'existing_subtitle': data.get('existing_subtitle') or None
+    }
+    
+    # 停止预先识别（正在识别的片段立即中止）；参数不同时预先识别的结果不能使用
+    upload.control.cancel()
+    if upload.ahead_job_id:
+        scheduler.cancel(upload.ahead_job_id)
+    ahead = (upload.params.get('model_size'), upload.params.get('subtitle_format'))
+    if ahead != (params['model_size'], params['subtitle_format']):
+        JobCheckpoint(app.config['CHECKPOINT_FOLDER'], upload_id).remove()
+    
+    try:
+        enqueue_task(upload_id, params)
+    except QueueFullError:
+        return jsonify({'error': '服务器繁忙，等待队列已满，请稍后再试'}), 503
+    
+    upload.remove()
+    with chunked_uploads_lock:
+        chunked_uploads.pop(upload_id, None)
+    return jsonify({
+        'task_id': upload_id,
+        'message': '文件上传成功，已加入处理队列...'
+    })
+
+def schedule_transcribe_ahead(upload):
+    """已解码的部分比上次预先识别时多出至少两个片段时，提交一次预先识别
+    
+    在调度器的识别槽位中执行，与正式任务共享并发限制；正式任务开始前停止。
+    """
+    if not upload.params.get('model_size') or app.config['TRANSCRIBE_WORKERS'] > 1:
+        return  # 多进程模式下模型在工作进程中，不预先识别
+    with transcribe_ahead_lock:
+        if upload.control.cancelled or upload.ahead_scheduled:
+            return
+        decoded = upload.decoded_prefix()
+        if decoded is None:
+            return
+        if upload.finished:
+            # 上传完成后识别到末尾
+            if decoded.duration <= upload.ahead_seconds:
+                return
+        elif decoded.duration - upload.ahead_seconds < 2 * CHUNK_DURATION:
+            return  # 上传中至少多出两个片段（最后一个片段不识别）
+        # 每次提交使用新的任务ID：识别期间到达的数据由本次任务结束时再提交
+        job_id = f"{upload.upload_id}:ahead:{uuid.uuid4().hex[:8]}"
+        try:
+            scheduler.submit(job_id, transcribe_ahead_task, upload, priority=upload.size)
+        except QueueFullError:
+            return
+        upload.ahead_scheduled = True
+        upload.ahead_job_id = job_id
+
+def transcribe_ahead_task(upload):
+    """预先识别已解码部分的片段，结果写入任务检查点"""
+    try:
+        partial = not upload.finished  # 先于读取解码结果判断，避免把不完整的末尾当作完整
+        decoded = upload.decoded_prefix()
+        if upload.control.cancelled or decoded is None:
+            return
+        checkpoint = JobCheckpoint(app.config['CHECKPOINT_FOLDER'], upload.upload_id)
+        pipeline = EnhancedPipeline(pipeline_config(upload.params['model_size'], checkpoint=checkpoint,
+                                                    control=upload.control))
+        try:
+            pipeline.transcribe_ahead(decoded, upload.params['subtitle_format'], partial=partial)
+        finally:
+            pipeline.close()
+        upload.ahead_seconds = decoded.duration
+    finally:
+        with transcribe_ahead_lock:
+            upload.ahead_scheduled = False
+    # 识别期间又到达的数据
+    schedule_transcribe_ahead(upload)
+
+def expire_chunked_uploads():
+    """删除长时间没有新数据的上传：停止预先识别，中止边上传边解码的ffmpeg，删除未完成的数据"""
+    now = time.time()
+    for upload_id in ChunkedUpload.list_ids(app.config['CHUNKED_UPLOAD_FOLDER']):
+        upload = get_chunked_upload(upload_id)
+        if upload is None or now - upload.last_active() < app.config['UPLOAD_TTL_SECONDS']:
+            continue
+        with chunked_uploads_lock:
+            chunked_uploads.pop(upload_id, None)
+        upload.control.cancel()
+        if upload.ahead_job_id:
+            scheduler.cancel(upload.ahead_job_id)
+        upload.remove()
+        JobCheckpoint(app.config['CHECKPOINT_FOLDER'], upload_id).remove()
+        print(f"删除过期的上传: {upload_id}")
+
+def sweep_chunked_uploads(interval=600):
+    """后台定期清理过期的上传"""
+    while True:
+        try:
+            expire_chunked_uploads()
+        except Exception as e:
+            print(f"清理过期上传失败: {e}")
+        time.sleep(interval)
+
 @app.route('/pause/<task_id>', methods=['POST'])
 def pause_task(task_id):
-    """暂停处理任务"""
-    if task_id not in processing_tasks:
+    """暂停处理任务
+    
+    当前片段识别完后（已保存到检查点）任务结束并让出执行槽位，排队中的其他任务
+    可以开始；继续时重新排队。
+    """
+    task = processing_tasks.get(task_id)
+    if task is None:
         return jsonify({'error': '任务不存在'}), 404
+    if task['status'] == 'paused':
+        return jsonify({'message': '任务已暂停'})
+    control = job_controls.get(task_id)
+    if control is None:
+        return jsonify({'error': '任务已结束'}), 400
     
-    processing_tasks[task_id]['paused'] = True
-    processing_tasks[task_id]['status'] = 'paused'
+    control.pause()
+    processing_tasks.update(task_id, {'paused': True, 'status': 'paused'})
+    task_events.publish(task_id, 'state', {'status': 'paused'})
     return jsonify({'message': '任务已暂停'})
 
 @app.route('/resume/<task_id>', methods=['POST'])
 def resume_task(task_id):
-    """继续处理任务"""
-    if task_id not in processing_tasks:
-        return jsonify({'error': '任务不存在'}), 404
+    """继续处理任务
+    
+    尚未让出槽位的暂停任务直接继续；已让出槽位的暂停任务、已取消、失败或服务
+    重启后丢失的任务从检查点重新排队，已完成的片段不再识别。
+    """
+    task = processing_tasks.get(task_id)
+    if task is None or task['status'] in ('cancelled', 'error'):
+        return resume_from_checkpoint(task_id)
     
-    processing_tasks[task_id]['paused'] = False
-    processing_tasks[task_id]['status'] = 'processing'
+    with job_controls_lock:
+        control = job_controls.get(task_id)
+        if control is not None:
+            control.resume()
+    if control is None and task['status'] == 'paused':
+        meta = JobCheckpoint(app.config['CHECKPOINT_FOLDER'], task_id).load_meta()
+        if not os.path.exists(meta.get('filepath', '')):
+            return jsonify({'error': '音频文件已不存在，无法继续'}), 410
+        try:
+            requeue_paused_task(task_id)
+        except QueueFullError:
+            return jsonify({'error': '服务器繁忙，等待队列已满，请稍后再试'}), 503
+        return jsonify({'message': '任务已继续'})
+    info = scheduler.queue_info(task_id)
+    status = 'queued' if info and info['state'] == 'queued' else 'processing'
+    processing_tasks.update(task_id, {'paused': False, 'status': status})
+    task_events.publish(task_id, 'state', {'status': status})
     return jsonify({'message': '任务已继续'})
 
+def resume_from_checkpoint(task_id):
+    """从检查点重新提交任务"""
+    if scheduler.queue_info(task_id):
+        return jsonify({'error': '任务仍在执行，请稍后再试'}), 409
+    checkpoints = {c.job_id: c for c in JobCheckpoint.list_jobs(app.config['CHECKPOINT_FOLDER'])}
+    if task_id not in checkpoints:
+        return jsonify({'error': '任务不存在'}), 404
+    checkpoint = checkpoints[task_id]
+    meta = checkpoint.load_meta()
+    if not os.path.exists(meta['filepath']):
+        return jsonify({'error': '音频文件已不存在，无法继续'}), 410
+    
+    completed = len(checkpoint.completed_chunks())
+    try:
+        enqueue_task(task_id, meta)
+    except QueueFullError:
+        return jsonify({'error': '服务器繁忙，等待队列已满，请稍后再试'}), 503
+    return jsonify({'message': f'任务已从检查点继续（已完成 {completed} 个片段）',
+                    'completed_chunks': completed})
+
+@app.route('/checkpoints')
+def list_checkpoints():
+    """可继续的任务（未完成的检查点）"""
+    jobs = []
+    for checkpoint in JobCheckpoint.list_jobs(app.config['CHECKPOINT_FOLDER']):
+        meta = checkpoint.load_meta()
+        task = processing_tasks.get(checkpoint.job_id)
+        jobs.append({
+            'task_id': checkpoint.job_id,
+            'filename': meta.get('filename'),
+            'status': task['status'] if task else meta.get('status'),
+            'created': meta.get('created'),
+            'completed_chunks': len(checkpoint.completed_chunks())
+        })
+    return jsonify(jobs)
+
+def recover_jobs():
+    """服务启动时继续上次中断的任务（排队中或处理中时进程退出）"""
+    for checkpoint in JobCheckpoint.list_jobs(app.config['CHECKPOINT_FOLDER']):
+        meta = checkpoint.load_meta()
+        if meta.get('status') not in ('queued', 'processing') or not os.path.exists(meta['filepath']):
+            continue
+        try:
+            enqueue_task(checkpoint.job_id, meta)
+            print(f"继续中断的任务: {checkpoint.job_id} ({meta.get('filename')})")
+        except QueueFullError:
+            break
+
 @app.route('/cancel/<task_id>', methods=['POST'])
 def cancel_task(task_id):
     """取消处理任务"""
-    if task_id not in processing_tasks:
+    task = processing_tasks.get(task_id)
+    if task is None:
         return jsonify({'error': '任务不存在'}), 404
     
-    processing_tasks[task_id]['cancelled'] = True
-    processing_tasks[task_id]['status'] = 'cancelled'
-    return jsonify({'message': '任务已取消'})
+    # 尚未开始的任务直接从队列中移除；处理中的任务在当前解码步骤后停止
+    control = job_controls.get(task_id)
+    if control is not None:
+        control.cancel()
+    removed = scheduler.cancel(task_id)
+    processing_tasks.update(task_id, {'cancelled': True, 'status': 'cancelled'})
+    if removed or (control is None and task['status'] == 'paused'):
+        # 未开始或暂停中已让出槽位，不会再有处理线程更新状态
+        job_controls.pop(task_id, None)
+        processing_tasks.update(task_id, {'end_time': datetime.now().isoformat()})
+        JobCheckpoint(app.config['CHECKPOINT_FOLDER'], task_id).save_meta({'status': 'cancelled'})
+    task_events.close(task_id, 'state', {'status': 'cancelled'})
+    return jsonify({'message': '任务已取消', 'removed_from_queue': removed})
 
 @app.route('/clear_uploads', methods=['POST'])
 def clear_uploads():
@@ -395,6 +1084,47 @@ def clear_uploads():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def warmup_models():
+    """服务启动时预加载模型（WARMUP_MODELS=medium,large-v3）"""
+    model_sizes = [m.strip() for m in os.environ.get('WARMUP_MODELS', '').split(',') if m.strip()]
+    if not model_sizes or app.config['RECOGNIZER_BACKEND'] == StubBackend.name:
+        return
+    import torch
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    if app.config['RECOGNIZER_BACKEND'] == QuantizedWhisperBackend.name:
+        model_sizes = [QuantizedWhisperBackend.model_key(m) for m in model_sizes]
+        device = "cpu"
+    threading.Thread(
+        target=get_model_registry().warmup,
+        args=(model_sizes, device),
+        daemon=True
+    ).start()
+
+@app.route('/models')
+def get_models():
+    """查看已缓存的模型"""
+    return jsonify(get_model_registry().stats())
+
+_background_started = False
+_background_lock = threading.Lock()
+
+def _start_background_services():
+    """启动后台服务：预加载模型、继续中断的任务、定期清理过期的上传（每个进程只执行一次）"""
+    global _background_started
+    with _background_lock:
+        if _background_started:
+            return
+        _background_started = True
+    warmup_models()
+    if app.config['AUTO_RESUME_JOBS']:
+        recover_jobs()
+    threading.Thread(target=sweep_chunked_uploads, daemon=True, name='upload-sweeper').start()
+
+# 在提供服务的进程中启动（python app.py、flask run、gunicorn等WSGI服务器）；
+# 开发服务器的重载父进程只监视文件变化，不处理请求，跳过
+if not (__name__ == '__main__' and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'):
+    _start_background_services()
+
 if __name__ == '__main__':
     # 显示启动信息
     print(f"\n{'='*50}")
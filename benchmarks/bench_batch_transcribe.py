@@ -0,0 +1,100 @@
+"""批量识别基准：逐个片段transcribe vs 多个片段一起解码
+
+基线是管道原有的识别方式：每个片段调用一次 SpeechRecognizer.transcribe
+（Whisper的transcribe，以前文为条件）；另外给出 transcribe_batch 在batch_size=1
+和N时的结果，区分解码流程和批维度各自带来的差异。三者都关闭温度回退并固定
+解码长度，保证计算量可比。
+
+用法:
+    python benchmarks/bench_batch_transcribe.py 音频文件 [--model tiny] [--chunks 8] [--batch-size 4]
+    python benchmarks/bench_batch_transcribe.py 音频文件 --random-weights   # 无法下载模型时，用随机权重的tiny结构
+    python benchmarks/bench_batch_transcribe.py 音频文件 --backend whisper-int8  # int8量化后端
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+import whisper
+
+from src.model_registry import ModelRegistry
+from src.recognizer_backends import INT8_SUFFIX, quantize_whisper
+from src.speech_recognizer import SpeechRecognizer
+
+# 与whisper tiny相同的结构
+TINY_DIMS = dict(n_mels=80, n_vocab=51865, n_audio_ctx=1500, n_audio_state=384,
+                 n_audio_head=6, n_audio_layer=4, n_text_ctx=448, n_text_state=384,
+                 n_text_head=6, n_text_layer=4)
+
+
+def load_chunks(audio_path: str, count: int, seconds: int = 30):
+    """把音频切成count个片段（音频不够长时循环使用）"""
+    audio = whisper.load_audio(audio_path)
+    size = seconds * whisper.audio.SAMPLE_RATE
+    starts = range(0, max(1, len(audio) - size + 1), size)
+    chunks = [audio[start:start + size] for start in starts]
+    return [chunks[i % len(chunks)] for i in range(count)]
+
+
+def _random_loader(model_size, device):
+    """随机权重的tiny结构（无法下载模型时使用）"""
+    torch.manual_seed(0)
+    model = whisper.model.Whisper(whisper.model.ModelDimensions(**TINY_DIMS)).eval()
+    return quantize_whisper(model) if model_size.endswith(INT8_SUFFIX) else model
+
+
+def timed(label, func, chunks):
+    started = time.perf_counter()
+    results = func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed:8.2f} s  {len(chunks) / elapsed:6.2f} 片段/秒")
+    return elapsed, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('audio')
+    parser.add_argument('--model', default='tiny')
+    parser.add_argument('--device', default='cpu')
+    parser.add_argument('--backend', default='whisper', choices=['whisper', 'whisper-int8'])
+    parser.add_argument('--chunks', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=4)
+    parser.add_argument('--sample-len', type=int, default=64, help='每个窗口解码的最大token数')
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--random-weights', action='store_true')
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    loader = _random_loader if args.random_weights else None
+
+    recognizer = SpeechRecognizer(args.model, args.device, registry=ModelRegistry(loader=loader),
+                                  backend=args.backend)
+    chunks = load_chunks(args.audio, args.chunks)
+    params = dict(sample_len=args.sample_len, compression_ratio_threshold=None,
+                  logprob_threshold=None, no_speech_threshold=None,
+                  verbose=None)  # 不显示transcribe的进度条
+
+    # 预热（首次运行包含内存分配等一次性开销）
+    recognizer.transcribe(chunks[0], **params)
+    recognizer.transcribe_batch(chunks[:1], batch_size=1, **params)
+
+    print(f"{len(chunks)} 个30秒片段，模型 {args.model}（{args.backend}），torch线程 {torch.get_num_threads()}")
+    sequential, sequential_results = timed(
+        '逐个transcribe', lambda: [recognizer.transcribe(chunk, **params) for chunk in chunks], chunks)
+    timed('transcribe_batch (batch=1)',
+          lambda: recognizer.transcribe_batch(chunks, batch_size=1, **params), chunks)
+    batched, batched_results = timed(
+        f'transcribe_batch (batch={args.batch_size})',
+        lambda: recognizer.transcribe_batch(chunks, batch_size=args.batch_size, **params), chunks)
+    print(f"相对逐个transcribe的加速比: {sequential / batched:.2f}x")
+
+    same = sum(a['text'] == b['text'] for a, b in zip(sequential_results, batched_results))
+    print(f"识别文本一致的片段: {same}/{len(chunks)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""字幕渲染微基准：逐条写入（旧实现） vs 批量渲染
+
+用法:
+    python benchmarks/bench_subtitle_render.py [字幕条数]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.subtitle_generator import SubtitleGenerator
+
+
+def legacy_srt_time(seconds: float) -> str:
+    """旧实现：timedelta + 浮点格式化"""
+    td = timedelta(seconds=seconds)
+    hours = int(td.total_seconds() // 3600)
+    minutes = int((td.total_seconds() % 3600) // 60)
+    seconds = td.total_seconds() % 60
+    return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}".replace('.', ',')
+
+
+def legacy_generate_srt(segments, output_path):
+    """旧实现：每条字幕多次f.write"""
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for i, segment in enumerate(segments, 1):
+            f.write(f"{i}\n")
+            start_time = legacy_srt_time(segment['start'])
+            end_time = legacy_srt_time(segment['end'])
+            f.write(f"{start_time} --> {end_time}\n")
+            f.write(f"{segment['text'].strip()}\n\n")
+
+
+def make_segments(count: int):
+    """模拟词级字幕：每条约0.3秒"""
+    rng = np.random.default_rng(0)
+    starts = np.cumsum(rng.uniform(0.1, 0.5, count))
+    ends = starts + rng.uniform(0.1, 0.4, count)
+    texts = [f"単語{i}" for i in range(count)]
+    segments = [{'start': float(s), 'end': float(e), 'text': t}
+                for s, e, t in zip(starts, ends, texts)]
+    return segments, starts, ends, texts
+
+
+def timed(label, func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<28} {best * 1000:8.1f} ms")
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    segments, starts, ends, texts = make_segments(count)
+    generator = SubtitleGenerator()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        legacy_path = os.path.join(temp_dir, 'legacy.srt')
+        bulk_path = os.path.join(temp_dir, 'bulk.srt')
+
+        print(f"{count} 条字幕")
+        legacy = timed('逐条写入（旧实现）', lambda: legacy_generate_srt(segments, legacy_path))
+        bulk = timed('批量渲染 write()', lambda: generator.write(segments, bulk_path, 'srt'))
+        timed('批量渲染 列式输入', lambda: generator.render(
+            subtitle_format='srt', starts=starts, ends=ends, texts=texts))
+        timed('批量渲染 VTT', lambda: generator.render(segments, 'vtt'))
+        timed('批量渲染 ASS', lambda: generator.render(segments, 'ass'))
+        print(f"加速比: {legacy / bulk:.1f}x")
+
+        with open(legacy_path, encoding='utf-8') as f, open(bulk_path, encoding='utf-8') as g:
+            legacy_lines, bulk_lines = f.read().splitlines(), g.read().splitlines()
+        diff = sum(1 for a, b in zip(legacy_lines, bulk_lines) if a != b)
+        print(f"与旧实现不同的行数: {diff}（旧实现对.xxx5的舍入依赖浮点表示）")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,18 +2,45 @@
 import os
 import subprocess
 import json
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Union
 import math
+import numpy as np
+
+from .vad import frame_energy
+
+# Whisper使用的采样率
+SAMPLE_RATE = 16000
+
+# 切分点搜索：能量帧长（毫秒）和比较的静音跨度（秒）
+BOUNDARY_FRAME_MS = 10
+QUIET_SPAN = 0.2
 
 class AudioSplitter:
-    def __init__(self, chunk_duration: int = 60):
+    def __init__(self, chunk_duration: int = 60, mode: str = "file",
+                 boundary_window: float = 0.0, overlap: float = 0.0):
         """
         初始化音频分割器
         
         Args:
             chunk_duration: 每个片段的时长（秒），默认60秒
+            mode: 分割方式
+                - "file": 每个片段单独调用ffmpeg导出MP3文件
+                - "pcm": 整个文件只解码一次为16kHz单声道PCM，片段直接从内存切片
+            boundary_window: 切分点搜索窗口（秒，仅pcm模式）。大于0时，每个切分点
+                移到名义边界之前该窗口内能量最低的位置，避免把词从中间切开
+            overlap: 相邻片段的重叠时长（秒，仅pcm模式）。重叠部分的字幕在合并时
+                按 keep_start/keep_end 去重
         """
+        if mode not in ("file", "pcm"):
+            raise ValueError(f"不支持的分割方式: {mode}")
         self.chunk_duration = chunk_duration
+        self.mode = mode
+        # 窗口不超过半个片段，保证每个片段都向前推进
+        self.boundary_window = min(boundary_window, chunk_duration / 2)
+        self.overlap = overlap
+        self._pcm = None  # pcm模式下解码后的int16采样
+        self._energy = None  # 切分点搜索用的帧能量（按需计算）
+        self.total_duration = 0.0  # pcm模式下解码得到的总时长
     
     def get_audio_duration(self, audio_path: str) -> float:
         """获取音频文件时长"""
@@ -33,17 +60,47 @@ class AudioSplitter:
             print(f"获取音频时长失败: {e}")
             return 0
     
-    def split_audio(self, audio_path: str, output_dir: str) -> List[Dict]:
+    def decode_pcm(self, audio_path: str) -> np.ndarray:
+        """用一次ffmpeg调用将整个文件解码为16kHz单声道int16 PCM"""
+        cmd = [
+            'ffmpeg',
+            '-nostdin',
+            '-threads', '0',
+            '-i', audio_path,
+            '-f', 's16le',
+            '-ac', '1',
+            '-acodec', 'pcm_s16le',
+            '-ar', str(SAMPLE_RATE),
+            '-'
+        ]
+        result = subprocess.run(cmd, capture_output=True, check=True)
+        return np.frombuffer(result.stdout, np.int16)
+    
+    def split_audio(self, audio_path: str, output_dir: str, vad=None,
+                    decoded=None) -> List[Dict]:
         """
         将音频文件分割成多个片段
         
+        Args:
+            audio_path: 音频文件路径
+            output_dir: 片段文件输出目录（file模式）
+            vad: 语音检测器（仅pcm模式），提供 detect(pcm, sample_rate)；
+                给定时跳过静音，把语音区间合并为不超过chunk_duration的变长片段
+            decoded: 已解码的音频（DecodedAudio），给定时直接使用其PCM，不再调用ffmpeg解码
+        
         Returns:
-            片段信息列表，每个包含 {filename, start_time, end_time, duration}
+            片段信息列表，每个包含 {filename, start_time, end_time, duration}；
+            pcm模式下filename为None，另含采样区间samples，用load_chunk读取
         """
+        if self.mode == "pcm":
+            return self._split_pcm(audio_path, vad, decoded)
+        if vad is not None:
+            print("file模式不支持语音检测，已忽略")
+        
         os.makedirs(output_dir, exist_ok=True)
         
         # 获取总时长
-        total_duration = self.get_audio_duration(audio_path)
+        total_duration = decoded.duration if decoded is not None else self.get_audio_duration(audio_path)
         if total_duration == 0:
             return []
         
@@ -88,12 +145,176 @@ class AudioSplitter:
         
         return chunks
     
-    def merge_subtitles(self, subtitle_segments: List[List[Dict]]) -> List[Dict]:
+    def _split_pcm(self, audio_path: str, vad=None, decoded=None) -> List[Dict]:
+        """解码一次后按采样区间切分，不再为每个片段重新解码"""
+        if decoded is not None:
+            self._pcm = decoded.pcm
+        else:
+            try:
+                self._pcm = self.decode_pcm(audio_path)
+            except subprocess.CalledProcessError as e:
+                print(f"解码音频失败: {e}")
+                return []
+        self._energy = None
+        
+        total_samples = len(self._pcm)
+        self.total_duration = total_samples / SAMPLE_RATE
+        if total_samples == 0:
+            return []
+        
+        if vad is not None:
+            regions = vad.detect(self._pcm, SAMPLE_RATE)
+            return self._spans_to_chunks(self._pack_regions(regions))
+        
+        cuts = self.plan_cuts(0.0, self.total_duration)
+        return self._spans_to_chunks(list(zip(cuts[:-1], cuts[1:])))
+    
+    def plan_cuts(self, start: float, end: float) -> List[float]:
+        """规划 [start, end] 区间内的切分点
+        
+        每个名义边界（上一切分点 + chunk_duration）在 boundary_window 内
+        向前移到最安静的位置，片段因此不会超过chunk_duration。
+        
+        Returns:
+            切分点列表（秒），首尾分别为start和end
+        """
+        cuts = [start]
+        while end - cuts[-1] > self.chunk_duration:
+            nominal = cuts[-1] + self.chunk_duration
+            if self.boundary_window > 0 and self._pcm is not None:
+                cuts.append(self._quietest_point(nominal - self.boundary_window, nominal))
+            else:
+                cuts.append(nominal)
+        cuts.append(end)
+        return cuts
+    
+    def _quietest_point(self, lo: float, hi: float) -> float:
+        """返回 [lo, hi] 内平均能量最低的QUIET_SPAN的中点"""
+        if self._energy is None:
+            frame_length = SAMPLE_RATE * BOUNDARY_FRAME_MS // 1000
+            self._energy = frame_energy(self._pcm, frame_length)
+        
+        frame_seconds = BOUNDARY_FRAME_MS / 1000
+        span = max(1, int(QUIET_SPAN / frame_seconds))
+        first = max(0, int(math.ceil(lo / frame_seconds)))
+        last = min(int(hi / frame_seconds), len(self._energy))
+        if last - first < span:
+            return hi
+        
+        # 滑动平均，避免选中词内部的短暂停顿
+        window = self._energy[first:last]
+        smoothed = np.convolve(window, np.ones(span, dtype=np.float32) / span, mode='valid')
+        best = first + int(np.argmin(smoothed))
+        return (best + span / 2) * frame_seconds
+    
+    def _pack_regions(self, regions: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+        """把语音区间合并为不超过chunk_duration的区间，区间之外的静音不再识别"""
+        spans = []
+        current = None
+        for region_start, region_end in regions:
+            # 过长的语音区间按规划的切分点切开，剩余部分参与后续合并
+            if region_end - region_start > self.chunk_duration:
+                if current:
+                    spans.append(current)
+                    current = None
+                cuts = self.plan_cuts(region_start, region_end)
+                spans.extend(zip(cuts[:-2], cuts[1:-1]))
+                region_start = cuts[-2]
+            
+            if current is None:
+                current = (region_start, region_end)
+            elif region_end - current[0] <= self.chunk_duration:
+                current = (current[0], region_end)
+            else:
+                spans.append(current)
+                current = (region_start, region_end)
+        if current:
+            spans.append(current)
+        return spans
+    
+    def _spans_to_chunks(self, spans: List[Tuple[float, float]]) -> List[Dict]:
+        """把区间转换为片段；与相邻区间相接的一侧向外扩展overlap秒"""
+        total_samples = len(self._pcm)
+        
+        def to_sample(seconds: float) -> int:
+            return min(max(int(round(seconds * SAMPLE_RATE)), 0), total_samples)
+        
+        chunks = []
+        for i, (keep_start, keep_end) in enumerate(spans):
+            start, end = keep_start, keep_end
+            if self.overlap > 0:
+                if i > 0 and spans[i - 1][1] >= keep_start:
+                    start -= self.overlap
+                if i + 1 < len(spans) and spans[i + 1][0] <= keep_end:
+                    end += self.overlap
+            chunk = self._make_chunk(i, to_sample(start), to_sample(end))
+            chunk['keep_start'] = to_sample(keep_start) / SAMPLE_RATE
+            chunk['keep_end'] = to_sample(keep_end) / SAMPLE_RATE
+            chunks.append(chunk)
+        return chunks
+    
+    def _make_chunk(self, index: int, start_sample: int, end_sample: int) -> Dict:
+        start_time = start_sample / SAMPLE_RATE
+        end_time = end_sample / SAMPLE_RATE
+        return {
+            'index': index,
+            'filename': None,
+            'samples': (start_sample, end_sample),
+            'start_time': start_time,
+            'end_time': end_time,
+            'duration': end_time - start_time
+        }
+    
+    @staticmethod
+    def trim_overlap(segments: List[Dict], chunk: Dict) -> List[Dict]:
+        """去掉落在重叠区的字幕（时间戳已换算为绝对时间）
+        
+        片段只对自己的 [keep_start, keep_end) 负责：字幕中点落在该范围之外时，
+        由相邻片段保留。没有重叠的一侧不做过滤，避免丢掉末尾的字幕。
+        """
+        keep_start = chunk.get('keep_start', chunk['start_time'])
+        keep_end = chunk.get('keep_end', chunk['end_time'])
+        check_start = chunk['start_time'] < keep_start
+        check_end = chunk['end_time'] > keep_end
+        if not (check_start or check_end):
+            return segments
+        
+        kept = []
+        for segment in segments:
+            middle = (segment['start'] + segment['end']) / 2
+            if check_start and middle < keep_start:
+                continue
+            if check_end and middle >= keep_end:
+                continue
+            kept.append(segment)
+        return kept
+    
+    def load_chunk(self, chunk: Dict) -> Union[str, np.ndarray]:
+        """获取片段的识别输入
+        
+        Returns:
+            file模式下为片段文件路径；pcm模式下为float32采样数组，
+            可直接传给Whisper的transcribe
+        """
+        if chunk.get('filename'):
+            return chunk['filename']
+        start_sample, end_sample = chunk['samples']
+        return self._pcm[start_sample:end_sample].astype(np.float32) / 32768.0
+    
+    def release(self):
+        """释放解码后的PCM数据"""
+        self._pcm = None
+        self._energy = None
+    
+    def merge_subtitles(self, subtitle_segments: List[List[Dict]],
+                        chunks: List[Dict] = None) -> List[Dict]:
         """
         合并多个片段的字幕，调整时间戳
         
         Args:
             subtitle_segments: 每个片段的字幕列表
+            chunks: split_audio返回的片段信息；给定时按片段实际起点偏移，
+                并去掉重叠区内的重复字幕
             
         Returns:
             合并后的完整字幕
@@ -102,13 +323,21 @@ class AudioSplitter:
         
         for chunk_idx, segments in enumerate(subtitle_segments):
             # 获取该片段的起始时间偏移
-            time_offset = chunk_idx * self.chunk_duration
+            if chunks is not None:
+                time_offset = chunks[chunk_idx]['start_time']
+            else:
+                time_offset = chunk_idx * self.chunk_duration
             
+            adjusted = []
             for segment in segments:
                 # 调整时间戳
                 adjusted_segment = segment.copy()
                 adjusted_segment['start'] += time_offset
                 adjusted_segment['end'] += time_offset
-                merged.append(adjusted_segment)
+                adjusted.append(adjusted_segment)
+            
+            if chunks is not None:
+                adjusted = self.trim_overlap(adjusted, chunks[chunk_idx])
+            merged.extend(adjusted)
         
         return merged
\ No newline at end of file
@@ -0,0 +1,209 @@
+"""分块上传 - 可续传，数据直接写入磁盘，边上传边解码"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import IO, Dict, List, Optional
+
+from .decoded_audio import DecodedAudio, DecodedAudioStore, StreamingDecoder
+from .job_control import JobControl
+
+logger = logging.getLogger(__name__)
+
+# 每次从请求体读取的字节数
+READ_BLOCK = 1024 * 1024
+
+
+class UploadOffsetError(Exception):
+    """分块的起始位置与已接收的字节数不一致"""
+
+    def __init__(self, received: int):
+        super().__init__(f"应从第 {received} 字节继续上传")
+        self.received = received
+
+
+class ChunkedUpload:
+    """可续传的分块上传
+
+    客户端按顺序上传分块并给出起始偏移，中断后查询已接收的字节数再继续。
+    每个分块直接追加到 ``<目标文件>.part``，不在内存中缓冲整个文件；同时送入
+    ffmpeg边上传边解码，并增量计算sha256。上传完成时文件改为目标文件名，
+    解码结果按sha256放入解码缓存，之后的处理不再解码。
+
+    上传状态保存在 ``<目录>/<上传ID>.json``，服务重启后仍可继续上传
+    （此时不再边上传边解码，完成后整体解码一次）。
+    """
+
+    def __init__(self, directory: str, meta: Dict):
+        self.directory = directory
+        self.meta = meta
+        self.upload_id: str = meta['upload_id']
+        self.audio_path: str = meta['audio_path']
+        self.size: int = meta['size']
+        self.params: Dict = meta.get('params', {})
+        self.part_path = self.audio_path + '.part'
+        self.pcm_path = os.path.join(directory, f"{self.upload_id}.pcm")
+        self.decoded: Optional[DecodedAudio] = None  # 上传完成后的完整解码结果
+        self._lock = threading.Lock()
+        self._hasher = None
+        self._decoder: Optional[StreamingDecoder] = None
+
+        # 预先识别的状态（由调用方维护）
+        self.ahead_scheduled = False
+        self.ahead_job_id: Optional[str] = None  # 最近一次提交的预先识别任务
+        self.ahead_seconds = 0.0  # 已预先识别到的解码时长
+        self.control = JobControl()  # 开始正式处理时取消预先识别
+
+    @classmethod
+    def create(cls, directory: str, upload_id: str, audio_path: str, size: int,
+               params: Optional[Dict] = None) -> 'ChunkedUpload':
+        """开始新的上传
+
+        Args:
+            directory: 上传状态和边解码PCM的目录
+            upload_id: 上传ID
+            audio_path: 上传完成后的文件路径
+            size: 文件总字节数
+            params: 调用方附带的参数（例如预先识别使用的模型）
+        """
+        os.makedirs(directory, exist_ok=True)
+        upload = cls(directory, {
+            'upload_id': upload_id,
+            'audio_path': audio_path,
+            'size': size,
+            'params': params or {},
+            'finished': False
+        })
+        open(upload.part_path, 'wb').close()
+        upload._hasher = hashlib.sha256()
+        upload._decoder = StreamingDecoder(upload.pcm_path)
+        upload._save_meta()
+        return upload
+
+    @classmethod
+    def load(cls, directory: str, upload_id: str) -> Optional['ChunkedUpload']:
+        """读取已有的上传（不存在时返回None）"""
+        if os.path.basename(upload_id) != upload_id or upload_id in ('', '.', '..'):
+            return None
+        try:
+            with open(os.path.join(directory, f"{upload_id}.json"), 'r', encoding='utf-8') as f:
+                return cls(directory, json.load(f))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @classmethod
+    def list_ids(cls, directory: str) -> List[str]:
+        """目录中所有上传的ID"""
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-len('.json')] for name in os.listdir(directory)
+                      if name.endswith('.json'))
+
+    @property
+    def finished(self) -> bool:
+        return self.meta.get('finished', False)
+
+    @property
+    def received(self) -> int:
+        """已接收的字节数"""
+        if self.finished:
+            return self.size
+        try:
+            return os.path.getsize(self.part_path)
+        except FileNotFoundError:
+            return 0
+
+    def last_active(self) -> float:
+        """最后一次收到数据或状态变化的时间"""
+        times = []
+        for path in (os.path.join(self.directory, f"{self.upload_id}.json"), self.part_path):
+            try:
+                times.append(os.path.getmtime(path))
+            except FileNotFoundError:
+                pass
+        return max(times, default=0.0)
+
+    def write(self, offset: int, stream: IO[bytes]) -> int:
+        """从offset开始追加一个分块
+
+        Args:
+            offset: 分块的起始位置，必须等于已接收的字节数
+            stream: 分块数据（逐块读取，不整体读入内存）
+
+        Returns:
+            已接收的字节数
+
+        Raises:
+            UploadOffsetError: offset与已接收的字节数不一致
+            ValueError: 超出声明的文件大小
+        """
+        with self._lock:
+            if self.finished or offset != self.received:
+                raise UploadOffsetError(self.received)
+            with open(self.part_path, 'ab') as f:
+                while True:
+                    block = stream.read(READ_BLOCK)
+                    if not block:
+                        break
+                    if f.tell() + len(block) > self.size:
+                        raise ValueError('上传的数据超出声明的文件大小')
+                    f.write(block)
+                    # 写入磁盘的数据同时送入解码器和哈希，三者始终一致
+                    if self._hasher is not None:
+                        self._hasher.update(block)
+                    if self._decoder is not None:
+                        self._decoder.feed(block)
+                return f.tell()
+
+    def decoded_prefix(self) -> Optional[DecodedAudio]:
+        """已解码的部分：上传完成后为完整结果，上传中为边解码的前缀"""
+        if self.decoded is not None:
+            return self.decoded
+        decoder = self._decoder
+        return decoder.decoded() if decoder is not None else None
+
+    def finish(self, store: DecodedAudioStore) -> DecodedAudio:
+        """全部数据到达后完成上传，返回完整的解码结果（重复调用时直接返回）
+
+        Raises:
+            UploadOffsetError: 数据尚未全部到达
+        """
+        with self._lock:
+            if self.decoded is not None:
+                return self.decoded
+            if not self.finished:
+                if self.received != self.size:
+                    raise UploadOffsetError(self.received)
+                os.replace(self.part_path, self.audio_path)
+                self.meta['finished'] = True
+                self._save_meta()
+
+            decoder, self._decoder = self._decoder, None
+            key = self._hasher.hexdigest() if self._hasher is not None else None
+            if decoder is not None and decoder.finish() and key is not None:
+                self.decoded = store.put(key, self.pcm_path)
+            else:
+                if decoder is not None:
+                    decoder.abort()
+                    logger.info(f"无法边上传边解码，重新解码: {os.path.basename(self.audio_path)}")
+                self.decoded = store.get(self.audio_path, key)
+            return self.decoded
+
+    def remove(self):
+        """删除上传状态（上传完成的文件保留，未完成的部分删除）"""
+        with self._lock:
+            if self._decoder is not None:
+                self._decoder.abort()
+                self._decoder = None
+            for path in (os.path.join(self.directory, f"{self.upload_id}.json"), self.pcm_path,
+                         self.part_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _save_meta(self):
+        path = os.path.join(self.directory, f"{self.upload_id}.json")
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+        os.replace(temp_path, path)
@@ -0,0 +1,228 @@
+"""解码音频缓存 - 每个上传文件只用ffmpeg解码一次，之后各环节共享内存映射的PCM"""
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import uuid
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .audio_splitter import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+
+class DecodedAudio:
+    """解码后的音频：16kHz单声道int16 PCM文件，以只读方式内存映射
+
+    时长、语言检测、切分和识别都直接读取映射的采样，不再重新解码。
+    采样按int16保存（与切分和语音检测使用的格式一致，文件大小为float32的一半），
+    送入Whisper时再转换为float32。
+    """
+
+    def __init__(self, pcm_path: str):
+        self.path = pcm_path
+        # 边上传边解码时文件仍在增长，只映射当前完整的采样
+        count = os.path.getsize(pcm_path) // 2
+        if count > 0:
+            self.pcm = np.memmap(pcm_path, dtype=np.int16, mode='r', shape=(count,))
+        else:
+            # 空文件无法映射
+            self.pcm = np.zeros(0, dtype=np.int16)
+
+    @classmethod
+    def decode(cls, audio_path: str, pcm_path: str) -> 'DecodedAudio':
+        """用一次ffmpeg调用把音频文件解码为PCM文件（先写临时文件再原子替换）"""
+        temp_path = f"{pcm_path}.{uuid.uuid4().hex}.tmp"
+        cmd = [
+            'ffmpeg',
+            '-nostdin',
+            '-threads', '0',
+            '-i', audio_path,
+            '-f', 's16le',
+            '-ac', '1',
+            '-acodec', 'pcm_s16le',
+            '-ar', str(SAMPLE_RATE),
+            '-y',
+            temp_path
+        ]
+        try:
+            subprocess.run(cmd, capture_output=True, check=True)
+            os.replace(temp_path, pcm_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return cls(pcm_path)
+
+    @property
+    def duration(self) -> float:
+        """时长（秒）"""
+        return len(self.pcm) / SAMPLE_RATE
+
+    def samples(self, start: float = 0.0, end: Optional[float] = None) -> np.ndarray:
+        """[start, end) 秒的float32采样，可直接传给Whisper"""
+        first = int(start * SAMPLE_RATE)
+        last = len(self.pcm) if end is None else int(end * SAMPLE_RATE)
+        return self.pcm[first:last].astype(np.float32) / 32768.0
+
+
+class StreamingDecoder:
+    """边接收边解码：数据按顺序送入ffmpeg的标准输入，PCM持续写入文件
+
+    解码过程中可随时用 ``decoded()`` 映射已解码的部分。只适用于可以顺序
+    解码的格式（mp3、wav、webm等）；moov在文件末尾的mp4/m4a无法从管道解码，
+    此时 ``finish()`` 返回False，由调用方在文件完整后重新解码。
+    """
+
+    def __init__(self, pcm_path: str):
+        self.pcm_path = pcm_path
+        self.failed = False
+        cmd = [
+            'ffmpeg',
+            '-nostdin',
+            '-threads', '0',
+            '-i', 'pipe:0',
+            '-f', 's16le',
+            '-ac', '1',
+            '-acodec', 'pcm_s16le',
+            '-ar', str(SAMPLE_RATE),
+            '-y',
+            pcm_path
+        ]
+        self._process = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def feed(self, data: bytes):
+        """送入下一段数据（ffmpeg已退出时忽略）"""
+        if self.failed:
+            return
+        try:
+            self._process.stdin.write(data)
+            self._process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            self.failed = True
+
+    def decoded(self) -> Optional[DecodedAudio]:
+        """已解码部分（尚未输出任何采样时返回None）"""
+        if self.failed or not os.path.exists(self.pcm_path):
+            return None
+        return DecodedAudio(self.pcm_path)
+
+    def finish(self) -> bool:
+        """输入结束，等待ffmpeg解码完剩余数据
+
+        Returns:
+            是否完整解码
+        """
+        try:
+            self._process.stdin.close()
+        except (BrokenPipeError, OSError):
+            self.failed = True
+        return self._process.wait() == 0 and not self.failed
+
+    def abort(self):
+        """停止解码并删除输出文件"""
+        self._process.kill()
+        self._process.wait()
+        if os.path.exists(self.pcm_path):
+            os.remove(self.pcm_path)
+
+
+class DecodedAudioStore:
+    """按文件内容（sha256）缓存解码结果
+
+    分析音频和上传处理是两次请求，内容相同的文件只解码一次。
+    总大小超过上限时按最近使用时间（mtime）删除。POSIX系统上已映射的文件
+    删除后映射仍然有效；Windows上正在使用的文件无法删除，跳过并在下次淘汰时重试，
+    正在处理的任务都不受影响。
+    """
+
+    def __init__(self, directory: str, max_size_mb: float = 2048):
+        """
+        Args:
+            directory: 解码文件目录
+            max_size_mb: 解码文件总大小上限（MB）
+        """
+        self.directory = directory
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def file_key(audio_path: str) -> str:
+        """文件内容的sha256"""
+        digest = hashlib.sha256()
+        with open(audio_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def get(self, audio_path: str, key: Optional[str] = None) -> DecodedAudio:
+        """获取音频的解码结果（已解码则直接映射，否则解码一次）
+
+        Args:
+            audio_path: 音频文件路径
+            key: 文件内容的sha256，已知时可省去重新计算
+        """
+        key = key or self.file_key(audio_path)
+        pcm_path = os.path.join(self.directory, f"{key}.pcm")
+        if os.path.exists(pcm_path):
+            try:
+                os.utime(pcm_path)
+                return DecodedAudio(pcm_path)
+            except FileNotFoundError:
+                pass  # 刚被淘汰，重新解码
+
+        logger.info(f"解码音频: {os.path.basename(audio_path)}")
+        os.makedirs(self.directory, exist_ok=True)
+        decoded = DecodedAudio.decode(audio_path, pcm_path)
+        self._evict(keep=pcm_path)
+        return decoded
+
+    def put(self, key: str, pcm_path: str) -> DecodedAudio:
+        """放入在别处解码好的PCM文件（例如边上传边解码的结果）
+
+        Args:
+            key: 原始文件内容的sha256
+            pcm_path: PCM文件，移动到缓存目录
+        """
+        target = os.path.join(self.directory, f"{key}.pcm")
+        os.makedirs(self.directory, exist_ok=True)
+        shutil.move(pcm_path, target)
+        self._evict(keep=target)
+        return DecodedAudio(target)
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """(mtime, 大小, 路径) 列表"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.pcm'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self, keep: str):
+        """按最近使用时间删除旧文件，直到总大小不超过上限（刚解码的文件和使用中的文件保留）"""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    total -= size
+                except OSError as e:
+                    logger.debug(f"解码文件正在使用，暂不删除: {os.path.basename(path)} ({e})")
@@ -1,15 +1,24 @@
 """增强的处理管道 - 支持分片处理和实时进度"""
 import os
 import time
-from typing import Dict, List, Optional, Callable
+from typing import Dict, List, Optional, Callable, Tuple, Union
+import numpy as np
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
 from .audio_splitter import AudioSplitter
+from .decoded_audio import DecodedAudio
 from .speech_recognizer import SpeechRecognizer
+from .transcribe_worker import get_worker_pool, discard_worker_pool, submit_chunk
 from .term_manager import TermManager
 from .term_corrector import TermCorrector
-from .subtitle_generator import SubtitleGenerator
+from .subtitle_generator import SubtitleGenerator, StreamingSubtitleWriter
+from .transcription_cache import TranscriptionCache
+from .segment_log import SegmentLog
+from .job_checkpoint import JobCheckpoint, chunk_key
+from .job_control import JobCancelled, JobControl, JobPaused, controlled
+from .subtitle_merger import SubtitleMerger
+from .vad import EnergyVAD, skipped_seconds
 
 logger = logging.getLogger(__name__)
 
@@ -19,12 +28,35 @@ class EnhancedPipeline:
         self.chunk_duration = self.config.get('chunk_duration', 30)  # 30秒片段，更快反馈
         self.start_time = self.config.get('start_time', 0)  # 开始时间
         self.existing_subtitle = self.config.get('existing_subtitle', None)  # 已有字幕
+        # 已有字幕与新识别结果重叠时的处理：prefer_new / prefer_existing / split
+        self.merger = SubtitleMerger(self.config.get('merge_policy', 'prefer_new'))
         
-        # 初始化组件
-        self.splitter = AudioSplitter(self.chunk_duration)
-        self.recognizer = SpeechRecognizer(
-            model_size=self.config.get('model_size', 'medium')  # 默认使用medium以提高速度
+        # 初始化组件（默认整文件只解码一次，片段从内存PCM中切分）
+        # pcm模式下切分点移到边界前2秒内最安静的位置；overlap>0时相邻片段重叠
+        self.splitter = AudioSplitter(
+            self.chunk_duration,
+            mode=self.config.get('split_mode', 'pcm'),
+            boundary_window=self.config.get('boundary_window', 2.0),
+            overlap=self.config.get('chunk_overlap', 0.0)
         )
+        # 语音检测：True使用默认的能量检测器，也可传入实现了detect()的检测器
+        vad = self.config.get('vad', False)
+        self.vad = EnergyVAD() if vad is True else (vad or None)
+        
+        self.model_size = self.config.get('model_size', 'medium')  # 默认使用medium以提高速度
+        self.device = self.config.get('device')
+        # 识别后端：whisper / whisper-int8（CPU上更快）/ stub（不加载模型，用于评测）
+        self.backend = self.config.get('backend', 'whisper')
+        # 并行识别的工作进程数（>1时使用进程池，每个进程各自加载模型）
+        self.workers = self.config.get('workers', 1)
+        # 单进程模式下每次一起解码的片段数（>1时使用批量识别）
+        self.batch_size = max(1, self.config.get('batch_size', 1))
+        
+        # 并行模式下模型只在工作进程中加载
+        self.recognizer = None
+        if self.workers <= 1:
+            self.recognizer = SpeechRecognizer(model_size=self.model_size, device=self.device,
+                                               backend=self.backend)
         
         # 获取项目根目录
         project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -34,7 +66,30 @@ class EnhancedPipeline:
         terms_file = os.path.join(data_dir, 'terms.json')
         log_file = os.path.join(data_dir, 'corrections_log.json')
         
-        self.term_manager = TermManager(terms_file, log_file)
+        # 识别结果缓存：重新处理同一录音时跳过Whisper，只重做术语修正和字幕生成
+        self.cache = None
+        if self.config.get('cache', True):
+            self.cache = TranscriptionCache(
+                self.config.get('cache_dir') or os.path.join(data_dir, 'transcription_cache'),
+                self.config.get('cache_max_mb', 500)
+            )
+        self.cached_chunks = 0
+        
+        # 任务检查点：每完成一个片段即持久化，重新处理时跳过已完成的片段
+        self.checkpoint: Optional[JobCheckpoint] = self.config.get('checkpoint')
+        self.resumed_chunks = 0
+        
+        # 任务控制：片段之间响应暂停，识别过程中（每个解码步骤前）响应取消
+        self.control: Optional[JobControl] = self.config.get('control')
+        
+        # 词级时间戳默认关闭（额外的对齐计算较慢）；卡拉OK字幕或按行长断句时自动开启
+        self.word_timestamps = self.config.get('word_timestamps', False)
+        # 识别语言，'auto'表示用第一个片段检测一次（并行模式下由各片段分别检测）
+        self.language = self.config.get('language', SpeechRecognizer.DEFAULT_PARAMS['language'])
+        self.max_line_chars = self.config.get('max_line_chars')  # 每条字幕的最大字符数
+        self.transcribe_params: Dict = {}
+        
+        self.term_manager = TermManager.shared(terms_file, log_file)
         self.corrector = TermCorrector(self.term_manager)
         self.subtitle_gen = SubtitleGenerator()
         
@@ -45,7 +100,7 @@ class EnhancedPipeline:
             'total_chunks': 0,
             'current_progress': 0,
             'message': '',
-            'partial_results': [],
+            'segment_log': SegmentLog(),  # 只追加的字幕日志，按游标读取增量
             'chunk_times': [],  # 记录每个片段的处理时间
             'total_start_time': None
         }
@@ -54,15 +109,22 @@ class EnhancedPipeline:
                             audio_path: str, 
                             output_dir: str,
                             progress_callback: Optional[Callable] = None,
-                            subtitle_format: str = 'srt') -> Dict:
+                            subtitle_format: str = 'srt',
+                            decoded: Optional[DecodedAudio] = None) -> Dict:
         """
         分片处理音频文件
         
+        识别出的字幕在内存中只保存一份（字幕日志），处理中的预览、结束时的排序与合并、
+        返回结果和任务的字幕存档都读取它；字幕文件随片段完成增量写入磁盘，处理中即可
+        下载已完成的部分。字幕本身只有文本和时间戳，内存占用远小于音频（音频按需从
+        解码结果读取），因此峰值内存仍随会议时长缓慢增长，并非完全恒定。
+        
         Args:
             audio_path: 音频文件路径
             output_dir: 输出目录
             progress_callback: 进度回调函数
             subtitle_format: 字幕格式
+            decoded: 已解码的音频，给定时切分和识别都读取它，不再重新解码
             
         Returns:
             处理结果
@@ -75,23 +137,51 @@ class EnhancedPipeline:
         temp_dir = os.path.join(output_dir, 'temp_chunks')
         os.makedirs(temp_dir, exist_ok=True)
         
+        if subtitle_format not in self.subtitle_gen.supported_formats:
+            subtitle_format = 'txt'
+        base_name = os.path.splitext(os.path.basename(audio_path))[0]
+        extension = self.subtitle_gen.file_extension(subtitle_format)
+        subtitle_path = os.path.join(output_dir, f"{base_name}.{extension}")
+        self.transcribe_params = {'word_timestamps': self._needs_word_timestamps(subtitle_format)}
+        writer = None
+        
         try:
             # 1. 分割音频
             self._update_progress(5, '正在分析音频文件...', progress_callback)
-            chunks = self.splitter.split_audio(audio_path, temp_dir)
+            chunks = self.splitter.split_audio(audio_path, temp_dir, vad=self.vad, decoded=decoded)
             
-            if not chunks:
+            # 启用语音检测时，全程静音的文件没有片段，但并非失败
+            use_vad = self.vad is not None and self.splitter.mode == 'pcm'
+            if not chunks and not (use_vad and self.splitter.total_duration > 0):
                 raise Exception("音频分割失败")
             
             self.progress_info['total_chunks'] = len(chunks)
             logger.info(f"音频已分割为 {len(chunks)} 个片段")
             
+            language = self._detect_language(chunks)
+            self.transcribe_params['language'] = language
+            
+            # 统计跳过的静音时长
+            speech_seconds = sum(
+                chunk.get('keep_end', chunk['end_time']) - chunk.get('keep_start', chunk['start_time'])
+                for chunk in chunks
+            )
+            skipped = 0.0
+            if use_vad:
+                skipped = skipped_seconds(chunks, self.splitter.total_duration)
+                logger.info(f"语音检测: 语音 {speech_seconds:.1f}秒，跳过静音 {skipped:.1f}秒")
+                self._update_progress(
+                    5,
+                    f'语音检测完成，跳过静音 {self._format_time(skipped)}',
+                    progress_callback
+                )
+            
             # 2. 逐片段处理
-            all_segments = []
             all_corrections = []
             
             # 如果有已存在的字幕，先加载它们
             existing_segments = []
+            leading_segments = []
             if self.existing_subtitle:
                 existing_segments = self._parse_existing_subtitle(self.existing_subtitle)
                 if existing_segments:
@@ -100,12 +190,17 @@ class EnhancedPipeline:
                     # 先添加开始时间之前的已有字幕
                     for seg in existing_segments:
                         if seg['end'] <= self.start_time:
-                            all_segments.append(seg)
-                    
-                    # 更新进度信息，让前端知道已有字幕
-                    if all_segments:
-                        self.progress_info['partial_results'] = all_segments
-                        self._update_progress(10, f'已加载 {len(all_segments)} 条已有字幕（开始时间之前）', progress_callback)
+                            leading_segments.append(seg)
+            
+            # 字幕日志：识别结果在内存中唯一的存放处
+            # 开始时间之后的已有字幕作为背景，被重新识别的范围覆盖前仍可预览
+            segment_log = SegmentLog([seg for seg in existing_segments
+                                      if seg['start'] >= self.start_time])
+            self.progress_info['segment_log'] = segment_log
+            if leading_segments:
+                # 更新进度信息，让前端知道已有字幕
+                segment_log.append(leading_segments)
+                self._update_progress(10, f'已加载 {len(leading_segments)} 条已有字幕（开始时间之前）', progress_callback)
             
             # 根据开始时间过滤片段
             filtered_chunks = []
@@ -119,134 +214,104 @@ class EnhancedPipeline:
             # 更新总片段数为过滤后的数量
             self.progress_info['total_chunks'] = len(filtered_chunks)
             
-            # 优先批次的大小
-            priority_batch_size = 5
+            total_filtered = len(filtered_chunks)
+            self.cached_chunks = 0
             
-            for i, chunk in enumerate(filtered_chunks):
-                chunk_start_time = time.time()
-                self.progress_info['current_chunk'] = i + 1
-                
-                # 计算进度
-                total_filtered = len(filtered_chunks)
-                if i < priority_batch_size:
-                    # 前5个片段快速进度（占30%）
-                    chunk_progress = 10 + (20 * i // min(priority_batch_size, total_filtered))
-                    status_prefix = f'[优先处理] 片段'
-                else:
-                    # 后续片段正常进度（占70%）
-                    remaining = total_filtered - priority_batch_size
-                    if remaining > 0:
-                        chunk_progress = 30 + (60 * (i - priority_batch_size) // remaining)
-                    else:
-                        chunk_progress = 90
-                    status_prefix = f'处理片段'
-                
-                # 显示处理时间信息
-                elapsed_time = time.time() - start_time
-                avg_chunk_time = elapsed_time / (i + 1) if i > 0 else 0
-                estimated_total = avg_chunk_time * total_filtered
-                remaining_time = estimated_total - elapsed_time
-                
-                time_message = f'已用: {self._format_time(elapsed_time)}, 剩余: {self._format_time(remaining_time)}'
-                
-                self._update_progress(
-                    chunk_progress,
-                    f'{status_prefix} {i+1}/{total_filtered} ({chunk["start_time"]:.0f}s-{chunk["end_time"]:.0f}s) - {time_message}',
-                    progress_callback
-                )
-                
-                # 识别该片段
-                chunk_result = self.recognizer.transcribe(chunk['filename'])
+            # 字幕随片段完成增量写入，处理中即可下载已完成的部分（JSON除外）
+            if subtitle_format in StreamingSubtitleWriter.FORMATS:
+                writer = StreamingSubtitleWriter(subtitle_path, subtitle_format, self.subtitle_gen)
+                writer.write_segments(sorted(leading_segments, key=lambda x: x['start']))
+            
+            for completed, (i, chunk, chunk_result, chunk_time) in enumerate(
+                    self._iter_results(filtered_chunks, start_time, progress_callback), 1):
+                self.progress_info['current_chunk'] = completed
                 segments = chunk_result.get('segments', [])
                 
                 # 调整时间戳
                 for segment in segments:
                     segment['start'] += chunk['start_time']
                     segment['end'] += chunk['start_time']
+                    for word in segment.get('words') or []:
+                        word['start'] += chunk['start_time']
+                        word['end'] += chunk['start_time']
+                
+                # 去掉重叠区内由相邻片段负责的字幕
+                segments = self.splitter.trim_overlap(segments, chunk)
                 
-                # 应用术语修正
+                # 应用术语修正（只读取术语库，不写入）
                 corrected_segments = []
                 for segment in segments:
-                    corrected_text, corrections = self.corrector.correct_text(
-                        segment['text'],
-                        record_corrections=True
-                    )
+                    corrected_text, corrections = self.corrector.correct_text(segment['text'])
                     
                     corrected_segment = segment.copy()
                     corrected_segment['text'] = corrected_text
                     corrected_segment['original_text'] = segment['text']
+                    if segment.get('words'):
+                        corrected_segment['words'] = self.corrector.correct_words(segment['words'])
                     corrected_segments.append(corrected_segment)
                     
                     if corrections:
                         all_corrections.extend(corrections)
                 
-                all_segments.extend(corrected_segments)
+                if self.max_line_chars:
+                    corrected_segments = self.subtitle_gen.resegment(
+                        corrected_segments, max_chars=self.max_line_chars)
+                
+                segment_log.mark_done(chunk.get('keep_start', chunk['start_time']),
+                                      chunk.get('keep_end', chunk['end_time']))
+                segment_log.append(corrected_segments)
+                if writer is not None:
+                    writer.add_chunk(i, corrected_segments)
+                    self.progress_info['partial_subtitle'] = {
+                        'path': writer.part_path,
+                        'final_path': subtitle_path,
+                        'size': writer.committed_size
+                    }
                 
                 # 记录片段处理时间
-                chunk_time = time.time() - chunk_start_time
                 self.progress_info['chunk_times'].append({
                     'chunk_id': i + 1,
                     'time_range': f'{chunk["start_time"]:.0f}s-{chunk["end_time"]:.0f}s',
                     'processing_time': chunk_time
                 })
                 
-                # 保存部分结果供预览（包含已有字幕和新识别的内容，按时间排序）
-                combined_segments = all_segments.copy()
-                # 添加尚未处理的已有字幕
-                if existing_segments:
-                    for seg in existing_segments:
-                        if seg['start'] > chunk['end_time']:
-                            combined_segments.append(seg)
-                
-                # 按时间排序
-                combined_segments.sort(key=lambda x: x['start'])
-                self.progress_info['partial_results'] = combined_segments
-                
                 # 更新进度，显示该片段处理时间
-                chunk_progress = 10 + (80 * (i + 1) // total_filtered)
+                chunk_progress = 10 + (80 * completed // total_filtered)
                 self._update_progress(
                     chunk_progress,
                     f'完成片段 {i+1}/{total_filtered} (用时: {self._format_time(chunk_time)})',
                     progress_callback
                 )
             
+            if self.cached_chunks:
+                logger.info(f"{self.cached_chunks} 个片段命中识别缓存")
+            
+            # 并行模式下片段按完成顺序到达，按时间排序
+            all_segments = sorted(segment_log.since(0)[0], key=lambda x: x['start'])
+            
             # 3. 合并剩余的已有字幕（开始时间之后的部分）
-            if existing_segments:
-                for seg in existing_segments:
-                    if seg['start'] >= self.start_time:
-                        # 检查是否与新识别的字幕重叠
-                        overlap = False
-                        for new_seg in all_segments:
-                            if (seg['start'] >= new_seg['start'] and seg['start'] < new_seg['end']) or \
-                               (seg['end'] > new_seg['start'] and seg['end'] <= new_seg['end']):
-                                overlap = True
-                                break
-                        
-                        # 如果没有重叠，添加这个已有字幕
-                        if not overlap:
-                            all_segments.append(seg)
-                
-                # 按时间排序所有字幕
-                all_segments.sort(key=lambda x: x['start'])
-                logger.info(f"合并后共有 {len(all_segments)} 条字幕")
+            background = [seg for seg in existing_segments if seg['start'] >= self.start_time]
+            if background:
+                all_segments = self.merger.merge(background, all_segments)
+                logger.info(f"合并后共有 {len(all_segments)} 条字幕（策略: {self.merger.policy}）")
             
             # 4. 生成字幕文件
             self._update_progress(90, '生成字幕文件...', progress_callback)
             
-            base_name = os.path.splitext(os.path.basename(audio_path))[0]
-            subtitle_path = os.path.join(output_dir, f"{base_name}.{subtitle_format}")
-            
-            if subtitle_format == 'srt':
-                self.subtitle_gen.generate_srt(all_segments, subtitle_path)
-            elif subtitle_format == 'vtt':
-                self.subtitle_gen.generate_vtt(all_segments, subtitle_path)
+            if writer is not None and not background:
+                # 增量写入的文件即为最终结果，原子替换
+                writer.finish()
             else:
-                self.subtitle_gen.generate_txt(all_segments, subtitle_path)
+                # 合并改变了字幕内容（或格式不支持增量写入），一次性生成完整文件
+                if writer is not None:
+                    writer.abort()
+                self.subtitle_gen.write(all_segments, subtitle_path, subtitle_format)
             
             # 5. 清理临时文件
             self._update_progress(95, '清理临时文件...', progress_callback)
             import shutil
             shutil.rmtree(temp_dir, ignore_errors=True)
+            self.splitter.release()
             
             # 6. 完成
             processing_time = time.time() - start_time
@@ -261,10 +326,23 @@ class EnhancedPipeline:
                 'corrections': all_corrections[:10],
                 'processing_time': processing_time,
                 'chunks_processed': len(chunks),
+                'cached_chunks': self.cached_chunks,
+                'resumed_chunks': self.resumed_chunks,
+                'language': language,
+                'speech_seconds': speech_seconds,
+                'skipped_seconds': skipped,
                 'high_freq_terms': list(self.term_manager.get_high_frequency_terms().items())[:10]
             }
             
+        except JobPaused:
+            # 已完成的片段都在检查点中，由调用方让出槽位，继续时重新排队
+            if writer is not None:
+                writer.abort()
+            self.splitter.release()
+            raise
         except Exception as e:
+            if writer is not None:
+                writer.abort()
             logger.error(f"处理失败: {e}")
             self._update_progress(0, f'处理失败: {str(e)}', progress_callback)
             return {
@@ -272,6 +350,253 @@ class EnhancedPipeline:
                 'error': str(e)
             }
     
+    def transcribe_ahead(self, decoded: DecodedAudio, subtitle_format: str = 'srt',
+                         partial: bool = True) -> int:
+        """上传过程中预先识别已解码部分的片段，结果写入检查点
+        
+        对已解码的前缀规划片段，最后一个片段可能随后续数据变化，不识别。
+        正式处理时规划相同的片段（按时间范围匹配）直接从检查点恢复，
+        规划不同的片段（例如语音检测的自适应阈值随全文变化）照常识别。
+        
+        Args:
+            decoded: 已解码的部分（文件仍可能在增长）
+            subtitle_format: 字幕格式（决定是否需要词级时间戳）
+            partial: 是否只是前缀；为False时（上传已完成）最后一个片段也识别
+            
+        任务控制被取消时立即停止，正在识别的片段不保存。
+            
+        Returns:
+            本次识别并保存的片段数
+        """
+        if self.checkpoint is None or self.recognizer is None or self.splitter.mode != 'pcm':
+            return 0
+        self.transcribe_params = {'word_timestamps': self._needs_word_timestamps(subtitle_format)}
+        try:
+            chunks = self.splitter.split_audio(decoded.path, '', vad=self.vad, decoded=decoded)
+            if partial:
+                chunks = chunks[:-1]
+            completed = self.checkpoint.completed_chunks()
+            pending = [chunk for chunk in chunks
+                       if chunk['end_time'] > self.start_time and chunk_key(chunk) not in completed]
+            if not pending:
+                return 0
+            self.transcribe_params['language'] = self._detect_language(chunks)
+            
+            saved = 0
+            try:
+                with controlled(self.control):
+                    for _, chunk, result, _ in self._iter_transcriptions(pending, time.time()):
+                        self._wait_control()
+                        self.checkpoint.record_chunk(chunk, result)
+                        saved += 1
+            except JobCancelled:
+                pass
+            logger.info(f"预先识别 {saved} 个片段（已解码 {decoded.duration:.0f}秒）")
+            return saved
+        finally:
+            self.splitter.release()
+    
+    def _wait_control(self):
+        """片段之间的安全点：暂停时等待继续（或抛出JobPaused），已取消时抛出JobCancelled"""
+        if self.control is not None:
+            self.control.wait()
+    
+    def _needs_word_timestamps(self, subtitle_format: str) -> bool:
+        """卡拉OK字幕和按行长断句需要词级时间戳"""
+        return bool(self.word_timestamps or self.max_line_chars or subtitle_format == 'vtt_karaoke')
+    
+    def _detect_language(self, chunks: List[Dict]) -> Optional[str]:
+        """识别语言：'auto'时读取已解码的第一个（语音）片段检测，不再单独解码文件"""
+        if self.language != 'auto':
+            return self.language
+        if not chunks or self.recognizer is None:
+            return None
+        language, probability = self.recognizer.detect_language(self.splitter.load_chunk(chunks[0]))
+        logger.info(f"检测到语言: {language} ({probability:.2f})")
+        return language
+    
+    def _iter_results(self, chunks: List[Dict], start_time: float,
+                      progress_callback: Optional[Callable] = None):
+        """按完成顺序产出各片段的识别结果：先产出检查点中已完成的片段，再识别其余片段"""
+        with controlled(self.control):
+            yield from self._iter_results_controlled(chunks, start_time, progress_callback)
+    
+    def _iter_results_controlled(self, chunks: List[Dict], start_time: float,
+                                 progress_callback: Optional[Callable] = None):
+        if self.checkpoint is None:
+            yield from self._iter_transcriptions(chunks, start_time, progress_callback)
+            return
+        
+        completed = self.checkpoint.completed_chunks()
+        pending = []
+        self.resumed_chunks = 0
+        for i, chunk in enumerate(chunks):
+            result = completed.get(chunk_key(chunk))
+            if result is None:
+                pending.append(i)
+            else:
+                self.resumed_chunks += 1
+                yield i, chunk, result, 0.0
+        if self.resumed_chunks:
+            logger.info(f"从检查点恢复 {self.resumed_chunks} 个片段，剩余 {len(pending)} 个")
+        
+        for j, chunk, result, chunk_time in self._iter_transcriptions(
+                [chunks[i] for i in pending], start_time, progress_callback):
+            # 在调整时间戳之前保存原始结果
+            self.checkpoint.record_chunk(chunk, result)
+            yield pending[j], chunk, result, chunk_time
+    
+    def _iter_transcriptions(self, chunks: List[Dict], start_time: float,
+                             progress_callback: Optional[Callable] = None):
+        """识别各片段，按完成顺序逐个产出 (序号, 片段, 识别结果, 用时)"""
+        if self.workers > 1:
+            yield from self._iter_transcriptions_parallel(chunks, start_time, progress_callback)
+            return
+        
+        # 优先批次的大小
+        priority_batch_size = 5
+        total_filtered = len(chunks)
+        batch_results: Dict[int, Tuple[Dict, float]] = {}
+        
+        for i, chunk in enumerate(chunks):
+            self._wait_control()
+            chunk_start_time = time.time()
+            
+            # 计算进度
+            if i < priority_batch_size:
+                # 前5个片段快速进度（占30%）
+                chunk_progress = 10 + (20 * i // min(priority_batch_size, total_filtered))
+                status_prefix = f'[优先处理] 片段'
+            else:
+                # 后续片段正常进度（占70%）
+                remaining = total_filtered - priority_batch_size
+                if remaining > 0:
+                    chunk_progress = 30 + (60 * (i - priority_batch_size) // remaining)
+                else:
+                    chunk_progress = 90
+                status_prefix = f'处理片段'
+            
+            # 显示处理时间信息
+            elapsed_time = time.time() - start_time
+            avg_chunk_time = elapsed_time / (i + 1) if i > 0 else 0
+            estimated_total = avg_chunk_time * total_filtered
+            remaining_time = estimated_total - elapsed_time
+            
+            time_message = f'已用: {self._format_time(elapsed_time)}, 剩余: {self._format_time(remaining_time)}'
+            
+            self.progress_info['current_chunk'] = i + 1
+            self._update_progress(
+                chunk_progress,
+                f'{status_prefix} {i+1}/{total_filtered} ({chunk["start_time"]:.0f}s-{chunk["end_time"]:.0f}s) - {time_message}',
+                progress_callback
+            )
+            
+            # 识别该片段（命中缓存时跳过）；批量模式下一次识别之后的batch_size个片段
+            if i not in batch_results:
+                batch_results = self._transcribe_batch(chunks, i)
+            chunk_result, batch_time = batch_results.pop(i)
+            yield i, chunk, chunk_result, batch_time or time.time() - chunk_start_time
+    
+    def _transcribe_batch(self, chunks: List[Dict], first: int) -> Dict[int, Tuple[Dict, float]]:
+        """识别从first开始的batch_size个片段，返回 {序号: (识别结果, 平均用时)}"""
+        started = time.time()
+        indices = range(first, min(first + self.batch_size, len(chunks)))
+        audios = {}
+        results = {}
+        cache_keys = {}
+        for i in indices:
+            audios[i] = self.splitter.load_chunk(chunks[i])
+            cache_keys[i], cached = self._cache_lookup(audios[i])
+            if cached is not None:
+                results[i] = cached
+        
+        # 解码方式只由batch_size决定（与缓存键一致）：批量模式下单个片段也按批量解码
+        missing = [i for i in indices if i not in results]
+        if self.batch_size == 1:
+            transcribed = [self.recognizer.transcribe(audios[i], **self.transcribe_params)
+                           for i in missing]
+        elif missing:
+            transcribed = self.recognizer.transcribe_batch(
+                [audios[i] for i in missing], batch_size=self.batch_size, **self.transcribe_params)
+        else:
+            transcribed = []
+        for i, result in zip(missing, transcribed):
+            self._cache_store(cache_keys[i], result)
+            results[i] = result
+        
+        # 批量模式下无法区分各片段的用时，取平均
+        average = (time.time() - started) / len(indices) if len(indices) > 1 else 0.0
+        return {i: (results[i], average) for i in indices}
+    
+    def _iter_transcriptions_parallel(self, chunks: List[Dict], start_time: float,
+                                      progress_callback: Optional[Callable] = None):
+        """多进程并行识别：每个工作进程加载一次模型，片段完成即产出"""
+        pool = get_worker_pool(
+            self.model_size, self.device, self.workers,
+            self.config.get('torch_threads'), self.backend
+        )
+        
+        self._update_progress(
+            10,
+            f'并行识别 {len(chunks)} 个片段（{self.workers} 个工作进程）...',
+            progress_callback
+        )
+        
+        # 同时在途的片段数有上限，避免一次性把所有片段的PCM放进队列
+        max_in_flight = self.workers * 2
+        next_index = 0
+        pending = set()
+        cache_keys = {}
+        try:
+            while next_index < len(chunks) or pending:
+                # 工作进程中的识别无法中途停止，取消时丢弃未开始的片段
+                self._wait_control()
+                while next_index < len(chunks) and len(pending) < max_in_flight:
+                    chunk = chunks[next_index]
+                    audio = self.splitter.load_chunk(chunk)
+                    cache_key, chunk_result = self._cache_lookup(audio)
+                    if chunk_result is not None:
+                        yield next_index, chunk, chunk_result, 0.0
+                    else:
+                        cache_keys[next_index] = cache_key
+                        pending.add(submit_chunk(pool, next_index, audio,
+                                                 self.transcribe_params))
+                    next_index += 1
+                
+                if not pending:
+                    continue
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, chunk_result, chunk_time = future.result()
+                    self._cache_store(cache_keys.pop(i), chunk_result)
+                    yield i, chunks[i], chunk_result, chunk_time
+        except BrokenProcessPool:
+            discard_worker_pool(pool)
+            raise
+        finally:
+            # 出错或取消时，丢弃尚未开始的片段
+            for future in pending:
+                future.cancel()
+    
+    def _cache_lookup(self, audio: Union[str, np.ndarray]) -> Tuple[Optional[str], Optional[Dict]]:
+        """查询识别结果缓存，返回 (缓存键, 缓存的结果或None)"""
+        if self.cache is None:
+            return None, None
+        params = {**SpeechRecognizer.DEFAULT_PARAMS, **self.transcribe_params}
+        # 不同后端、不同解码方式的结果不同，分开缓存；多进程模式下逐片段解码
+        decode_mode = 'batch' if self.batch_size > 1 and self.workers <= 1 else 'sequential'
+        cache_key = self.cache.make_key(audio, self.model_size, params,
+                                        backend=self.backend, decode_mode=decode_mode)
+        result = self.cache.get(cache_key)
+        if result is not None:
+            self.cached_chunks += 1
+        return cache_key, result
+    
+    def _cache_store(self, cache_key: Optional[str], result: Dict):
+        """保存原始识别结果（在调整时间戳和术语修正之前调用）"""
+        if self.cache is not None and cache_key is not None:
+            self.cache.put(cache_key, result)
+    
     def _update_progress(self, progress: int, message: str, callback: Optional[Callable] = None):
         """更新进度信息"""
         self.progress_info['current_progress'] = progress
@@ -281,6 +606,12 @@ class EnhancedPipeline:
         if callback:
             callback(self.progress_info)
     
+    def close(self):
+        """释放管道占用的资源（归还模型到缓存）"""
+        if self.recognizer is not None:
+            self.recognizer.release()
+            self.recognizer = None
+    
     def get_progress(self) -> Dict:
         """获取当前进度信息"""
         return self.progress_info.copy()
@@ -0,0 +1,98 @@
+"""任务检查点 - 持久化每个已完成片段的识别结果，崩溃或取消后从中断处继续"""
+import json
+import logging
+import os
+import shutil
+import threading
+from typing import Dict, List, Tuple
+
+from .json_util import to_builtin
+
+logger = logging.getLogger(__name__)
+
+ChunkKey = Tuple[float, float]
+
+
+def chunk_key(chunk: Dict) -> ChunkKey:
+    """片段的标识：按时间范围而非序号，切分方案不同时不会错配"""
+    return (round(chunk['start_time'], 3), round(chunk['end_time'], 3))
+
+
+class JobCheckpoint:
+    """单个任务的检查点目录
+
+    - meta.json: 任务参数和状态，整体原子替换
+    - chunks.jsonl: 每完成一个片段追加一行原始识别结果（调整时间戳和术语修正之前），
+      写入后立即fsync；崩溃时最多丢失正在写入的最后一行，读取时忽略不完整的行
+    """
+
+    META_FILE = 'meta.json'
+    CHUNKS_FILE = 'chunks.jsonl'
+
+    def __init__(self, directory: str, job_id: str):
+        self.job_id = job_id
+        self.path = os.path.join(directory, job_id)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def list_jobs(cls, directory: str) -> List['JobCheckpoint']:
+        """目录中所有带元数据的检查点"""
+        if not os.path.isdir(directory):
+            return []
+        return [cls(directory, name) for name in sorted(os.listdir(directory))
+                if os.path.exists(os.path.join(directory, name, cls.META_FILE))]
+
+    def save_meta(self, meta: Dict):
+        """保存任务参数和状态（与已有内容合并）"""
+        with self._lock:
+            merged = {**self.load_meta(), **meta}
+            os.makedirs(self.path, exist_ok=True)
+            path = os.path.join(self.path, self.META_FILE)
+            temp_path = path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(merged, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+
+    def load_meta(self) -> Dict:
+        try:
+            with open(os.path.join(self.path, self.META_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def record_chunk(self, chunk: Dict, result: Dict):
+        """追加一个已完成片段的识别结果"""
+        line = json.dumps({
+            'key': list(chunk_key(chunk)),
+            'segments': result.get('segments', []),
+            'language': result.get('language')
+        }, ensure_ascii=False, default=to_builtin)
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, self.CHUNKS_FILE), 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def completed_chunks(self) -> Dict[ChunkKey, Dict]:
+        """已完成片段的识别结果 {片段标识: 识别结果}"""
+        completed = {}
+        try:
+            with open(os.path.join(self.path, self.CHUNKS_FILE), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        logger.warning(f"检查点中有不完整的记录，已忽略: {self.job_id}")
+                        continue
+                    completed[tuple(record['key'])] = {
+                        'segments': record['segments'],
+                        'language': record.get('language')
+                    }
+        except FileNotFoundError:
+            pass
+        return completed
+
+    def remove(self):
+        """任务完成后删除检查点"""
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -0,0 +1,112 @@
+"""任务控制 - 暂停、继续和取消，识别过程中也能及时停止"""
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+_local = threading.local()
+
+
+class JobCancelled(Exception):
+    """任务已取消"""
+
+    def __init__(self):
+        super().__init__('处理已取消')
+
+
+class JobPaused(Exception):
+    """任务已暂停，让出执行槽位（release_on_pause时由wait()抛出）"""
+
+    def __init__(self):
+        super().__init__('处理已暂停')
+
+
+class JobControl:
+    """单个任务的暂停/取消状态
+
+    由请求线程调用pause/resume/cancel，执行任务的线程在安全点调用 ``wait()``：
+    暂停时阻塞在事件上（不轮询），继续或取消时立即唤醒；已取消时抛出JobCancelled。
+    release_on_pause时暂停不阻塞而是抛出JobPaused，由调用方结束任务、让出槽位，
+    继续时从检查点重新排队。
+    """
+
+    def __init__(self, release_on_pause: bool = False):
+        self.release_on_pause = release_on_pause
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = threading.Event()
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def pause(self):
+        if not self.cancelled:
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._running.set()  # 唤醒暂停中的任务，使其退出
+
+    def check(self):
+        """已取消时抛出JobCancelled（不阻塞）"""
+        if self._cancelled.is_set():
+            raise JobCancelled()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """暂停时等待继续，已取消时抛出JobCancelled
+
+        Returns:
+            是否可以继续（超时仍在暂停时返回False）
+
+        Raises:
+            JobPaused: release_on_pause且已暂停
+        """
+        self.check()
+        if self.release_on_pause and self.paused:
+            raise JobPaused()
+        running = self._running.wait(timeout)
+        self.check()
+        return running
+
+
+@contextmanager
+def controlled(control: Optional[JobControl]):
+    """在当前线程中执行受控制的识别：模型每次前向计算前检查是否已取消"""
+    previous = getattr(_local, 'control', None)
+    _local.control = control
+    try:
+        yield control
+    finally:
+        _local.control = previous
+
+
+def current_control() -> Optional[JobControl]:
+    return getattr(_local, 'control', None)
+
+
+def install_cancel_hooks(model):
+    """在Whisper编码器和解码器的前向计算前检查当前线程的任务是否已取消
+
+    解码器每生成一个token调用一次，因此取消在当前片段内即可生效，不必等整个
+    片段识别完。这里只检查取消不处理暂停：暂停在片段之间生效，避免在持有
+    共享模型的推理锁时阻塞其他任务。模型被多个任务共享，钩子只安装一次，
+    按线程区分任务。
+    """
+    if getattr(model, '_cancel_hooks_installed', False):
+        return
+
+    def check_cancelled(module, args):
+        control = current_control()
+        if control is not None:
+            control.check()
+
+    model.encoder.register_forward_pre_hook(check_cancelled)
+    model.decoder.register_forward_pre_hook(check_cancelled)
+    model._cancel_hooks_installed = True
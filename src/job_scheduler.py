@@ -0,0 +1,185 @@
+"""任务调度模块 - 有界队列和固定数量的并发识别槽位"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """等待队列已满"""
+
+
+class _Job:
+    def __init__(self, job_id: str, func: Callable, args: tuple, kwargs: dict,
+                 priority: float, cost: Optional[float], seq: int):
+        self.job_id = job_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.cost = cost
+        self.seq = seq
+        self.state = 'queued'  # queued / running / done / cancelled
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+
+    def sort_key(self):
+        return (self.priority, self.seq)
+
+
+class JobScheduler:
+    """识别任务调度器
+
+    任务先进入有界的优先队列（priority越小越先执行，例如按文件大小实现
+    短文件优先），再由固定数量的工作线程依次取出执行，避免同时加载多个
+    模型争抢CPU和内存。排队中的任务可以直接从队列中移除。
+    """
+
+    # 没有历史数据时，假设每个任务的耗时（秒）
+    DEFAULT_JOB_SECONDS = 60.0
+
+    def __init__(self, max_concurrent: int = 1, max_queue: int = 20):
+        """
+        Args:
+            max_concurrent: 同时执行的任务数
+            max_queue: 等待队列的最大长度
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self._heap: List = []
+        self._jobs: Dict[str, _Job] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._shutdown = False
+
+        # 耗时估算：每单位cost的秒数（指数滑动平均）
+        self._seconds_per_cost: Optional[float] = None
+        self._avg_job_seconds: Optional[float] = None
+
+        self._workers = [
+            threading.Thread(target=self._worker, daemon=True,
+                             name=f"job-worker-{i}")
+            for i in range(max_concurrent)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, job_id: str, func: Callable, *args,
+               priority: float = 0, cost: Optional[float] = None, **kwargs):
+        """提交任务
+
+        Args:
+            job_id: 任务ID
+            func: 任务函数，执行 func(*args, **kwargs)
+            priority: 优先级，越小越先执行
+            cost: 任务工作量（例如文件大小），用于估算耗时
+
+        Raises:
+            QueueFullError: 等待队列已满
+        """
+        with self._cond:
+            queued = sum(1 for job in self._jobs.values() if job.state == 'queued')
+            if queued >= self.max_queue:
+                raise QueueFullError(f"等待队列已满（{self.max_queue}）")
+            job = _Job(job_id, func, args, kwargs, priority, cost, next(self._seq))
+            self._jobs[job_id] = job
+            heapq.heappush(self._heap, (job.sort_key(), job))
+            self._cond.notify()
+
+    def cancel(self, job_id: str) -> bool:
+        """取消排队中的任务
+
+        Returns:
+            任务尚未开始并已从队列中移除时返回True；已在执行时返回False
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.state != 'queued':
+                return False
+            job.state = 'cancelled'
+            del self._jobs[job_id]
+            self._heap = [item for item in self._heap if item[1] is not job]
+            heapq.heapify(self._heap)
+            return True
+
+    def queue_info(self, job_id: str) -> Optional[Dict]:
+        """查询任务的排队信息
+
+        Returns:
+            {'state', 'position', 'estimated_start_in'}；position从1开始，
+            estimated_start_in为预计多少秒后开始。任务不存在时返回None
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.state != 'queued':
+                return {'state': job.state, 'position': 0, 'estimated_start_in': 0}
+
+            queued = sorted((j for j in self._jobs.values() if j.state == 'queued'),
+                            key=_Job.sort_key)
+            position = queued.index(job) + 1
+
+            # 模拟各槽位的空闲时刻，推算该任务的开始时间
+            now = time.time()
+            slots = [max(0.0, self._estimate(j) - (now - j.started_at))
+                     for j in self._jobs.values() if j.state == 'running']
+            slots += [0.0] * (self.max_concurrent - len(slots))
+            heapq.heapify(slots)
+            for ahead in queued[:position - 1]:
+                heapq.heappush(slots, heapq.heappop(slots) + self._estimate(ahead))
+
+            return {
+                'state': 'queued',
+                'position': position,
+                'estimated_start_in': slots[0] if slots else 0.0
+            }
+
+    def _estimate(self, job: _Job) -> float:
+        """估算任务耗时"""
+        if job.cost is not None and self._seconds_per_cost is not None:
+            return job.cost * self._seconds_per_cost
+        return self._avg_job_seconds or self.DEFAULT_JOB_SECONDS
+
+    def _record_duration(self, job: _Job, seconds: float):
+        """根据完成的任务更新耗时估算"""
+        alpha = 0.3
+        self._avg_job_seconds = (seconds if self._avg_job_seconds is None
+                                 else alpha * seconds + (1 - alpha) * self._avg_job_seconds)
+        if job.cost:
+            rate = seconds / job.cost
+            self._seconds_per_cost = (rate if self._seconds_per_cost is None
+                                      else alpha * rate + (1 - alpha) * self._seconds_per_cost)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._heap and not self._shutdown:
+                    self._cond.wait()
+                if self._shutdown:
+                    return
+                _, job = heapq.heappop(self._heap)
+                job.state = 'running'
+                job.started_at = time.time()
+
+            try:
+                job.func(*job.args, **job.kwargs)
+            except Exception as e:
+                logger.error(f"任务 {job.job_id} 执行失败: {e}")
+            finally:
+                with self._cond:
+                    job.state = 'done'
+                    self._record_duration(job, time.time() - job.started_at)
+                    # 执行期间可能已用同一ID提交了新任务，只移除自己
+                    if self._jobs.get(job.job_id) is job:
+                        del self._jobs[job.job_id]
+
+    def shutdown(self):
+        """停止调度（排队中的任务不再执行）"""
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
@@ -0,0 +1,8 @@
+"""JSON序列化辅助函数"""
+
+
+def to_builtin(value):
+    """JSON序列化时把numpy类型转换为内置类型（用作json.dump的default）"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"无法序列化: {type(value)}")
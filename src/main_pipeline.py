@@ -26,7 +26,8 @@ class SpeechProcessingPipeline:
         
         # 初始化各模块
         self.recognizer = SpeechRecognizer(
-            model_size=self.config.get("model_size", "large-v3")
+            model_size=self.config.get("model_size", "large-v3"),
+            backend=self.config.get("backend", "whisper")
         )
         
         # 使用项目根目录下的data文件夹
@@ -36,7 +37,7 @@ class SpeechProcessingPipeline:
         terms_file = os.path.join(data_dir, 'terms.json')
         log_file = os.path.join(data_dir, 'corrections_log.json')
         
-        self.term_manager = TermManager(terms_file, log_file)
+        self.term_manager = TermManager.shared(terms_file, log_file)
         self.corrector = TermCorrector(self.term_manager)
         self.subtitle_gen = SubtitleGenerator()
         self.validator = AccuracyValidator()
@@ -67,10 +68,7 @@ class SpeechProcessingPipeline:
         all_corrections = []
         
         for segment in segments:
-            corrected_text, corrections = self.corrector.correct_text(
-                segment["text"],
-                record_corrections=True
-            )
+            corrected_text, corrections = self.corrector.correct_text(segment["text"])
             
             corrected_segment = segment.copy()
             corrected_segment["text"] = corrected_text
@@ -87,12 +85,9 @@ class SpeechProcessingPipeline:
         base_name = os.path.splitext(os.path.basename(audio_path))[0]
         subtitle_path = os.path.join(output_dir, f"{base_name}.{subtitle_format}")
         
-        if subtitle_format == "srt":
-            self.subtitle_gen.generate_srt(corrected_segments, subtitle_path)
-        elif subtitle_format == "vtt":
-            self.subtitle_gen.generate_vtt(corrected_segments, subtitle_path)
-        else:
-            self.subtitle_gen.generate_txt(corrected_segments, subtitle_path)
+        if subtitle_format not in self.subtitle_gen.supported_formats:
+            subtitle_format = "txt"
+        self.subtitle_gen.write(corrected_segments, subtitle_path, subtitle_format)
         
         # 4. 精度验证（如果需要）
         metrics = {}
@@ -137,6 +132,5 @@ class SpeechProcessingPipeline:
             context=context,
             confidence=1.0  # 用户反馈具有最高置信度
         )
-        # 重建修正器的Trie树
-        self.corrector._build_trie()
+        # 修正器已订阅术语索引，会自动增量更新
         logger.info(f"已学习新术语: {original} -> {corrected}")
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""模型缓存模块 - 进程内共享已加载的Whisper模型"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ModelKey = Tuple[str, str]  # (model_size, device)
+
+
+def _default_loader(model_size: str, device: str):
+    import whisper
+    from .recognizer_backends import INT8_SUFFIX, quantize_whisper
+    if model_size.endswith(INT8_SUFFIX):
+        # 量化模型在CPU上从原模型生成
+        return quantize_whisper(whisper.load_model(model_size[:-len(INT8_SUFFIX)], device="cpu"))
+    return whisper.load_model(model_size, device=device)
+
+
+def estimate_model_bytes(model) -> int:
+    """估算模型参数和缓冲区占用的内存"""
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+    except AttributeError:
+        return 0
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+class ModelHandle:
+    """已借出的模型
+
+    同一个模型可能被多个任务共享；Whisper解码时会在模型上临时挂载
+    KV缓存钩子，因此推理必须在 ``lock`` 内进行。
+    """
+
+    def __init__(self, key: ModelKey, model, nbytes: int):
+        self.key = key
+        self.model = model
+        self.nbytes = nbytes
+        self.lock = threading.RLock()
+        self.refcount = 0
+
+
+class ModelRegistry:
+    """按 (model_size, device) 缓存模型
+
+    - 引用计数：acquire/release 成对使用，使用中的模型不会被淘汰
+    - LRU淘汰：空闲模型按最近使用顺序淘汰，使总内存不超过预算
+    - 并发安全：同一模型并发请求只加载一次
+    """
+
+    def __init__(self, memory_budget_mb: Optional[float] = None,
+                 loader: Optional[Callable] = None):
+        """
+        Args:
+            memory_budget_mb: 缓存模型的内存预算（MB），None表示不限制
+            loader: 模型加载函数 loader(model_size, device)，默认whisper.load_model
+        """
+        self.memory_budget = (memory_budget_mb * 1024 * 1024
+                              if memory_budget_mb else None)
+        self._loader = loader or _default_loader
+        self._entries: "OrderedDict[ModelKey, ModelHandle]" = OrderedDict()
+        self._loading: Dict[ModelKey, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, model_size: str, device: str) -> ModelHandle:
+        """借出模型（不存在时加载），用完后需调用release"""
+        key = (model_size, device)
+        while True:
+            with self._lock:
+                handle = self._entries.get(key)
+                if handle is not None:
+                    handle.refcount += 1
+                    self._entries.move_to_end(key)
+                    return handle
+                event = self._loading.get(key)
+                if event is None:
+                    event = threading.Event()
+                    self._loading[key] = event
+                    break
+            # 其他线程正在加载同一模型，等待其完成
+            event.wait()
+
+        try:
+            logger.info(f"加载模型: {model_size} ({device})")
+            model = self._loader(model_size, device)
+            handle = ModelHandle(key, model, estimate_model_bytes(model))
+            with self._lock:
+                handle.refcount = 1
+                self._entries[key] = handle
+                self._evict()
+            return handle
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+            event.set()
+
+    def release(self, handle: ModelHandle):
+        """归还模型；空闲模型保留在缓存中，超出预算时淘汰"""
+        with self._lock:
+            if handle.refcount > 0:
+                handle.refcount -= 1
+            self._evict()
+
+    def warmup(self, model_sizes: List[str], device: str):
+        """预先加载模型（例如服务启动时），加载后立即归还到缓存"""
+        for model_size in model_sizes:
+            self.release(self.acquire(model_size, device))
+
+    def _evict(self):
+        """按LRU顺序淘汰空闲模型直到满足内存预算（调用方需持有锁）"""
+        if self.memory_budget is None:
+            return
+        total = sum(h.nbytes for h in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.memory_budget:
+                return
+            handle = self._entries[key]
+            if handle.refcount == 0:
+                del self._entries[key]
+                total -= handle.nbytes
+                logger.info(f"淘汰模型: {key[0]} ({key[1]})")
+        if total > self.memory_budget:
+            logger.warning("使用中的模型已超出内存预算")
+
+    def stats(self) -> List[Dict]:
+        """返回缓存中各模型的状态"""
+        with self._lock:
+            return [{
+                'model_size': key[0],
+                'device': key[1],
+                'refcount': handle.refcount,
+                'memory_mb': handle.nbytes / (1024 * 1024)
+            } for key, handle in self._entries.items()]
+
+
+_default_registry: Optional[ModelRegistry] = None
+_default_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """获取进程内默认的模型缓存"""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = ModelRegistry()
+        return _default_registry
+
+
+def configure_model_registry(memory_budget_mb: Optional[float] = None) -> ModelRegistry:
+    """设置默认模型缓存的内存预算（应在加载任何模型之前调用）"""
+    global _default_registry
+    with _default_lock:
+        _default_registry = ModelRegistry(memory_budget_mb)
+        return _default_registry
@@ -0,0 +1,146 @@
+"""预览音频 - 为审阅界面生成低码率的纯音频版本，供拖动进度条时按范围读取"""
+import logging
+import os
+import subprocess
+import threading
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from .audio_splitter import SAMPLE_RATE
+from .decoded_audio import DecodedAudio
+
+logger = logging.getLogger(__name__)
+
+# 编码方式: (ffmpeg编码参数, 扩展名, MIME类型)
+CODECS: Dict[str, Tuple[List[str], str, str]] = {
+    # Opus语音模式，体积最小；60ms帧和最低复杂度使编码更快，预览足够清晰
+    'opus': (['-c:a', 'libopus', '-application', 'voip', '-frame_duration', '60',
+              '-compression_level', '0', '-f', 'webm'], 'webm', 'audio/webm'),
+    # AAC兼容性最好；moov放在文件开头，浏览器不必读到末尾即可开始播放和拖动
+    'aac': (['-c:a', 'aac', '-movflags', '+faststart', '-f', 'mp4'], 'm4a', 'audio/mp4'),
+}
+
+
+class PreviewRenditions:
+    """按音频内容缓存预览用的低码率音频
+
+    直接从解码缓存中的16kHz单声道PCM编码，不再解码原始文件（原始文件常是
+    体积很大的视频）。文件名与解码结果相同（内容的sha256），同一内容只编码一次。
+    总大小超过上限时按最近使用时间删除；正在发送的文件在Windows上无法删除，
+    跳过并在下次淘汰时重试。
+    """
+
+    def __init__(self, directory: str, codec: str = 'opus', bitrate: str = '24k',
+                 max_size_mb: float = 1024):
+        """
+        Args:
+            directory: 预览音频目录
+            codec: 编码方式，opus 或 aac
+            bitrate: 码率
+            max_size_mb: 预览音频总大小上限（MB）
+        """
+        if codec not in CODECS:
+            raise ValueError(f"不支持的编码方式: {codec}")
+        self.directory = directory
+        self.codec = codec
+        self.bitrate = bitrate
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.mimetype = CODECS[codec][2]
+        self._cond = threading.Condition()
+        self._building = set()
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, decoded: DecodedAudio) -> str:
+        """解码结果对应的预览音频路径"""
+        key = os.path.splitext(os.path.basename(decoded.path))[0]
+        return os.path.join(self.directory, f"{key}.{CODECS[self.codec][1]}")
+
+    def build(self, decoded: DecodedAudio) -> Optional[str]:
+        """生成预览音频（已存在或正在生成时直接返回），失败时返回None"""
+        path = self.path_for(decoded)
+        with self._cond:
+            if os.path.exists(path) or path in self._building:
+                return path
+            self._building.add(path)
+        try:
+            self._encode(decoded.path, path)
+            self._evict(keep=path)
+            return path
+        except subprocess.CalledProcessError as e:
+            logger.error(f"生成预览音频失败: {e.stderr.decode(errors='ignore')[-200:]}")
+            return None
+        finally:
+            with self._cond:
+                self._building.discard(path)
+                self._cond.notify_all()
+
+    def build_async(self, decoded: DecodedAudio):
+        """在后台线程中生成预览音频"""
+        if os.path.exists(self.path_for(decoded)):
+            return
+        threading.Thread(target=self.build, args=(decoded,), daemon=True,
+                         name='preview-audio').start()
+
+    def get(self, path: str, timeout: float = 0) -> Optional[str]:
+        """已生成的预览音频（更新最近使用时间），尚未生成时返回None
+        
+        Args:
+            timeout: 正在生成时最多等待的秒数
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: path not in self._building, timeout)
+        try:
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            return None
+
+    def _encode(self, pcm_path: str, path: str):
+        """用一次ffmpeg调用把PCM编码为预览音频（先写临时文件再原子替换）"""
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        cmd = [
+            'ffmpeg',
+            '-nostdin',
+            '-f', 's16le',
+            '-ar', str(SAMPLE_RATE),
+            '-ac', '1',
+            '-i', pcm_path,
+            *CODECS[self.codec][0],
+            '-b:a', self.bitrate,
+            '-y',
+            temp_path
+        ]
+        try:
+            subprocess.run(cmd, capture_output=True, check=True)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _evict(self, keep: str):
+        """按最近使用时间删除旧文件，直到总大小不超过上限（刚生成的文件和使用中的文件保留）"""
+        with self._cond:
+            entries = []
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if name.endswith('.tmp'):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            entries.sort()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    total -= size
+                except OSError as e:
+                    logger.debug(f"预览音频正在使用，暂不删除: {os.path.basename(path)} ({e})")
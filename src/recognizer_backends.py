@@ -0,0 +1,395 @@
+"""识别后端 - 语音识别引擎的统一接口及实现
+
+- whisper: openai-whisper（PyTorch），默认后端
+- whisper-int8: 同一模型的线性层动态量化为int8，仅CPU，吞吐更高
+- stub: 不加载模型的确定性后端，用于在没有模型权重时测试和评测流水线其余部分
+"""
+import dataclasses
+import hashlib
+import time
+import warnings
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import torch
+import whisper
+
+from .job_control import install_cancel_hooks
+from .model_registry import ModelRegistry, get_model_registry
+
+Audio = Union[str, np.ndarray]  # 音频文件路径或16kHz单声道float32采样
+
+# 每个解码位置对应的时长（秒）：编码器输出每2帧一个位置
+TIME_PRECISION = 2 * whisper.audio.HOP_LENGTH / whisper.audio.SAMPLE_RATE
+
+
+def _batch_log_mel(windows: List[np.ndarray], n_mels: int) -> torch.Tensor:
+    """批量计算log-mel频谱，结果与whisper.transcribe中逐窗口计算的一致
+    
+    每个窗口补零到30秒再多补一个FFT窗口长度，按窗口各自的最大值归一化，
+    有效帧之后的帧置零（与whisper的pad_or_trim相同）。
+    
+    Returns:
+        (窗口数, n_mels, N_FRAMES)
+    """
+    n_samples = whisper.audio.N_SAMPLES + whisper.audio.N_FFT
+    audio = torch.zeros(len(windows), n_samples)
+    for row, window in enumerate(windows):
+        audio[row, :len(window)] = torch.from_numpy(np.asarray(window, dtype=np.float32))
+    
+    stft = torch.stft(audio, whisper.audio.N_FFT, whisper.audio.HOP_LENGTH,
+                      window=torch.hann_window(whisper.audio.N_FFT), return_complex=True)
+    magnitudes = stft[..., :-1].abs() ** 2
+    mel_spec = whisper.audio.mel_filters(audio.device, n_mels) @ magnitudes
+    
+    log_spec = torch.clamp(mel_spec, min=1e-10).log10()
+    row_max = log_spec.amax(dim=(1, 2), keepdim=True)
+    log_spec = torch.maximum(log_spec, row_max - 8.0)
+    log_spec = (log_spec + 4.0) / 4.0
+    
+    log_spec = log_spec[..., :whisper.audio.N_FRAMES].contiguous()
+    for row, window in enumerate(windows):
+        log_spec[row, :, len(window) // whisper.audio.HOP_LENGTH:] = 0
+    return log_spec
+
+
+def _needs_fallback(result, params: Dict) -> bool:
+    """解码质量不达标（重复或概率过低），且不是静音"""
+    compression_threshold = params.get("compression_ratio_threshold")
+    logprob_threshold = params.get("logprob_threshold")
+    no_speech_threshold = params.get("no_speech_threshold")
+    failed = ((compression_threshold is not None
+               and result.compression_ratio > compression_threshold)
+              or (logprob_threshold is not None
+                  and result.avg_logprob < logprob_threshold))
+    silence = no_speech_threshold is not None and result.no_speech_prob > no_speech_threshold
+    return failed and not silence
+
+
+def _is_silence(result, params: Dict) -> bool:
+    """whisper.transcribe跳过窗口的条件：无语音概率高且平均对数概率不高"""
+    no_speech_threshold = params.get("no_speech_threshold")
+    logprob_threshold = params.get("logprob_threshold")
+    if no_speech_threshold is None or result.no_speech_prob <= no_speech_threshold:
+        return False
+    return logprob_threshold is None or result.avg_logprob <= logprob_threshold
+
+
+def _tokens_to_segments(result, tokenizer, time_offset: float,
+                        window_samples: int) -> Tuple[List[Dict], int]:
+    """按时间戳token把一个窗口的解码结果拆成片段（规则同whisper.transcribe）
+    
+    Returns:
+        (片段列表, 已识别完的采样数)
+    """
+    tokens = result.tokens
+    timestamp_begin = tokenizer.timestamp_begin
+    is_timestamp = [token >= timestamp_begin for token in tokens]
+    single_timestamp_ending = is_timestamp[-2:] == [False, True]
+    
+    def new_segment(start: float, end: float, segment_tokens: List[int]) -> Dict:
+        return {
+            "seek": 0,
+            "start": time_offset + start,
+            "end": time_offset + end,
+            "text": tokenizer.decode([token for token in segment_tokens if token < tokenizer.eot]),
+            "tokens": segment_tokens,
+            "temperature": result.temperature,
+            "avg_logprob": result.avg_logprob,
+            "compression_ratio": result.compression_ratio,
+            "no_speech_prob": result.no_speech_prob
+        }
+    
+    # 相邻的两个时间戳token是片段的分界
+    slices = [i for i in range(1, len(tokens)) if is_timestamp[i - 1] and is_timestamp[i]]
+    if not slices:
+        duration = window_samples / whisper.audio.SAMPLE_RATE
+        timestamps = [token for token in tokens if token >= timestamp_begin]
+        if timestamps and timestamps[-1] != timestamp_begin:
+            duration = (timestamps[-1] - timestamp_begin) * TIME_PRECISION
+        return [new_segment(0.0, duration, tokens)], window_samples
+    
+    if single_timestamp_ending:
+        slices.append(len(tokens))
+    segments = []
+    last_slice = 0
+    for current_slice in slices:
+        sliced = tokens[last_slice:current_slice]
+        segments.append(new_segment(
+            (sliced[0] - timestamp_begin) * TIME_PRECISION,
+            (sliced[-1] - timestamp_begin) * TIME_PRECISION,
+            sliced
+        ))
+        last_slice = current_slice
+    
+    if single_timestamp_ending:
+        return segments, window_samples
+    # 最后一个片段未闭合：丢弃，从最后一个时间戳处继续识别
+    last_position = tokens[last_slice - 1] - timestamp_begin
+    consumed = last_position * 2 * whisper.audio.HOP_LENGTH
+    return segments, consumed if consumed > 0 else window_samples
+
+
+class RecognizerBackend:
+    """识别后端接口
+    
+    参数由SpeechRecognizer合并默认值后完整传入，结果格式同whisper.transcribe:
+    {"text": str, "segments": [{"id", "start", "end", "text", ...}], "language": str}
+    """
+    
+    name = ""
+    
+    def transcribe(self, audio: Audio, **params) -> Dict:
+        raise NotImplementedError
+    
+    def transcribe_batch(self, audios: List[Audio], batch_size: int = 8,
+                         **params) -> List[Dict]:
+        """批量识别，默认逐个调用transcribe"""
+        return [self.transcribe(audio, **params) for audio in audios]
+    
+    def detect_language(self, audio: Audio) -> Tuple[str, float]:
+        """检测语言，返回 (语言代码, 置信度)"""
+        raise NotImplementedError
+    
+    def release(self):
+        """释放后端占用的资源（例如归还模型）"""
+
+
+class WhisperBackend(RecognizerBackend):
+    """openai-whisper后端，模型从模型缓存借出，多个任务共享同一份权重"""
+    
+    name = "whisper"
+    
+    def __init__(self, model_size: str, device: str,
+                 registry: Optional[ModelRegistry] = None):
+        self.device = device
+        self.registry = registry or get_model_registry()
+        self._handle = self.registry.acquire(self.model_key(model_size), device)
+        self.model = self._handle.model
+        # 任务取消时在当前片段的解码过程中即停止
+        install_cancel_hooks(self.model)
+    
+    @staticmethod
+    def model_key(model_size: str) -> str:
+        """模型缓存中的名称"""
+        return model_size
+    
+    def release(self):
+        handle, self._handle = getattr(self, '_handle', None), None
+        if handle is not None:
+            self.registry.release(handle)
+    
+    def transcribe(self, audio: Audio, **params) -> Dict:
+        # 共享模型上的推理需串行
+        with self._handle.lock:
+            return self.model.transcribe(audio, **params)
+    
+    def transcribe_batch(self, audios: List[Audio],
+                         batch_size: int = 8, **params) -> List[Dict]:
+        """批量识别多个片段（CPU上一次编码多个窗口能更好地利用BLAS）
+        
+        每轮最多取batch_size个30秒窗口，一起计算log-mel，编码器和贪心解码
+        在批维度上运行。窗口未识别完（以未闭合的片段结束）时，剩余部分放回
+        队列在下一轮继续；压缩比或平均对数概率不达标的窗口退回transcribe
+        （带温度回退）。与transcribe的区别是不以前文作为提示。
+        
+        Args:
+            audios: 音频文件路径或16kHz单声道float32采样数组的列表
+            batch_size: 每轮解码的窗口数
+            **params: 完整的Whisper参数
+            
+        Returns:
+            与audios一一对应的识别结果，格式同transcribe
+        """
+        if params.get("word_timestamps"):
+            # 词级时间戳需要逐窗口对齐，逐个识别
+            return [self.transcribe(audio, **params) for audio in audios]
+        
+        audios = [whisper.load_audio(audio) if isinstance(audio, str) else audio
+                  for audio in audios]
+        temperature = params["temperature"]
+        if isinstance(temperature, (list, tuple)):
+            temperature = temperature[0]
+        # 参数中属于DecodingOptions的部分（beam_size、sample_len等）直接传给解码器
+        option_names = {field.name for field in dataclasses.fields(whisper.DecodingOptions)}
+        decode_options = {key: value for key, value in params.items() if key in option_names}
+        decode_options.update(temperature=temperature,
+                              fp16=params.get("fp16", True) and self.device != "cpu")
+        options = whisper.DecodingOptions(**decode_options)
+        
+        segments: List[List[Dict]] = [[] for _ in audios]
+        languages: List[Optional[str]] = [params.get("language")] * len(audios)
+        # 待识别的窗口: (片段序号, 起始采样)
+        queue = [(index, 0) for index, audio in enumerate(audios) if len(audio) > 0]
+        fallback = []
+        
+        while queue:
+            batch, queue = queue[:batch_size], queue[batch_size:]
+            windows = [audios[index][offset:offset + whisper.audio.N_SAMPLES]
+                       for index, offset in batch]
+            mel = _batch_log_mel(windows, self.model.dims.n_mels).to(self.model.device)
+            with self._handle.lock:
+                results = whisper.decode(self.model, mel, options)
+            
+            for (index, offset), window, result in zip(batch, windows, results):
+                languages[index] = result.language
+                if _needs_fallback(result, params):
+                    fallback.append((index, offset))
+                    continue
+                if _is_silence(result, params):
+                    consumed = len(window)
+                else:
+                    tokenizer = self._tokenizer(result.language, params["task"])
+                    window_segments, consumed = _tokens_to_segments(
+                        result, tokenizer, offset / whisper.audio.SAMPLE_RATE,
+                        len(window)
+                    )
+                    segments[index].extend(window_segments)
+                if offset + consumed < len(audios[index]):
+                    queue.append((index, offset + consumed))
+        
+        for index, offset in fallback:
+            result = self.transcribe(audios[index][offset:], **params)
+            shift = offset / whisper.audio.SAMPLE_RATE
+            for segment in result["segments"]:
+                segment["start"] += shift
+                segment["end"] += shift
+            segments[index].extend(result["segments"])
+        
+        results = []
+        for index, audio_segments in enumerate(segments):
+            audio_segments.sort(key=lambda segment: segment["start"])
+            for segment_id, segment in enumerate(audio_segments):
+                segment["id"] = segment_id
+            results.append({
+                "text": "".join(segment["text"] for segment in audio_segments),
+                "segments": audio_segments,
+                "language": languages[index]
+            })
+        return results
+    
+    def _tokenizer(self, language: Optional[str], task: str):
+        return whisper.tokenizer.get_tokenizer(
+            self.model.is_multilingual,
+            num_languages=self.model.num_languages,
+            language=language,
+            task=task
+        )
+    
+    def detect_language(self, audio: Audio) -> Tuple[str, float]:
+        if isinstance(audio, str):
+            audio = whisper.load_audio(audio)
+        audio = whisper.pad_or_trim(audio)
+        
+        mel = whisper.log_mel_spectrogram(audio, self.model.dims.n_mels).to(self.model.device)
+        with self._handle.lock:
+            _, probs = self.model.detect_language(mel)
+        
+        lang = max(probs, key=probs.get)
+        return lang, probs[lang]
+
+
+# 量化模型在模型缓存中的名称后缀
+INT8_SUFFIX = "-int8"
+
+
+def quantize_whisper(model):
+    """把Whisper模型的线性层动态量化为int8（权重量化，激活按批动态量化）
+    
+    whisper.model.Linear只重写了forward（按输入类型转换权重），
+    先换回nn.Linear，torch才能识别并替换为量化线性层。
+    """
+    model = model.cpu().float().eval()
+    for module in model.modules():
+        if type(module) is whisper.model.Linear:
+            module.__class__ = torch.nn.Linear
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class QuantizedWhisperBackend(WhisperBackend):
+    """int8动态量化的Whisper（仅CPU）
+    
+    编码器和解码器中的线性层占绝大部分计算，量化后在CPU上吞吐明显提高，
+    识别结果与原模型略有差异。
+    """
+    
+    name = "whisper-int8"
+    
+    def __init__(self, model_size: str, device: str = "cpu",
+                 registry: Optional[ModelRegistry] = None):
+        super().__init__(model_size, "cpu", registry)
+    
+    @staticmethod
+    def model_key(model_size: str) -> str:
+        return model_size + INT8_SUFFIX
+
+
+class StubBackend(RecognizerBackend):
+    """确定性的桩后端，不加载模型
+    
+    按固定时长把音频切成片段，文本由片段序号和音频内容的哈希生成，
+    同一输入总是得到同一结果。可设置real_time_factor模拟识别耗时。
+    """
+    
+    name = "stub"
+    SEGMENT_SECONDS = 5.0
+    
+    def __init__(self, model_size: str = "stub", device: str = "cpu",
+                 real_time_factor: float = 0.0):
+        """
+        Args:
+            real_time_factor: 每秒音频的模拟识别耗时（秒）
+        """
+        self.real_time_factor = real_time_factor
+    
+    def transcribe(self, audio: Audio, **params) -> Dict:
+        if isinstance(audio, str):
+            audio = whisper.load_audio(audio)
+        duration = len(audio) / whisper.audio.SAMPLE_RATE
+        if self.real_time_factor:
+            time.sleep(duration * self.real_time_factor)
+        
+        digest = hashlib.sha1(np.ascontiguousarray(audio).tobytes()).hexdigest()[:6]
+        segments = []
+        start = 0.0
+        while start < duration:
+            end = min(start + self.SEGMENT_SECONDS, duration)
+            text = f"テスト{len(segments) + 1}_{digest}"
+            segment = {"id": len(segments), "seek": 0, "start": start, "end": end, "text": text}
+            if params.get("word_timestamps"):
+                step = (end - start) / len(text)
+                segment["words"] = [
+                    {"word": char, "start": start + i * step, "end": start + (i + 1) * step,
+                     "probability": 1.0}
+                    for i, char in enumerate(text)
+                ]
+            segments.append(segment)
+            start = end
+        
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "language": params.get("language") or "ja"
+        }
+    
+    def detect_language(self, audio: Audio) -> Tuple[str, float]:
+        return "ja", 1.0
+
+
+BACKENDS = {
+    WhisperBackend.name: WhisperBackend,
+    QuantizedWhisperBackend.name: QuantizedWhisperBackend,
+    StubBackend.name: StubBackend,
+}
+
+
+def create_backend(name: str, model_size: str, device: str,
+                   registry: Optional[ModelRegistry] = None) -> RecognizerBackend:
+    """按名称创建识别后端"""
+    if name not in BACKENDS:
+        raise ValueError(f"不支持的识别后端: {name}")
+    if name == StubBackend.name:
+        return StubBackend(model_size, device)
+    return BACKENDS[name](model_size, device, registry)
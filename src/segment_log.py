@@ -0,0 +1,79 @@
+"""字幕日志 - 处理过程中只追加的字幕记录，按游标读取增量"""
+import bisect
+import heapq
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+class SegmentLog:
+    """只追加的字幕日志
+
+    新识别的字幕按完成顺序追加，游标即已追加的条数，只增不减；
+    读取方记住游标，每次用 ``since(cursor)`` 取增量，成本与新增条数成正比。
+
+    已有字幕（开始时间之后、尚未重新识别的部分）作为背景按开始时间排序
+    保存，只记录已完成的时间范围，在需要完整预览时才惰性合并。
+    """
+
+    def __init__(self, background: Optional[List[Dict]] = None):
+        """
+        Args:
+            background: 已有字幕，被已完成的时间范围覆盖后不再出现在预览中
+        """
+        self._segments: List[Dict] = []
+        self._background = sorted(background or [], key=lambda seg: seg['start'])
+        self._done: List[Tuple[float, float]] = []  # 已完成的时间范围，按开始时间排序
+        self._lock = threading.Lock()
+
+    @property
+    def cursor(self) -> int:
+        return len(self._segments)
+
+    def append(self, segments: List[Dict]) -> int:
+        """追加字幕，返回新的游标"""
+        with self._lock:
+            self._segments.extend(segments)
+            return len(self._segments)
+
+    def mark_done(self, start: float, end: float):
+        """标记时间范围已重新识别，范围内的已有字幕不再预览"""
+        with self._lock:
+            # 与相接或重叠的范围合并，保持范围互不重叠
+            index = bisect.bisect_left(self._done, (start, end))
+            if index > 0 and self._done[index - 1][1] >= start:
+                index -= 1
+                start = self._done[index][0]
+                end = max(end, self._done[index][1])
+                del self._done[index]
+            while index < len(self._done) and self._done[index][0] <= end:
+                end = max(end, self._done[index][1])
+                del self._done[index]
+            self._done.insert(index, (start, end))
+
+    def since(self, cursor: int) -> Tuple[List[Dict], int]:
+        """读取游标之后追加的字幕
+
+        Returns:
+            (新增字幕（按追加顺序）, 新的游标)
+        """
+        with self._lock:
+            return self._segments[cursor:], len(self._segments)
+
+    def _covered(self, time: float) -> bool:
+        """时间点是否落在已完成的范围内"""
+        index = bisect.bisect_right(self._done, (time, float('inf'))) - 1
+        return index >= 0 and self._done[index][0] <= time < self._done[index][1]
+
+    def snapshot(self) -> Tuple[List[Dict], int]:
+        """按开始时间排序的完整预览：已识别字幕 + 尚未被覆盖的已有字幕
+
+        Returns:
+            (字幕列表, 对应的游标)，之后可从该游标继续读取增量
+        """
+        with self._lock:
+            cursor = len(self._segments)
+            segments = sorted(self._segments, key=lambda seg: seg['start'])
+            if not self._background:
+                return segments, cursor
+            pending = [seg for seg in self._background if not self._covered(seg['start'])]
+            return list(heapq.merge(segments, pending, key=lambda seg: seg['start'])), cursor
@@ -1,58 +1,90 @@
 """语音识别模块 - 封装Whisper进行日语识别"""
 import whisper
 import numpy as np
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple, Union
 import torch
+from .model_registry import ModelRegistry
+from .recognizer_backends import RecognizerBackend, create_backend
 
 class SpeechRecognizer:
-    def __init__(self, model_size: str = "large-v3", device: Optional[str] = None):
+    # transcribe的默认参数
+    DEFAULT_PARAMS = {
+        "language": "ja",  # 日语
+        "task": "transcribe",
+        "verbose": False,
+        "temperature": 0,  # 确定性输出
+        "compression_ratio_threshold": 2.4,
+        "logprob_threshold": -1.0,
+        "no_speech_threshold": 0.6,
+        "word_timestamps": False  # 词级时间戳需要额外的对齐计算，按需开启
+    }
+    
+    def __init__(self, model_size: str = "large-v3", device: Optional[str] = None,
+                 registry: Optional[ModelRegistry] = None,
+                 backend: Union[str, RecognizerBackend] = "whisper"):
         """初始化语音识别器
         
         Args:
             model_size: Whisper模型大小
             device: 计算设备 (cuda/cpu)
+            registry: 模型缓存，默认使用进程内共享的缓存
+            backend: 识别后端名称（whisper / whisper-int8 / stub）或后端实例
         """
         if device is None:
             device = "cuda" if torch.cuda.is_available() else "cpu"
         
         self.device = device
-        self.model = whisper.load_model(model_size, device=device)
+        self.model_size = model_size
+        if isinstance(backend, str):
+            backend = create_backend(backend, model_size, device, registry)
+        self.backend = backend
+        self.model = getattr(backend, 'model', None)  # Whisper后端的模型，其他后端为None
+    
+    def release(self):
+        """释放后端（归还模型到缓存）"""
+        backend = getattr(self, 'backend', None)
+        if backend is not None:
+            backend.release()
+    
+    def __del__(self):
+        self.release()
         
-    def transcribe(self, audio_path: str, progress_callback=None, **kwargs) -> Dict:
+    def transcribe(self, audio_path: Union[str, np.ndarray],
+                   progress_callback=None, **kwargs) -> Dict:
         """识别音频文件
         
         Args:
-            audio_path: 音频文件路径
+            audio_path: 音频文件路径，或16kHz单声道float32采样数组
             progress_callback: 进度回调函数
             **kwargs: 其他Whisper参数
             
         Returns:
             识别结果字典
         """
-        # 默认参数
-        default_params = {
-            "language": "ja",  # 日语
-            "task": "transcribe",
-            "verbose": False,
-            "temperature": 0,  # 确定性输出
-            "compression_ratio_threshold": 2.4,
-            "logprob_threshold": -1.0,
-            "no_speech_threshold": 0.6,
-            "word_timestamps": True  # 词级时间戳
-        }
-        
         # 合并用户参数
-        params = {**default_params, **kwargs}
+        params = {**self.DEFAULT_PARAMS, **kwargs}
         
         # 如果有进度回调，使用verbose_callback
         if progress_callback:
             params["verbose"] = True
             params["verbose_callback"] = progress_callback
         
-        # 执行识别
-        result = self.model.transcribe(audio_path, **params)
+        return self.backend.transcribe(audio_path, **params)
+    
+    def transcribe_batch(self, audios: List[Union[str, np.ndarray]],
+                         batch_size: int = 8, **kwargs) -> List[Dict]:
+        """批量识别多个片段（由后端一起解码，CPU上能更好地利用BLAS）
         
-        return result
+        Args:
+            audios: 音频文件路径或16kHz单声道float32采样数组的列表
+            batch_size: 每轮解码的窗口数
+            **kwargs: 其他Whisper参数（同transcribe）
+            
+        Returns:
+            与audios一一对应的识别结果，格式同transcribe
+        """
+        params = {**self.DEFAULT_PARAMS, **kwargs}
+        return self.backend.transcribe_batch(audios, batch_size=batch_size, **params)
     
     def transcribe_segments(self, audio_path: str, 
                           segment_length: int = 30) -> List[Dict]:
@@ -79,11 +111,7 @@ class SpeechRecognizer:
             audio_segment = audio[start_sample:end_sample]
             
             # 识别该段
-            result = self.model.transcribe(
-                audio_segment,
-                language="ja",
-                task="transcribe"
-            )
+            result = self.transcribe(audio_segment)
             
             # 调整时间戳
             for segment in result["segments"]:
@@ -100,11 +128,4 @@ class SpeechRecognizer:
         Returns:
             (语言代码, 置信度)
         """
-        audio = whisper.load_audio(audio_path)
-        audio = whisper.pad_or_trim(audio)
-        
-        mel = whisper.log_mel_spectrogram(audio).to(self.device)
-        _, probs = self.model.detect_language(mel)
-        
-        lang = max(probs, key=probs.get)
-        return lang, probs[lang]
\ No newline at end of file
+        return self.backend.detect_language(audio_path)
@@ -1,11 +1,155 @@
 """字幕生成模块 - 生成SRT/VTT格式字幕"""
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Sequence
+import itertools
+import json
 import os
-from datetime import timedelta
+import numpy as np
+
+# ASS字幕的文件头（[Events]之前的部分）
+ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+WrapStyle: 0
+ScaledBorderAndShadow: yes
+PlayResX: 1920
+PlayResY: 1080
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Noto Sans CJK JP,64,&H00FFFFFF,&H000000FF,&H00000000,&H80000000,0,0,0,0,100,100,0,0,1,3,0,2,40,40,40,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+
+def _to_ms(seconds: float) -> int:
+    """秒转换为整数毫秒（四舍五入，负数按0处理）"""
+    return max(0, int(seconds * 1000 + 0.5))
+
+
+def _clock(ms: int, separator: str) -> str:
+    """整数毫秒格式化为 HH:MM:SS<separator>mmm"""
+    hours, ms = divmod(ms, 3600000)
+    minutes, ms = divmod(ms, 60000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{ms:03d}"
+
+
+# 预先格式化的两位/三位数字，批量格式化时查表代替整数格式化
+_DIGITS2 = [f"{i:02d}" for i in range(100)]
+_DIGITS3 = [f"{i:03d}" for i in range(1000)]
+
+
+def _split_ms(seconds: Sequence[float], unit: int = 1):
+    """批量把秒拆分为 (时, 分, 秒, 余数) 列表；unit=1为毫秒，10为厘秒"""
+    ms = np.floor(np.maximum(np.asarray(seconds, dtype=np.float64), 0) * 1000 + 0.5).astype(np.int64)
+    if unit != 1:
+        ms = (ms + unit // 2) // unit
+    per_second = 1000 // unit
+    hours, rest = np.divmod(ms, 3600 * per_second)
+    minutes, rest = np.divmod(rest, 60 * per_second)
+    secs, rest = np.divmod(rest, per_second)
+    return hours.tolist(), minutes.tolist(), secs.tolist(), rest.tolist()
+
+
+def _clocks(seconds: Sequence[float], separator: str) -> List[str]:
+    """批量格式化为 HH:MM:SS<separator>mmm"""
+    d2, d3 = _DIGITS2, _DIGITS3
+    return [f"{h:02d}:{d2[m]}:{d2[s]}{separator}{d3[ms]}"
+            for h, m, s, ms in zip(*_split_ms(seconds))]
+
+
+def _ass_clocks(seconds: Sequence[float]) -> List[str]:
+    """批量格式化为ASS时间 H:MM:SS.cc（厘秒）"""
+    d2 = _DIGITS2
+    return [f"{h:d}:{d2[m]}:{d2[s]}.{d2[cs]}"
+            for h, m, s, cs in zip(*_split_ms(seconds, 10))]
+
+
+# 断句时优先在这些标点之后断开
+_BREAK_PUNCTUATION = tuple("、。，,.!?！？")
+
 
 class SubtitleGenerator:
     def __init__(self):
-        self.supported_formats = ["srt", "vtt", "txt"]
+        # vtt_karaoke: 带词级时间标签的WebVTT（需要词级时间戳）
+        self.supported_formats = ["srt", "vtt", "vtt_karaoke", "txt", "ass", "json"]
+    
+    @staticmethod
+    def file_extension(subtitle_format: str) -> str:
+        """字幕格式对应的文件扩展名"""
+        return 'vtt' if subtitle_format == 'vtt_karaoke' else subtitle_format
+    
+    def render(self, segments: Optional[Sequence[Dict]] = None, subtitle_format: str = 'srt',
+               starts: Optional[Sequence[float]] = None, ends: Optional[Sequence[float]] = None,
+               texts: Optional[Sequence[str]] = None, first_index: int = 1,
+               include_header: bool = True) -> str:
+        """批量渲染字幕为字符串
+        
+        时间戳用整数毫秒运算格式化，所有字幕拼接为一个字符串，调用方只需写入一次。
+        
+        Args:
+            segments: 包含text, start, end的片段列表
+            subtitle_format: srt / vtt / vtt_karaoke / txt / ass / json
+            starts, ends, texts: 列式输入（可替代segments），例如numpy数组
+            first_index: SRT的起始序号
+            include_header: 是否包含文件头（VTT/ASS）
+        """
+        if segments is not None:
+            starts = [segment['start'] for segment in segments]
+            ends = [segment['end'] for segment in segments]
+            texts = [segment['text'] for segment in segments]
+        if subtitle_format == 'vtt_karaoke':
+            if segments is None:
+                raise ValueError("vtt_karaoke需要包含words的片段列表")
+            texts = [self._karaoke_text(segment) for segment in segments]
+            subtitle_format = 'vtt'
+        texts = [text.strip() for text in texts]
+        
+        if subtitle_format == 'json':
+            starts = starts.tolist() if hasattr(starts, 'tolist') else starts
+            ends = ends.tolist() if hasattr(ends, 'tolist') else ends
+            return json.dumps(
+                [{'start': start, 'end': end, 'text': text}
+                 for start, end, text in zip(starts, ends, texts)],
+                ensure_ascii=False, indent=1
+            )
+        
+        if subtitle_format == 'srt':
+            parts = [
+                f"{index}\n{start} --> {end}\n{text}\n\n"
+                for index, start, end, text in zip(itertools.count(first_index),
+                                                   _clocks(starts, ','), _clocks(ends, ','), texts)
+            ]
+        elif subtitle_format == 'vtt':
+            parts = [
+                f"{start} --> {end}\n{text}\n\n"
+                for start, end, text in zip(_clocks(starts, '.'), _clocks(ends, '.'), texts)
+            ]
+        elif subtitle_format == 'ass':
+            parts = [
+                f"Dialogue: 0,{start},{end},Default,,0,0,0,,{text}\n"
+                for start, end, text in zip(_ass_clocks(starts), _ass_clocks(ends),
+                                            (text.replace('\n', '\\N') for text in texts))
+            ]
+        elif subtitle_format == 'txt':
+            parts = [
+                f"[{self._seconds_to_readable_time(start)}] {text}\n"
+                for start, text in zip(starts, texts)
+            ]
+        else:
+            raise ValueError(f"不支持的字幕格式: {subtitle_format}")
+        
+        if include_header:
+            parts.insert(0, self.format_header(subtitle_format))
+        return ''.join(parts)
+    
+    def write(self, segments: Sequence[Dict], output_path: str, subtitle_format: str = 'srt'):
+        """渲染字幕并一次性写入文件"""
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        content = self.render(segments, subtitle_format)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(content)
     
     def generate_srt(self, segments: List[Dict], output_path: str):
         """生成SRT格式字幕
@@ -14,64 +158,111 @@ class SubtitleGenerator:
             segments: 包含text, start, end的片段列表
             output_path: 输出文件路径
         """
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            for i, segment in enumerate(segments, 1):
-                # 序号
-                f.write(f"{i}\n")
-                
-                # 时间戳
-                start_time = self._seconds_to_srt_time(segment['start'])
-                end_time = self._seconds_to_srt_time(segment['end'])
-                f.write(f"{start_time} --> {end_time}\n")
-                
-                # 文本
-                f.write(f"{segment['text'].strip()}\n\n")
+        self.write(segments, output_path, 'srt')
     
     def generate_vtt(self, segments: List[Dict], output_path: str):
         """生成WebVTT格式字幕"""
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write("WEBVTT\n\n")
-            
-            for segment in segments:
-                start_time = self._seconds_to_vtt_time(segment['start'])
-                end_time = self._seconds_to_vtt_time(segment['end'])
-                f.write(f"{start_time} --> {end_time}\n")
-                f.write(f"{segment['text'].strip()}\n\n")
+        self.write(segments, output_path, 'vtt')
+    
+    def generate_ass(self, segments: List[Dict], output_path: str):
+        """生成ASS格式字幕"""
+        self.write(segments, output_path, 'ass')
+    
+    def generate_json(self, segments: List[Dict], output_path: str):
+        """生成JSON格式字幕（[{start, end, text}, ...]）"""
+        self.write(segments, output_path, 'json')
     
     def generate_txt(self, segments: List[Dict], output_path: str, 
                     include_timestamps: bool = True):
         """生成纯文本格式"""
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        if include_timestamps:
+            self.write(segments, output_path, 'txt')
+            return
         
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
         with open(output_path, 'w', encoding='utf-8') as f:
-            for segment in segments:
-                if include_timestamps:
-                    timestamp = self._seconds_to_readable_time(segment['start'])
-                    f.write(f"[{timestamp}] {segment['text'].strip()}\n")
-                else:
-                    f.write(f"{segment['text'].strip()}\n")
+            f.write(''.join(f"{segment['text'].strip()}\n" for segment in segments))
+    
+    def resegment(self, segments: List[Dict], max_chars: int = 42,
+                  max_duration: float = 7.0) -> List[Dict]:
+        """按行长把过长的片段在词边界处拆开
+        
+        只处理带词级时间戳（words）的片段，拆分后的时间取各部分首尾词的时间。
+        拆分点优先选在标点之后（不早于当前行的一半）。
+        
+        Args:
+            segments: 片段列表
+            max_chars: 每条字幕的最大字符数
+            max_duration: 每条字幕的最大时长（秒）
+        """
+        def too_long(words: List[Dict]) -> bool:
+            text = "".join(word['word'] for word in words).strip()
+            return (len(text) > max_chars
+                    or words[-1]['end'] - words[0]['start'] > max_duration)
+        
+        result = []
+        for segment in segments:
+            words = segment.get('words')
+            if not words or not too_long(words):
+                result.append(segment)
+                continue
+            
+            line: List[Dict] = []
+            for word in words:
+                if line and too_long(line + [word]):
+                    cut = len(line)
+                    for index in range(len(line) - 1, len(line) // 2 - 1, -1):
+                        if line[index]['word'].strip().endswith(_BREAK_PUNCTUATION):
+                            cut = index + 1
+                            break
+                    result.append(self._line_segment(segment, line[:cut]))
+                    line = line[cut:]
+                line.append(word)
+            if line:
+                result.append(self._line_segment(segment, line))
+        
+        return result
+    
+    def _line_segment(self, segment: Dict, words: List[Dict]) -> Dict:
+        """由片段的一部分词组成新片段（其余字段沿用原片段）"""
+        line = dict(segment)
+        line.update({
+            'start': words[0]['start'],
+            'end': words[-1]['end'],
+            'text': "".join(word['word'] for word in words).strip(),
+            'words': words
+        })
+        return line
+    
+    def _karaoke_text(self, segment: Dict) -> str:
+        """WebVTT卡拉OK文本：第二个词起，每个词前加 <时间> 标签"""
+        words = segment.get('words')
+        if not words:
+            return segment['text']
+        parts = [words[0]['word'].lstrip()]
+        clocks = _clocks([word['start'] for word in words[1:]], '.')
+        parts.extend(f"<{clock}>{word['word']}" for clock, word in zip(clocks, words[1:]))
+        return "".join(parts)
+    
+    def format_header(self, subtitle_format: str) -> str:
+        """字幕文件头"""
+        if subtitle_format in ('vtt', 'vtt_karaoke'):
+            return "WEBVTT\n\n"
+        if subtitle_format == 'ass':
+            return ASS_HEADER
+        return ""
+    
+    def format_segment(self, subtitle_format: str, index: int, segment: Dict) -> str:
+        """格式化单条字幕（index从1开始，仅SRT使用），与generate_*的输出一致"""
+        return self.render([segment], subtitle_format, first_index=index, include_header=False)
     
     def _seconds_to_srt_time(self, seconds: float) -> str:
         """转换为SRT时间格式 (00:00:00,000)"""
-        td = timedelta(seconds=seconds)
-        hours = int(td.total_seconds() // 3600)
-        minutes = int((td.total_seconds() % 3600) // 60)
-        seconds = td.total_seconds() % 60
-        
-        return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}".replace('.', ',')
+        return _clock(_to_ms(seconds), ',')
     
     def _seconds_to_vtt_time(self, seconds: float) -> str:
         """转换为VTT时间格式 (00:00:00.000)"""
-        td = timedelta(seconds=seconds)
-        hours = int(td.total_seconds() // 3600)
-        minutes = int((td.total_seconds() % 3600) // 60)
-        seconds = td.total_seconds() % 60
-        
-        return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}"
+        return _clock(_to_ms(seconds), '.')
     
     def _seconds_to_readable_time(self, seconds: float) -> str:
         """转换为可读时间格式"""
@@ -106,4 +297,103 @@ class SubtitleGenerator:
         if buffer is not None:
             merged.append(buffer)
         
-        return merged
\ No newline at end of file
+        return merged
+
+
+class StreamingSubtitleWriter:
+    """增量写入字幕文件
+    
+    支持 srt / vtt / vtt_karaoke / txt / ass（JSON是一个整体数组，不能增量写入）。
+    片段可能乱序完成（并行识别），写入器只缓存尚未轮到的片段：
+    序号连续的片段到齐后立即按时间顺序写入 ``<output_path>.part`` 并刷新，
+    ``committed_size`` 记录最后一条完整字幕的结尾，读取该长度以内的内容
+    总是合法的字幕文件。finish() 时原子重命名为最终文件。
+    """
+    
+    FORMATS = ('srt', 'vtt', 'vtt_karaoke', 'txt', 'ass')
+    
+    def __init__(self, output_path: str, subtitle_format: str = 'srt',
+                 generator: Optional[SubtitleGenerator] = None):
+        """
+        Args:
+            output_path: 最终字幕文件路径
+            subtitle_format: srt / vtt / txt
+            generator: 用于格式化字幕的生成器
+        """
+        if subtitle_format not in self.FORMATS:
+            raise ValueError(f"不支持增量写入的字幕格式: {subtitle_format}")
+        self.output_path = output_path
+        self.part_path = output_path + '.part'
+        self.subtitle_format = subtitle_format
+        self.generator = generator or SubtitleGenerator()
+        
+        self._pending: Dict[int, List[Dict]] = {}  # 尚未轮到的片段
+        self._next_chunk = 0  # 下一个要写入的片段序号
+        self._count = 0  # 已写入的字幕条数
+        
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        self._file = open(self.part_path, 'wb')
+        self._write(self.generator.format_header(subtitle_format))
+    
+    @property
+    def committed_size(self) -> int:
+        """已完整写入的字节数"""
+        return self._committed
+    
+    @property
+    def segments_written(self) -> int:
+        return self._count
+    
+    def write_segments(self, segments: List[Dict]):
+        """直接写入字幕（例如开始时间之前的已有字幕）"""
+        if not segments:
+            return
+        self._write(self.generator.render(
+            segments, self.subtitle_format,
+            first_index=self._count + 1, include_header=False
+        ))
+        self._count += len(segments)
+    
+    def add_chunk(self, chunk_index: int, segments: List[Dict]):
+        """提交一个片段的字幕；到齐的连续片段立即写入"""
+        self._pending[chunk_index] = segments
+        while self._next_chunk in self._pending:
+            ready = self._pending.pop(self._next_chunk)
+            self.write_segments(sorted(ready, key=lambda seg: seg['start']))
+            self._next_chunk += 1
+    
+    def read_committed(self) -> bytes:
+        """读取已完整写入的部分（可在其他线程中调用；完成后读取最终文件）"""
+        return read_partial_subtitle(self.part_path, self.output_path, self._committed)
+    
+    def finish(self) -> str:
+        """写入剩余片段并原子替换为最终文件，返回文件路径"""
+        for chunk_index in sorted(self._pending):
+            self.write_segments(sorted(self._pending[chunk_index], key=lambda seg: seg['start']))
+        self._pending.clear()
+        self._file.close()
+        os.replace(self.part_path, self.output_path)
+        return self.output_path
+    
+    def abort(self):
+        """放弃写入并删除临时文件"""
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
+    
+    def _write(self, text: str):
+        if text:
+            self._file.write(text.encode('utf-8'))
+            self._file.flush()
+        self._committed = self._file.tell()
+
+
+def read_partial_subtitle(part_path: str, output_path: str, size: int) -> bytes:
+    """读取增量写入中的字幕文件的前size字节；已完成时返回最终文件"""
+    try:
+        with open(part_path, 'rb') as f:
+            return f.read(size)
+    except FileNotFoundError:
+        with open(output_path, 'rb') as f:
+            return f.read()
@@ -0,0 +1,139 @@
+"""字幕合并模块 - 把新识别的字幕与已有字幕合并"""
+import bisect
+from typing import Dict, List, Tuple
+
+
+def _sorted(segments: List[Dict]) -> List[Dict]:
+    return sorted(segments, key=lambda seg: (seg['start'], seg['end']))
+
+
+def _overlaps_any(segment: Dict, starts: List[float], max_ends: List[float]) -> bool:
+    """segment是否与任一区间重叠
+
+    starts为按开始时间排序的区间起点，max_ends[i]为前i+1个区间终点的最大值。
+    开始时间早于segment结束的区间中，只要最大终点晚于segment开始即重叠。
+    """
+    count = bisect.bisect_left(starts, segment['end'])
+    return count > 0 and max_ends[count - 1] > segment['start']
+
+
+def _prefix_max_ends(segments: List[Dict]) -> List[float]:
+    max_ends = []
+    current = float('-inf')
+    for seg in segments:
+        current = max(current, seg['end'])
+        max_ends.append(current)
+    return max_ends
+
+
+def _union(segments: List[Dict]) -> List[Tuple[float, float]]:
+    """已排序字幕覆盖的时间范围（合并为互不重叠的区间）"""
+    ranges: List[Tuple[float, float]] = []
+    for seg in segments:
+        if ranges and seg['start'] <= ranges[-1][1]:
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], seg['end']))
+        else:
+            ranges.append((seg['start'], seg['end']))
+    return ranges
+
+
+class SubtitleMerger:
+    """按策略合并已有字幕和新识别的字幕
+
+    两条字幕在 a.start < b.end 且 b.start < a.end 时视为重叠（包括一条完全
+    包含另一条的情况），首尾相接不算重叠。先排序再用二分查找判断重叠，
+    总复杂度为 O((n + m) log(n + m))。
+
+    策略：
+        - prefer_new: 保留全部新字幕，丢弃与其重叠的已有字幕
+        - prefer_existing: 保留全部已有字幕，丢弃与其重叠的新字幕
+        - split: 保留全部新字幕，已有字幕只保留未被新字幕覆盖的时间段，
+          文本按时长比例截取
+    """
+
+    POLICIES = ('prefer_new', 'prefer_existing', 'split')
+
+    def __init__(self, policy: str = 'prefer_new', min_duration: float = 0.3):
+        """
+        Args:
+            policy: 合并策略
+            min_duration: split策略下，短于此时长（秒）的剩余片段丢弃
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"不支持的合并策略: {policy}")
+        self.policy = policy
+        self.min_duration = min_duration
+
+    def merge(self, existing: List[Dict], new: List[Dict]) -> List[Dict]:
+        """合并字幕
+
+        Args:
+            existing: 已有字幕
+            new: 新识别的字幕
+
+        Returns:
+            按开始时间排序的合并结果
+        """
+        existing = _sorted(existing)
+        new = _sorted(new)
+
+        if self.policy == 'prefer_existing':
+            kept = self._drop_overlapping(new, existing)
+            merged = existing + kept
+        elif self.policy == 'split':
+            merged = new + self._split(existing, new)
+        else:
+            merged = new + self._drop_overlapping(existing, new)
+
+        merged.sort(key=lambda seg: seg['start'])
+        return merged
+
+    def _drop_overlapping(self, candidates: List[Dict], winners: List[Dict]) -> List[Dict]:
+        """去掉与winners中任一字幕重叠的候选字幕"""
+        if not winners:
+            return list(candidates)
+        starts = [seg['start'] for seg in winners]
+        max_ends = _prefix_max_ends(winners)
+        return [seg for seg in candidates if not _overlaps_any(seg, starts, max_ends)]
+
+    def _split(self, existing: List[Dict], new: List[Dict]) -> List[Dict]:
+        """已有字幕减去新字幕覆盖的时间段"""
+        covered = _union(new)
+        covered_ends = [end for _, end in covered]
+        pieces = []
+
+        for seg in existing:
+            # 第一个终点晚于该字幕开始的覆盖区间
+            index = bisect.bisect_right(covered_ends, seg['start'])
+            if index == len(covered) or covered[index][0] >= seg['end']:
+                pieces.append(seg)
+                continue
+
+            cursor = seg['start']
+            while index < len(covered) and covered[index][0] < seg['end']:
+                cover_start, cover_end = covered[index]
+                if cover_start > cursor:
+                    pieces.extend(self._piece(seg, cursor, cover_start))
+                cursor = max(cursor, cover_end)
+                index += 1
+            if cursor < seg['end']:
+                pieces.extend(self._piece(seg, cursor, seg['end']))
+
+        return pieces
+
+    def _piece(self, seg: Dict, start: float, end: float) -> List[Dict]:
+        """截取字幕的 [start, end) 时间段，文本按时长比例截取"""
+        if end - start < self.min_duration:
+            return []
+        text = seg['text']
+        duration = seg['end'] - seg['start']
+        if duration <= 0:
+            return []
+        first = round(len(text) * (start - seg['start']) / duration)
+        last = round(len(text) * (end - seg['start']) / duration)
+        piece_text = text[first:last].strip()
+        if not piece_text:
+            return []
+        piece = dict(seg)
+        piece.update({'start': start, 'end': end, 'text': piece_text})
+        return [piece]
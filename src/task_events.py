@@ -0,0 +1,89 @@
+"""任务事件流 - 向前端推送进度和新字幕的增量"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+Event = Tuple[int, str, Dict]  # (事件ID, 事件类型, 数据)
+
+
+class TaskEventStream:
+    """单个任务的事件流
+
+    事件只追加不修改，事件ID从1开始递增。订阅者记住最后收到的ID，
+    每次只读取之后的事件，推送成本只与新增内容有关。
+    """
+
+    def __init__(self):
+        self._events: List[Event] = []
+        self._cond = threading.Condition()
+        self.closed = False
+
+    def publish(self, event_type: str, data: Dict) -> int:
+        """追加事件，返回事件ID（事件流结束后忽略，返回0）"""
+        with self._cond:
+            if self.closed:
+                return 0
+            event_id = len(self._events) + 1
+            self._events.append((event_id, event_type, data))
+            self._cond.notify_all()
+            return event_id
+
+    def close(self, event_type: Optional[str] = None, data: Optional[Dict] = None):
+        """结束事件流（可附带最后一个事件），订阅者读完剩余事件后退出"""
+        with self._cond:
+            if self.closed:
+                return
+            if event_type is not None:
+                self._events.append((len(self._events) + 1, event_type, data or {}))
+            self.closed = True
+            self._cond.notify_all()
+
+    def read_since(self, cursor: int, timeout: Optional[float] = None) -> Tuple[List[Event], bool]:
+        """读取ID大于cursor的事件，没有新事件时最多等待timeout秒
+
+        Returns:
+            (事件列表, 事件流是否已结束)
+        """
+        with self._cond:
+            if cursor >= len(self._events) and not self.closed:
+                self._cond.wait(timeout)
+            return self._events[cursor:], self.closed
+
+
+class TaskEventHub:
+    """按任务ID管理事件流"""
+
+    def __init__(self):
+        self._streams: Dict[str, TaskEventStream] = {}
+        self._lock = threading.Lock()
+
+    def get(self, task_id: str) -> TaskEventStream:
+        """获取任务的事件流（不存在时创建）"""
+        with self._lock:
+            stream = self._streams.get(task_id)
+            if stream is None:
+                stream = self._streams[task_id] = TaskEventStream()
+            return stream
+
+    def __contains__(self, task_id: str) -> bool:
+        with self._lock:
+            return task_id in self._streams
+
+    def publish(self, task_id: str, event_type: str, data: Dict) -> int:
+        return self.get(task_id).publish(event_type, data)
+
+    def close(self, task_id: str, event_type: Optional[str] = None, data: Optional[Dict] = None):
+        self.get(task_id).close(event_type, data)
+
+    def remove(self, task_id: str):
+        """删除事件流（仍在等待的订阅者会收到结束信号）"""
+        with self._lock:
+            stream = self._streams.pop(task_id, None)
+        if stream is not None:
+            stream.close()
+
+    def clear(self):
+        with self._lock:
+            streams = list(self._streams.values())
+            self._streams.clear()
+        for stream in streams:
+            stream.close()
@@ -0,0 +1,195 @@
+"""任务状态存储 - SQLite持久化 + 内存LRU，已结束的任务按TTL过期"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from .json_util import to_builtin
+
+logger = logging.getLogger(__name__)
+
+# 仍在进行中的状态，不会被淘汰或过期
+ACTIVE_STATUSES = ('queued', 'processing', 'paused')
+
+
+class TaskStore:
+    """任务状态存储
+
+    每个任务的状态是一个小字典（进度、状态信息、结果摘要），每次更新都写入
+    SQLite，服务重启后仍可查询。内存中只保留最近使用的任务：进行中的任务
+    常驻，已结束的任务超过 ``max_cached`` 个时按最近使用顺序淘汰，
+    之后再查询时从SQLite重新读取。
+
+    完整字幕等大数据不放在状态中，而是另存为 ``segments_dir/<任务ID>.json``，
+    只在预览时读取。已结束的任务超过 ``ttl_seconds`` 后连同字幕文件一起删除。
+    """
+
+    def __init__(self, db_path: str, segments_dir: str, max_cached: int = 100,
+                 ttl_seconds: float = 3 * 24 * 3600,
+                 on_evict: Optional[Callable[[str], None]] = None):
+        """
+        Args:
+            db_path: SQLite数据库文件
+            segments_dir: 字幕文件目录
+            max_cached: 内存中保留的已结束任务数
+            ttl_seconds: 已结束任务的保留时间（秒），0表示不过期
+            on_evict: 任务移出内存时的回调（释放该任务的字幕日志、事件流等）
+        """
+        self.segments_dir = segments_dir
+        self.max_cached = max_cached
+        self.ttl_seconds = ttl_seconds
+        self.on_evict = on_evict
+        self._cache: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._lock = threading.RLock()
+        self._last_expire = 0.0
+
+        os.makedirs(segments_dir, exist_ok=True)
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS tasks ('
+            ' task_id TEXT PRIMARY KEY,'
+            ' status TEXT NOT NULL,'
+            ' state TEXT NOT NULL,'
+            ' updated_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, updated_at)')
+        self._conn.commit()
+
+    def __contains__(self, task_id: str) -> bool:
+        return self.get(task_id) is not None
+
+    def create(self, task_id: str, state: Dict):
+        """创建（或覆盖）任务"""
+        with self._lock:
+            self._cache.pop(task_id, None)
+            self._save(task_id, dict(state))
+        self.expire()
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        """任务状态的副本（不存在时返回None），修改请使用update"""
+        with self._lock:
+            state = self._load(task_id)
+            return dict(state) if state is not None else None
+
+    def update(self, task_id: str, changes: Dict):
+        """合并更新任务状态并写入数据库"""
+        with self._lock:
+            state = self._load(task_id)
+            if state is None:
+                raise KeyError(task_id)
+            state.update(changes)
+            self._save(task_id, state)
+
+    def delete(self, task_id: str):
+        """删除任务和字幕文件"""
+        with self._lock:
+            self._cache.pop(task_id, None)
+            self._conn.execute('DELETE FROM tasks WHERE task_id = ?', (task_id,))
+            self._conn.commit()
+        self._remove_segments(task_id)
+        self._evicted(task_id)
+
+    def save_segments(self, task_id: str, segments: List[Dict]):
+        """保存任务的完整字幕（先写临时文件再原子替换）"""
+        path = self._segments_path(task_id)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(segments, f, ensure_ascii=False, default=to_builtin)
+        os.replace(temp_path, path)
+
+    def load_segments(self, task_id: str) -> List[Dict]:
+        """读取任务的完整字幕（没有时返回空列表）"""
+        try:
+            with open(self._segments_path(task_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return []
+
+    def mark_interrupted(self, message: str) -> List[str]:
+        """服务启动时把上次未结束的任务标记为出错（执行它们的进程已不存在）"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT task_id, state FROM tasks WHERE status IN (?, ?, ?)', ACTIVE_STATUSES
+            ).fetchall()
+            for task_id, state in rows:
+                state = json.loads(state)
+                state.update({'status': 'error', 'error': message})
+                self._save(task_id, state, cache=False)
+        return [task_id for task_id, _ in rows]
+
+    def expire(self, now: Optional[float] = None):
+        """删除超过保留时间的已结束任务（每分钟最多执行一次）"""
+        now = now or time.time()
+        if not self.ttl_seconds or now - self._last_expire < 60:
+            return
+        self._last_expire = now
+        with self._lock:
+            expired = [row[0] for row in self._conn.execute(
+                'SELECT task_id FROM tasks WHERE status NOT IN (?, ?, ?) AND updated_at < ?',
+                (*ACTIVE_STATUSES, now - self.ttl_seconds)
+            )]
+        for task_id in expired:
+            self.delete(task_id)
+        if expired:
+            logger.info(f"删除过期任务: {len(expired)} 个")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _load(self, task_id: str) -> Optional[Dict]:
+        """从内存或数据库读取任务状态（需持有锁）"""
+        state = self._cache.get(task_id)
+        if state is not None:
+            self._cache.move_to_end(task_id)
+            return state
+        row = self._conn.execute('SELECT state FROM tasks WHERE task_id = ?', (task_id,)).fetchone()
+        if row is None:
+            return None
+        state = json.loads(row[0])
+        self._cache[task_id] = state
+        self._evict()
+        return state
+
+    def _save(self, task_id: str, state: Dict, cache: bool = True):
+        """写入数据库并放入内存（需持有锁）"""
+        self._conn.execute(
+            'INSERT OR REPLACE INTO tasks (task_id, status, state, updated_at) VALUES (?, ?, ?, ?)',
+            (task_id, state.get('status', ''), json.dumps(state, ensure_ascii=False, default=to_builtin),
+             time.time())
+        )
+        self._conn.commit()
+        if cache:
+            self._cache[task_id] = state
+            self._cache.move_to_end(task_id)
+            self._evict()
+
+    def _evict(self):
+        """已结束的任务超过上限时，按最近使用顺序移出内存（需持有锁）"""
+        finished = [task_id for task_id, state in self._cache.items()
+                    if state.get('status') not in ACTIVE_STATUSES]
+        for task_id in finished[:max(0, len(finished) - self.max_cached)]:
+            del self._cache[task_id]
+            self._evicted(task_id)
+
+    def _evicted(self, task_id: str):
+        if self.on_evict is not None:
+            self.on_evict(task_id)
+
+    def _segments_path(self, task_id: str) -> str:
+        return os.path.join(self.segments_dir, f"{task_id}.json")
+
+    def _remove_segments(self, task_id: str):
+        try:
+            os.remove(self._segments_path(task_id))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,254 @@
+"""术语匹配自动机 - 基于Aho-Corasick的多模式单次扫描匹配"""
+from typing import Dict, List, Optional, Tuple
+from collections import deque
+import threading
+
+
+def _is_word_char(ch: str) -> bool:
+    """判断是否为单词字符（与正则表达式中Unicode模式的 \\w 一致）"""
+    return ch.isalnum() or ch == '_'
+
+
+# Trie节点中保存术语本身的键（字符键长度均为1，不会与之冲突）
+_WORD = ''
+
+
+class _Compiled:
+    """编译后的Aho-Corasick状态表（构建完成后只读）"""
+
+    def __init__(self, words: List[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[Optional[str]] = [None]  # 在该节点结束的术语
+        self.dict_link: List[int] = [0]  # 失败链上最近的输出节点
+        for word in words:
+            self._insert(word)
+        self._link()
+
+    def _insert(self, word: str):
+        node = 0
+        for ch in word:
+            next_node = self.goto[node].get(ch)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(None)
+                self.dict_link.append(0)
+                self.goto[node][ch] = next_node
+            node = next_node
+        self.output[node] = word
+
+    def _link(self):
+        """广度优先计算失败指针和输出链接"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                fail = self.fail[node]
+                while fail and ch not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[child] = self.goto[fail].get(ch, 0)
+                target = self.fail[child]
+                self.dict_link[child] = (
+                    target if self.output[target] else self.dict_link[target]
+                )
+                queue.append(child)
+
+
+class TermAutomaton:
+    """多模式匹配自动机
+
+    一次构建后，对每段文本只需扫描一遍即可找出所有术语出现位置。
+    匹配规则与原先的 ``\\b术语\\b`` 正则一致：术语两端必须是单词边界。
+
+    支持增量更新：新术语先放入一个小的增量Trie，删除的术语只做标记，
+    更新只改映射值，每次操作都是O(术语长度)。增量部分累积到一定比例后，
+    在下一次匹配时才整体重建，重建开销按操作次数均摊。
+    """
+
+    # 增量部分超过 max(REBUILD_MIN, 已编译术语数 * REBUILD_RATIO) 时重建
+    REBUILD_MIN = 64
+    REBUILD_RATIO = 0.25
+
+    def __init__(self, terms: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            terms: 原词到正确词的映射，按插入顺序决定同长度术语的优先级
+        """
+        self._lock = threading.Lock()  # 只保护更新与重建，扫描无需加锁
+        self.build(terms or {})
+
+    def build(self, terms: Dict[str, str]):
+        """根据术语映射重新构建自动机"""
+        with self._lock:
+            self._build(terms)
+
+    def _build(self, terms: Dict[str, str]):
+        self._values: Dict[str, str] = {}
+        self._order: Dict[str, int] = {}
+        self._next_order = 0
+        for original, correct in terms.items():
+            if original:
+                self._values[original] = correct
+                self._order[original] = self._next_order
+                self._next_order += 1
+        self._rebuild()
+
+    def _rebuild(self):
+        """将所有有效术语重新编译为自动机，清空增量部分"""
+        self._compiled = _Compiled(list(self._values))
+        self._compiled_words = set(self._values)
+        self._pending: Dict = {}  # 尚未编译的新术语（嵌套字典Trie）
+        self._pending_count = 0
+        self._dead_count = 0  # 已编译但已删除的术语数
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, original: str) -> bool:
+        return original in self._values
+
+    def get(self, original: str) -> Optional[str]:
+        """获取术语对应的正确词"""
+        return self._values.get(original)
+
+    def rank(self, original: str) -> Tuple[int, int]:
+        """术语的修正优先级：长词优先，同长度按插入顺序"""
+        return (-len(original), self._order.get(original, 0))
+
+    def insert(self, original: str, correct: str):
+        """插入或更新术语，O(术语长度)"""
+        if not original:
+            return
+        with self._lock:
+            self._insert(original, correct)
+
+    def _insert(self, original: str, correct: str):
+        if original in self._values:
+            self._values[original] = correct
+            return
+
+        self._values[original] = correct
+        self._order[original] = self._next_order
+        self._next_order += 1
+
+        if original in self._compiled_words:
+            # 之前删除过的已编译术语，恢复即可
+            self._dead_count -= 1
+            return
+
+        node = self._pending
+        for ch in original:
+            node = node.setdefault(ch, {})
+        node[_WORD] = original
+        self._pending_count += 1
+
+    def delete(self, original: str):
+        """删除术语，O(术语长度)"""
+        with self._lock:
+            self._delete(original)
+
+    def _delete(self, original: str):
+        if original not in self._values:
+            return
+        del self._values[original]
+        del self._order[original]
+
+        if original in self._compiled_words:
+            self._dead_count += 1
+            return
+
+        # 从增量Trie中删除，并剪掉空分支
+        path = []
+        node = self._pending
+        for ch in original:
+            path.append((node, ch))
+            node = node.get(ch)
+            if node is None:
+                return
+        if node.pop(_WORD, None) is None:
+            return
+        self._pending_count -= 1
+        for parent, ch in reversed(path):
+            if parent[ch]:
+                break
+            del parent[ch]
+
+    def _maybe_rebuild(self):
+        """增量部分过大时整体重建"""
+        threshold = max(self.REBUILD_MIN,
+                        int(len(self._compiled_words) * self.REBUILD_RATIO))
+        if self._pending_count + self._dead_count > threshold:
+            with self._lock:
+                self._rebuild()
+
+    def find_matches(self, text: str) -> List[Tuple[int, int, str]]:
+        """扫描文本，返回不重叠的匹配 (start, end, 原词)
+
+        采用最左最长原则：起点靠前的优先，同一起点取最长的术语。
+        """
+        if not text or not self._values:
+            return []
+
+        self._maybe_rebuild()
+
+        word_flags = [_is_word_char(ch) for ch in text]
+        length = len(text)
+
+        def at_boundary(pos: int) -> bool:
+            before = pos > 0 and word_flags[pos - 1]
+            after = pos < length and word_flags[pos]
+            return before != after
+
+        compiled = self._compiled
+        goto = compiled.goto
+        fail = compiled.fail
+        output = compiled.output
+        dict_link = compiled.dict_link
+        values = self._values
+
+        candidates = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            node = state if output[state] else dict_link[state]
+            while node:
+                word = output[node]
+                start = i + 1 - len(word)
+                if word in values and at_boundary(start) and at_boundary(i + 1):
+                    candidates.append((start, i + 1, word))
+                node = dict_link[node]
+
+        # 增量Trie较小，只需从单词边界处向后查找
+        pending = self._pending
+        if pending:
+            for start in range(length):
+                if not at_boundary(start):
+                    continue
+                node = pending
+                pos = start
+                while pos < length:
+                    node = node.get(text[pos])
+                    if node is None:
+                        break
+                    pos += 1
+                    word = node.get(_WORD)
+                    if word is not None and at_boundary(pos):
+                        candidates.append((start, pos, word))
+
+        if not candidates:
+            return []
+
+        # 最左最长，去除重叠
+        candidates.sort(key=lambda m: (m[0], -m[1]))
+        matches = []
+        last_end = 0
+        for start, end, word in candidates:
+            if start >= last_end:
+                matches.append((start, end, word))
+                last_end = end
+        return matches
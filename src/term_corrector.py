@@ -1,68 +1,154 @@
 """术语修正模块 - 基于术语库进行文本修正"""
-from typing import List, Tuple, Dict
-import re
+import bisect
+from typing import List, Tuple, Dict, Optional
 from pygtrie import StringTrie
 from .term_manager import TermManager
+from .term_automaton import TermAutomaton
+from .term_index import TermIndex
 
 class TermCorrector:
     def __init__(self, term_manager: TermManager):
         self.term_manager = term_manager
-        self._build_trie()
+        # 订阅术语索引，之后的增删改都以增量方式应用
+        snapshot, self.index_version = term_manager.index.subscribe(self._on_term_change)
+        self._build_trie(snapshot)
         
-    def _build_trie(self):
-        """构建Trie树以提高匹配效率"""
+    def _build_trie(self, terms: Optional[Dict[str, str]] = None):
+        """构建Trie树（用于建议）和匹配自动机（用于修正）
+        
+        Args:
+            terms: 原词到正确词的映射，默认取术语库当前内容
+        """
+        if terms is None:
+            terms = {original: info["correct"]
+                     for original, info in self.term_manager.get_all_terms().items()}
         self.trie = StringTrie()
-        terms = self.term_manager.get_all_terms()
-        for original, info in terms.items():
-            self.trie[original] = info["correct"]
+        for original, correct in terms.items():
+            self.trie[original] = correct
+        self.automaton = TermAutomaton(terms)
     
-    def correct_text(self, text: str, record_corrections: bool = True) -> Tuple[str, List[Dict]]:
-        """修正文本中的术语
+    def _on_term_change(self, version: int, op: str, original: str,
+                        correct: Optional[str]):
+        """应用术语索引推送的单条变化，O(术语长度)"""
+        if op == TermIndex.DELETE:
+            self.trie.pop(original, None)
+            self.automaton.delete(original)
+        else:
+            self.trie[original] = correct
+            self.automaton.insert(original, correct)
+        self.index_version = version
+    
+    def correct_text(self, text: str) -> Tuple[str, List[Dict]]:
+        """修正文本中的术语（只读取术语库；匹配到的术语都已在库中，不产生新的记录）
         
         Args:
             text: 待修正的文本
-            record_corrections: 是否记录修正（用于学习）
             
         Returns:
             (修正后的文本, 修正记录列表)
         """
+        # 单次扫描找出所有术语（最左最长、全词匹配）
+        matches = self.automaton.find_matches(text)
+        if not matches:
+            return text, []
+        
+        # 按术语分组，并按"长词优先"的修正顺序排列
+        groups: Dict[str, List[Tuple[int, int]]] = {}
+        for start, end, original in matches:
+            groups.setdefault(original, []).append((start, end))
+        ordered_terms = sorted(groups, key=self.automaton.rank)
+        
+        # 位置与逐个术语替换时一致：即在更长术语替换后的文本中的位置
         corrections = []
-        corrected_text = text
+        applied: List[Tuple[int, int]] = []  # (原文位置, 长度变化)
+        for original in ordered_terms:
+            correct = self.automaton.get(original)
+            positions = []
+            for start, end in groups[original]:
+                shift = sum(delta for pos, delta in applied if pos < start)
+                positions.append((start + shift, end + shift))
+            
+            corrections.append({
+                "original": original,
+                "correct": correct,
+                "position": positions
+            })
+            
+            delta = len(correct) - len(original)
+            applied.extend((start, delta) for start, _ in groups[original])
+        
+        # 一次性拼接修正后的文本
+        pieces = []
+        last_end = 0
+        for start, end, original in matches:
+            pieces.append(text[last_end:start])
+            pieces.append(self.automaton.get(original))
+            last_end = end
+        pieces.append(text[last_end:])
+        corrected_text = "".join(pieces)
+        
+        return corrected_text, corrections
+    
+    def correct_words(self, words: List[Dict]) -> List[Dict]:
+        """修正词级时间戳中的术语（不记录修正，片段文本已由correct_text记录）
         
-        # 使用词边界进行匹配，避免部分匹配
-        terms = self.term_manager.get_all_terms()
+        在拼接后的文本上匹配，术语跨越多个词时合并为一个词，
+        时间取首尾两个词的范围。
         
-        # 按长度降序排序，优先匹配长词
-        sorted_terms = sorted(terms.keys(), key=len, reverse=True)
+        Args:
+            words: Whisper的词列表，每个包含 word, start, end
+            
+        Returns:
+            修正后的词列表（未修改的词原样保留）
+        """
+        offsets = []
+        position = 0
+        for word in words:
+            offsets.append(position)
+            position += len(word['word'])
+        
+        text = "".join(word['word'] for word in words)
+        matches = self.automaton.find_matches(text)
+        if not matches:
+            return words
+        
+        # 把匹配涉及的词范围合并为互不重叠的组 [首词, 末词, 匹配列表]
+        groups = []
+        for start, end, original in matches:
+            first = bisect.bisect_right(offsets, start) - 1
+            last = bisect.bisect_left(offsets, end) - 1
+            if groups and first <= groups[-1][1]:
+                groups[-1][1] = max(groups[-1][1], last)
+                groups[-1][2].append((start, end, original))
+            else:
+                groups.append([first, last, [(start, end, original)]])
         
-        for original in sorted_terms:
-            term_info = terms[original]
-            correct = term_info["correct"]
+        corrected = []
+        next_word = 0
+        for first, last, group_matches in groups:
+            corrected.extend(words[next_word:first])
+            base = offsets[first]
+            merged_text = "".join(word['word'] for word in words[first:last + 1])
             
-            # 使用正则表达式进行全词匹配
-            pattern = r'\b' + re.escape(original) + r'\b'
+            pieces = []
+            cursor = 0
+            for start, end, original in group_matches:
+                pieces.append(merged_text[cursor:start - base])
+                pieces.append(self.automaton.get(original))
+                cursor = end - base
+            pieces.append(merged_text[cursor:])
             
-            if re.search(pattern, corrected_text):
-                # 记录修正
-                corrections.append({
-                    "original": original,
-                    "correct": correct,
-                    "position": [(m.start(), m.end()) 
-                               for m in re.finditer(pattern, corrected_text)]
-                })
-                
-                # 执行替换
-                corrected_text = re.sub(pattern, correct, corrected_text)
-                
-                # 如果需要记录，且这是新的修正
-                if record_corrections and original not in terms:
-                    self.term_manager.add_correction(
-                        original, correct, 
-                        context=text[:50],  # 保存部分上下文
-                        confidence=0.8
-                    )
+            merged = dict(words[first])
+            merged['word'] = "".join(pieces)
+            merged['end'] = words[last]['end']
+            if 'probability' in merged:
+                merged['probability'] = min(word.get('probability', 1.0)
+                                            for word in words[first:last + 1])
+            corrected.append(merged)
+            next_word = last + 1
+        corrected.extend(words[next_word:])
         
-        return corrected_text, corrections
+        return corrected
     
     def suggest_corrections(self, text: str, threshold: float = 0.7) -> List[Dict]:
         """建议可能的修正（不直接修改）"""
@@ -0,0 +1,97 @@
+"""术语索引模块 - 版本化、可增量订阅的术语映射"""
+from typing import Callable, Dict, List, Optional, Tuple
+import threading
+import weakref
+
+# 订阅回调: callback(version, op, original, correct)
+TermListener = Callable[[int, str, str, Optional[str]], None]
+
+
+class TermIndex:
+    """版本化的术语索引
+
+    由TermManager持有，只保存"原词 -> 正确词"的映射。每次变化都会使
+    版本号加一，并把变化（insert/update/delete）推送给所有订阅者，
+    订阅者只需按术语长度做增量更新，而不必重读整个术语库。
+    """
+
+    INSERT = "insert"
+    UPDATE = "update"
+    DELETE = "delete"
+
+    def __init__(self, terms: Optional[Dict[str, str]] = None):
+        self._terms: Dict[str, str] = dict(terms or {})
+        self._listeners: List[Callable[[], Optional[TermListener]]] = []
+        self._lock = threading.RLock()
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def __contains__(self, original: str) -> bool:
+        return original in self._terms
+
+    def get(self, original: str) -> Optional[str]:
+        """获取原词对应的正确词"""
+        return self._terms.get(original)
+
+    def subscribe(self, listener: TermListener) -> Tuple[Dict[str, str], int]:
+        """订阅术语变化
+
+        绑定方法以弱引用保存，订阅者被回收后自动退订。
+
+        Returns:
+            (订阅时刻的术语快照, 快照对应的版本号)
+        """
+        if hasattr(listener, "__self__") and hasattr(listener, "__func__"):
+            ref = weakref.WeakMethod(listener)
+        else:
+            ref = lambda: listener  # noqa: E731
+        with self._lock:
+            self._listeners.append(ref)
+            return dict(self._terms), self.version
+
+    def unsubscribe(self, listener: TermListener):
+        """取消订阅"""
+        with self._lock:
+            self._listeners = [ref for ref in self._listeners
+                               if ref() is not None and ref() != listener]
+
+    def put(self, original: str, correct: str) -> int:
+        """插入或更新术语，映射未变化时不产生新版本
+
+        Returns:
+            当前版本号
+        """
+        with self._lock:
+            current = self._terms.get(original)
+            if current == correct and original in self._terms:
+                return self.version
+            op = self.UPDATE if original in self._terms else self.INSERT
+            self._terms[original] = correct
+            return self._publish(op, original, correct)
+
+    def remove(self, original: str) -> int:
+        """删除术语
+
+        Returns:
+            当前版本号
+        """
+        with self._lock:
+            if original not in self._terms:
+                return self.version
+            del self._terms[original]
+            return self._publish(self.DELETE, original, None)
+
+    def _publish(self, op: str, original: str, correct: Optional[str]) -> int:
+        """递增版本号并通知订阅者（调用方需持有锁）"""
+        self.version += 1
+        alive = []
+        for ref in self._listeners:
+            listener = ref()
+            if listener is None:
+                continue
+            alive.append(ref)
+            listener(self.version, op, original, correct)
+        self._listeners = alive
+        return self.version
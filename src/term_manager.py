@@ -1,81 +1,215 @@
 """术语管理模块 - 自动积累和管理专用术语"""
-import json
 import os
-from typing import Dict, List, Optional
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
 from datetime import datetime
 import threading
+from .term_index import TermIndex
+from .term_storage import JournalTermStorage
+
+# 进程内共享的术语管理器，按文件路径区分
+_shared_managers: Dict[tuple, "TermManager"] = {}
+_shared_lock = threading.Lock()
 
 class TermManager:
     def __init__(self, term_file: str = "data/terms.json", 
-                 log_file: str = "data/corrections_log.json"):
+                 log_file: str = "data/corrections_log.json",
+                 storage=None, batch_max_records: int = 500,
+                 batch_max_delay: float = 5.0):
+        """
+        Args:
+            term_file: 术语库文件（快照）
+            log_file: 纠正记录文件
+            storage: 存储后端，默认使用追加式日志存储 JournalTermStorage
+            batch_max_records: 批量模式下累积多少条变更后提前写入
+            batch_max_delay: 批量模式下变更最多延迟多少秒写入
+        """
         self.term_file = term_file
         self.log_file = log_file
-        self.terms: Dict[str, Dict] = self._load_terms()
-        self.corrections_log: List[Dict] = self._load_log()
-        self._lock = threading.Lock()
+        self.storage = storage or JournalTermStorage(term_file, log_file)
+        self.batch_max_records = batch_max_records
+        self.batch_max_delay = batch_max_delay
+        self._lock = threading.RLock()
         
-    def _load_terms(self) -> Dict:
-        """加载术语库"""
-        if os.path.exists(self.term_file):
-            with open(self.term_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
-    
-    def _load_log(self) -> List:
-        """加载纠正记录"""
-        if os.path.exists(self.log_file):
-            with open(self.log_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return []
+        # 批量模式下尚未写入存储的变更（按发生顺序，所有线程共用）
+        self._pending: List[Dict] = []
+        self._pending_since = 0.0
+        self._flush_timer: Optional[threading.Timer] = None
+        # 批量模式按线程区分：任务线程的批量不影响其他线程（例如用户手动添加的纠正）
+        self._local = threading.local()
+        
+        # 加载快照并重放尚未压缩的日志
+        self.terms, self.corrections_log, tail = self.storage.load()
+        for record in tail:
+            self._apply_record(record)
+        
+        # 版本化术语索引，修正器订阅它做增量更新
+        self.index = TermIndex(
+            {original: info["correct"] for original, info in self.terms.items()}
+        )
     
-    def _save_terms(self):
-        """保存术语库"""
-        os.makedirs(os.path.dirname(self.term_file), exist_ok=True)
-        with open(self.term_file, 'w', encoding='utf-8') as f:
-            json.dump(self.terms, f, ensure_ascii=False, indent=2)
+    @classmethod
+    def shared(cls, term_file: str = "data/terms.json",
+               log_file: str = "data/corrections_log.json") -> "TermManager":
+        """获取进程内共享的实例，同一组文件只加载一次"""
+        key = (os.path.abspath(term_file), os.path.abspath(log_file))
+        with _shared_lock:
+            manager = _shared_managers.get(key)
+            if manager is None:
+                manager = cls(term_file, log_file)
+                _shared_managers[key] = manager
+            return manager
     
-    def _save_log(self):
-        """保存纠正记录"""
-        os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
-        with open(self.log_file, 'w', encoding='utf-8') as f:
-            json.dump(self.corrections_log, f, ensure_ascii=False, indent=2)
+    def _apply_record(self, record: Dict):
+        """将一条变更记录应用到内存中的术语库（写入和重放共用）"""
+        if record["op"] == "remove":
+            self.terms.pop(record["original"], None)
+            return
+        
+        original = record["original"]
+        corrected = record["corrected"]
+        context = record.get("context")
+        confidence = record.get("confidence", 1.0)
+        
+        # 记录纠正
+        self.corrections_log.append({
+            "timestamp": record["timestamp"],
+            "original": original,
+            "corrected": corrected,
+            "context": context,
+            "confidence": confidence
+        })
+        
+        # 自动添加到术语库
+        if original not in self.terms:
+            self.terms[original] = {
+                "correct": corrected,
+                "frequency": 1,
+                "contexts": [context] if context else [],
+                "confidence": confidence,
+                "created_at": record["timestamp"],
+                "auto_learned": True
+            }
+        else:
+            # 更新频率和置信度
+            self.terms[original]["frequency"] += 1
+            self.terms[original]["confidence"] = max(
+                self.terms[original]["confidence"], 
+                confidence
+            )
+            if context and context not in self.terms[original]["contexts"]:
+                self.terms[original]["contexts"].append(context)
     
     def add_correction(self, original: str, corrected: str, 
                       context: Optional[str] = None, confidence: float = 1.0):
         """记录一次纠正并自动添加到术语库"""
         with self._lock:
-            # 记录纠正
-            correction_entry = {
+            record = {
+                "op": "correction",
                 "timestamp": datetime.now().isoformat(),
                 "original": original,
                 "corrected": corrected,
                 "context": context,
                 "confidence": confidence
             }
-            self.corrections_log.append(correction_entry)
-            self._save_log()
-            
-            # 自动添加到术语库
-            if original not in self.terms:
-                self.terms[original] = {
-                    "correct": corrected,
-                    "frequency": 1,
-                    "contexts": [context] if context else [],
-                    "confidence": confidence,
-                    "created_at": datetime.now().isoformat(),
-                    "auto_learned": True
-                }
-            else:
-                # 更新频率和置信度
-                self.terms[original]["frequency"] += 1
-                self.terms[original]["confidence"] = max(
-                    self.terms[original]["confidence"], 
-                    confidence
+            self._apply_record(record)
+            self._persist(record)
+            self.index.put(original, self.terms[original]["correct"])
+    
+    def add_corrections_bulk(self, corrections: Iterable[Dict]):
+        """批量记录纠正，只写入一次存储
+        
+        Args:
+            corrections: 每项包含 original, corrected，可选 context, confidence
+        """
+        with self.batch():
+            for item in corrections:
+                self.add_correction(
+                    item["original"], item["corrected"],
+                    context=item.get("context"),
+                    confidence=item.get("confidence", 1.0)
                 )
-                if context and context not in self.terms[original]["contexts"]:
-                    self.terms[original]["contexts"].append(context)
-            
-            self._save_terms()
+    
+    @contextmanager
+    def batch(self):
+        """批量模式：块内的变更立即生效，但先在内存中累积，退出时一次写入
+        
+        累积超过 batch_max_records 条或 batch_max_delay 秒时会提前写入。
+        只对当前线程生效，其他线程的变更仍立即写入。
+        """
+        self._local.depth = self._batch_depth + 1
+        try:
+            yield self
+        finally:
+            self._local.depth -= 1
+            self.flush()
+    
+    @property
+    def _batch_depth(self) -> int:
+        """当前线程的批量模式嵌套层数"""
+        return getattr(self._local, 'depth', 0)
+    
+    def flush(self):
+        """把累积的变更写入存储"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._pending:
+                return
+            records, self._pending = self._pending, []
+            self.storage.append(records, self.terms, self.corrections_log)
+    
+    def _persist(self, record: Dict):
+        """写入一条变更，批量模式下按阈值延迟写入（调用方需持有锁）
+        
+        非批量的变更连同之前累积的变更一起立即写入，日志中的顺序与内存中一致。
+        """
+        if not self._pending:
+            self._pending_since = time.monotonic()
+        self._pending.append(record)
+        if (self._batch_depth == 0
+                or len(self._pending) >= self.batch_max_records
+                or time.monotonic() - self._pending_since >= self.batch_max_delay):
+            self.flush()
+        elif self._flush_timer is None:
+            # 批量块长时间不结束时，最迟batch_max_delay秒后写入
+            self._flush_timer = threading.Timer(self.batch_max_delay, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def remove_term(self, original: str) -> bool:
+        """从术语库中删除术语
+        
+        Returns:
+            术语是否存在并已删除
+        """
+        with self._lock:
+            if original not in self.terms:
+                return False
+            record = {
+                "op": "remove",
+                "timestamp": datetime.now().isoformat(),
+                "original": original
+            }
+            self._apply_record(record)
+            self._persist(record)
+            self.index.remove(original)
+            return True
+    
+    def compact(self):
+        """立即将日志压缩为快照（仅对日志存储有效）"""
+        with self._lock:
+            self.flush()
+            if hasattr(self.storage, "compact"):
+                self.storage.compact(self.terms)
+    
+    def close(self):
+        """关闭存储，等待后台压缩完成"""
+        with self._lock:
+            self.flush()
+            self.storage.close()
     
     def get_term(self, word: str) -> Optional[Dict]:
         """获取术语信息"""
@@ -0,0 +1,260 @@
+"""术语库存储模块 - 整文件JSON存储与追加式日志存储"""
+import json
+import os
+import threading
+import logging
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class JsonTermStorage:
+    """整文件JSON存储（原有方式）：每次写入都重写术语库和纠正记录"""
+
+    def __init__(self, term_file: str, log_file: str):
+        self.term_file = term_file
+        self.log_file = log_file
+
+    def load(self) -> Tuple[Dict, List, List[Dict]]:
+        """加载存储内容
+
+        Returns:
+            (术语库快照, 纠正记录, 需要重放的日志记录)
+        """
+        return _read_json(self.term_file, {}), _read_json(self.log_file, []), []
+
+    def append(self, records: List[Dict], terms: Dict, log: List):
+        """持久化一批变更（整文件重写）"""
+        if any(r["op"] == "correction" for r in records):
+            _write_json(self.log_file, log)
+        _write_json(self.term_file, terms)
+
+    def close(self):
+        pass
+
+
+class JournalTermStorage:
+    """追加式日志存储
+
+    每条变更以一行JSON追加到日志文件（``<术语库>.journal``），写入开销
+    只与本次变更有关。日志累积到 ``compact_threshold`` 条后，在后台线程中
+    压缩：把当时的术语库写成新的快照（仍是原来的terms.json格式），
+    并把纠正记录追加到归档文件（``<纠正记录>.jsonl``）。
+
+    加载时读取快照，再重放尚未压缩的日志。旧的terms.json和
+    corrections_log.json可以直接加载，无需迁移。
+    """
+
+    def __init__(self, term_file: str, log_file: str,
+                 compact_threshold: int = 1000):
+        self.term_file = term_file
+        self.log_file = log_file
+        self.compact_threshold = compact_threshold
+
+        self.journal_file = term_file + ".journal"
+        self.segment_file = term_file + ".journal.compacting"  # 正在压缩的日志
+        self.next_file = term_file + ".next"  # 压缩生成的新快照
+        self.archive_file = os.path.splitext(log_file)[0] + ".jsonl"
+
+        self._seq = 0
+        self._archived_seq = 0
+        self._journal_records = 0
+        self._journal = None
+        self._compactor = None
+        self._compact_lock = threading.Lock()
+
+    def load(self) -> Tuple[Dict, List, List[Dict]]:
+        """加载快照、历史纠正记录和待重放日志
+
+        Returns:
+            (术语库快照, 纠正记录, 需要重放的日志记录)
+        """
+        segment = _read_jsonl(self.segment_file)
+        tail = _dedupe_by_seq(segment + _read_jsonl(self.journal_file))
+
+        if os.path.exists(self.segment_file):
+            # 上次压缩未完成：快照没有更新，把未压缩的记录合并回日志
+            _write_lines(self.journal_file, tail)
+            os.remove(self.segment_file)
+            if os.path.exists(self.next_file):
+                os.remove(self.next_file)
+        else:
+            if os.path.exists(self.next_file):
+                # 上次压缩已提交但新快照尚未替换
+                os.replace(self.next_file, self.term_file)
+            if not _ends_with_newline(self.journal_file):
+                # 崩溃残留的半行会与之后追加的内容粘连，先修复
+                _write_lines(self.journal_file, tail)
+
+        terms = _read_json(self.term_file, {})
+        log = _read_json(self.log_file, [])
+
+        archived = _read_jsonl(self.archive_file)
+        self._archived_seq = max((r["seq"] for r in archived), default=0)
+        first_tail_seq = tail[0]["seq"] if tail else None
+        for record in archived:
+            if first_tail_seq is None or record["seq"] < first_tail_seq:
+                log.append(_log_entry(record))
+
+        self._seq = max(self._archived_seq,
+                        tail[-1]["seq"] if tail else 0)
+        self._journal_records = len(tail)
+        return terms, log, tail
+
+    def append(self, records: List[Dict], terms: Dict, log: List):
+        """追加一批变更，必要时触发后台压缩
+
+        调用方需持有术语管理器的锁，以保证快照与日志一致。
+        """
+        lines = []
+        for record in records:
+            self._seq += 1
+            record = {"seq": self._seq, **record}
+            lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+
+        if self._journal is None:
+            _ensure_parent(self.journal_file)
+            self._journal = open(self.journal_file, "a", encoding="utf-8")
+        self._journal.write("".join(lines))
+        self._journal.flush()
+        self._journal_records += len(lines)
+
+        if self._journal_records >= self.compact_threshold:
+            self._start_compaction(terms)
+
+    def _start_compaction(self, terms: Dict):
+        """轮换日志并在后台写入快照"""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        if os.path.exists(self.segment_file) or not os.path.exists(self.journal_file):
+            return
+
+        # 轮换后，内存中的术语库恰好等于 旧快照 + 被轮换的日志
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        os.replace(self.journal_file, self.segment_file)
+        self._journal_records = 0
+        payload = json.dumps(terms, ensure_ascii=False, indent=2)
+
+        self._compactor = threading.Thread(
+            target=self._compact, args=(payload,), daemon=True
+        )
+        self._compactor.start()
+
+    def _compact(self, payload: str):
+        """写入新快照并归档纠正记录
+
+        删除被轮换的日志是提交点：此前崩溃会在加载时丢弃新快照并重放日志，
+        此后崩溃则在加载时安装新快照。
+        """
+        with self._compact_lock:
+            try:
+                _ensure_parent(self.next_file)
+                with open(self.next_file, "w", encoding="utf-8") as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                records = [r for r in _read_jsonl(self.segment_file)
+                           if r["op"] == "correction" and r["seq"] > self._archived_seq]
+                if records:
+                    _ensure_parent(self.archive_file)
+                    with open(self.archive_file, "a", encoding="utf-8") as f:
+                        f.write("".join(json.dumps(r, ensure_ascii=False) + "\n"
+                                        for r in records))
+                        f.flush()
+                        os.fsync(f.fileno())
+                    self._archived_seq = records[-1]["seq"]
+
+                os.remove(self.segment_file)
+                os.replace(self.next_file, self.term_file)
+            except OSError as e:
+                logger.error(f"术语库压缩失败: {e}")
+
+    def compact(self, terms: Dict):
+        """立即压缩并等待完成（调用方需持有术语管理器的锁）"""
+        self.wait()
+        if self._journal_records:
+            self._start_compaction(terms)
+        self.wait()
+
+    def wait(self):
+        """等待后台压缩结束"""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    def close(self):
+        """关闭日志文件并等待后台压缩结束"""
+        self.wait()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+def _log_entry(record: Dict) -> Dict:
+    """从日志记录中还原纠正记录条目"""
+    return {k: v for k, v in record.items() if k not in ("seq", "op")}
+
+
+def _dedupe_by_seq(records: List[Dict]) -> List[Dict]:
+    seen = {}
+    for record in records:
+        seen.setdefault(record["seq"], record)
+    return [seen[seq] for seq in sorted(seen)]
+
+
+def _ensure_parent(path: str):
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+
+
+def _ends_with_newline(path: str) -> bool:
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return True
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def _read_json(path: str, default):
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return default
+
+
+def _write_json(path: str, data):
+    _ensure_parent(path)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def _read_jsonl(path: str) -> List[Dict]:
+    """读取JSONL文件，忽略崩溃时可能残留的不完整末行"""
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"跳过损坏的日志行: {path}")
+    return records
+
+
+def _write_lines(path: str, records: List[Dict]):
+    """原子地重写JSONL文件"""
+    _ensure_parent(path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
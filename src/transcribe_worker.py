@@ -0,0 +1,99 @@
+"""并行识别工作进程 - 每个进程只加载一次模型，从任务队列中取片段识别"""
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+# 工作进程内的识别器（由 _init_worker 创建）
+_recognizer = None
+
+# 按配置复用的进程池，避免每个任务都重新启动进程、加载模型
+_pools: Dict[tuple, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def default_torch_threads(workers: int) -> int:
+    """默认每个工作进程的torch线程数：平分CPU核心"""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def _init_worker(model_size: str, device: Optional[str], torch_threads: int,
+                 backend: str = "whisper"):
+    """工作进程初始化：设置线程数并加载模型"""
+    global _recognizer
+    import torch
+    from .speech_recognizer import SpeechRecognizer
+
+    torch.set_num_threads(torch_threads)
+    _recognizer = SpeechRecognizer(model_size=model_size, device=device, backend=backend)
+
+
+def _transcribe_chunk(index: int, audio: Union[str, np.ndarray],
+                      params: Dict) -> Tuple[int, Dict, float]:
+    """在工作进程中识别一个片段
+
+    Returns:
+        (片段序号, 识别结果, 识别用时)
+    """
+    started = time.time()
+    result = _recognizer.transcribe(audio, **params)
+    return index, result, time.time() - started
+
+
+def get_worker_pool(model_size: str, device: Optional[str], workers: int,
+                    torch_threads: Optional[int] = None,
+                    backend: str = "whisper") -> ProcessPoolExecutor:
+    """获取（或创建）识别进程池
+
+    Args:
+        model_size: Whisper模型大小
+        device: 计算设备
+        workers: 工作进程数
+        torch_threads: 每个工作进程的torch线程数，默认平分CPU核心
+        backend: 识别后端名称
+    """
+    if torch_threads is None:
+        torch_threads = default_torch_threads(workers)
+    key = (model_size, device, workers, torch_threads, backend)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            # 使用spawn，避免在已初始化torch线程的进程中fork
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_size, device, torch_threads, backend),
+            )
+            _pools[key] = pool
+        return pool
+
+
+def discard_worker_pool(pool: ProcessPoolExecutor):
+    """丢弃已损坏的进程池（例如工作进程崩溃后）"""
+    with _pools_lock:
+        for key, value in list(_pools.items()):
+            if value is pool:
+                del _pools[key]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def submit_chunk(pool: ProcessPoolExecutor, index: int,
+                 audio: Union[str, np.ndarray], params: Optional[Dict] = None):
+    """提交一个片段到进程池，返回Future"""
+    return pool.submit(_transcribe_chunk, index, audio, params or {})
+
+
+@atexit.register
+def shutdown_worker_pools():
+    """关闭所有进程池"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,142 @@
+"""识别结果缓存 - 相同音频片段不再重复调用Whisper"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+from .json_util import to_builtin
+
+logger = logging.getLogger(__name__)
+
+# 缓存格式版本，结果结构或键的组成变化时递增使旧缓存失效
+CACHE_VERSION = 2
+
+
+class TranscriptionCache:
+    """按片段内容缓存Whisper的原始识别结果（术语修正之前）
+
+    键为 sha256(片段音频 + 模型大小 + 识别参数)，因此更换字幕格式、
+    开始时间或添加术语后重新处理时，只需重新执行术语修正和字幕生成。
+    缓存文件总大小超过上限时按最近使用时间（mtime）淘汰。
+    """
+
+    def __init__(self, cache_dir: str, max_size_mb: float = 500):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_size_mb: 缓存总大小上限（MB）
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._entries())
+
+    def make_key(self, audio: Union[str, np.ndarray], model_size: str,
+                 params: Optional[Dict] = None, backend: str = 'whisper',
+                 decode_mode: str = 'sequential') -> str:
+        """计算缓存键
+
+        Args:
+            audio: 片段采样数组，或片段文件路径（按文件内容计算）
+            model_size: Whisper模型大小
+            params: 识别参数
+            backend: 识别后端（whisper / whisper-int8 等），结果不同
+            decode_mode: 解码方式，sequential（逐片段，以前文为条件）或
+                batch（批量，不以前文为条件），结果不同
+        """
+        digest = hashlib.sha256()
+        if isinstance(audio, np.ndarray):
+            digest.update(str(audio.dtype).encode())
+            digest.update(np.ascontiguousarray(audio).tobytes())
+        else:
+            with open(audio, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+
+        meta = {'version': CACHE_VERSION, 'model_size': model_size, 'params': params or {},
+                'backend': backend, 'decode_mode': decode_mode}
+        digest.update(json.dumps(meta, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """读取缓存的识别结果，不存在时返回None"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"缓存文件损坏，已忽略: {path} ({e})")
+            return None
+
+        # 更新访问时间，用于LRU淘汰
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return result
+
+    def put(self, key: str, result: Dict):
+        """写入识别结果（先写临时文件再替换，避免读到半个文件）"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, default=to_builtin)
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(temp_path, path)
+        except (OSError, TypeError) as e:
+            logger.warning(f"写入缓存失败: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+
+        with self._lock:
+            self._size += os.path.getsize(path) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        """遍历缓存文件，产出 (路径, 大小, mtime)"""
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.json'):
+                    stat = entry.stat()
+                    yield entry.path, stat.st_size, stat.st_mtime
+
+    def _evict(self):
+        """按mtime从旧到新删除，直到总大小降到上限的90%（调用方需持有锁）"""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._size = total
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            for path, _, _ in list(self._entries()):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._size = 0
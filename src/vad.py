@@ -0,0 +1,124 @@
+"""语音活动检测模块 - 在送入Whisper之前跳过静音"""
+from typing import Dict, List, Tuple
+import numpy as np
+
+# 分块计算能量，避免一次性把整个文件转换为float
+_BLOCK_FRAMES = 4096
+
+
+def frame_energy(pcm: np.ndarray, frame_length: int) -> np.ndarray:
+    """向量化计算每帧的RMS能量（dBFS）
+
+    Args:
+        pcm: int16或[-1, 1]范围的float采样
+        frame_length: 每帧采样数（末尾不足一帧的部分忽略）
+
+    Returns:
+        每帧能量数组
+    """
+    num_frames = len(pcm) // frame_length
+    scale = 32768.0 if pcm.dtype == np.int16 else 1.0
+    energy = np.empty(num_frames, dtype=np.float32)
+
+    for start in range(0, num_frames, _BLOCK_FRAMES):
+        end = min(start + _BLOCK_FRAMES, num_frames)
+        frames = pcm[start * frame_length:end * frame_length]
+        frames = frames.astype(np.float32).reshape(end - start, frame_length) / scale
+        mean_square = np.einsum('ij,ij->i', frames, frames) / frame_length
+        energy[start:end] = 10 * np.log10(mean_square + 1e-10)
+
+    return energy
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """返回布尔数组中连续为True的区间 [start, end)"""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+
+
+class EnergyVAD:
+    """基于帧能量的语音检测器
+
+    阈值默认自适应：取能量的低分位数作为底噪，加上 margin_db。没有真正静音的
+    录音中底噪会被高估，因此自适应阈值不超过 max_threshold_db，
+    高于它的声音（正常音量的语音）一定会被识别。
+    任何实现了 ``detect(pcm, sample_rate)`` 并返回语音区间列表的对象
+    都可以替换它传给管道。
+    """
+
+    def __init__(self, frame_ms: int = 30, threshold_db: float = None,
+                 margin_db: float = 15.0, min_threshold_db: float = -55.0,
+                 max_threshold_db: float = -45.0,
+                 min_speech: float = 0.3, min_silence: float = 1.0,
+                 padding: float = 0.3):
+        """
+        Args:
+            frame_ms: 帧长（毫秒）
+            threshold_db: 固定阈值（dBFS），None时自适应
+            margin_db: 自适应阈值高出底噪的分贝数
+            min_threshold_db: 自适应阈值的下限
+            max_threshold_db: 自适应阈值的上限
+            min_speech: 短于此时长（秒）的语音视为噪声
+            min_silence: 短于此时长（秒）的静音并入前后语音
+            padding: 语音区间两端保留的余量（秒）
+        """
+        self.frame_ms = frame_ms
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.min_threshold_db = min_threshold_db
+        self.max_threshold_db = max_threshold_db
+        self.min_speech = min_speech
+        self.min_silence = min_silence
+        self.padding = padding
+
+    def detect(self, pcm: np.ndarray, sample_rate: int) -> List[Tuple[float, float]]:
+        """检测语音区间
+
+        Returns:
+            [(开始秒, 结束秒), ...]，按时间排序且互不重叠
+        """
+        frame_length = int(sample_rate * self.frame_ms / 1000)
+        energy = frame_energy(pcm, frame_length)
+        if len(energy) == 0:
+            return []
+
+        threshold = self.threshold_db
+        if threshold is None:
+            noise_floor = float(np.percentile(energy, 10))
+            threshold = min(max(noise_floor + self.margin_db, self.min_threshold_db),
+                            self.max_threshold_db)
+
+        frame_seconds = frame_length / sample_rate
+        speech = energy > threshold
+
+        # 填补短静音
+        max_gap = int(self.min_silence / frame_seconds)
+        for start, end in _runs(~speech):
+            if start > 0 and end < len(speech) and end - start <= max_gap:
+                speech[start:end] = True
+
+        # 去掉过短的语音，加上余量
+        min_frames = int(self.min_speech / frame_seconds)
+        total = len(pcm) / sample_rate
+        regions: List[Tuple[float, float]] = []
+        for start, end in _runs(speech):
+            if end - start < min_frames:
+                continue
+            region_start = max(0.0, start * frame_seconds - self.padding)
+            region_end = min(total, end * frame_seconds + self.padding)
+            if regions and region_start <= regions[-1][1]:
+                regions[-1] = (regions[-1][0], region_end)
+            else:
+                regions.append((region_start, region_end))
+
+        return regions
+
+
+def skipped_seconds(chunks: List[Dict], total_duration: float) -> float:
+    """语音检测跳过的时长：总时长减去各片段保留区间的总长"""
+    speech = sum(
+        chunk.get('keep_end', chunk['end_time']) - chunk.get('keep_start', chunk['start_time'])
+        for chunk in chunks
+    )
+    return max(0.0, total_duration - speech)
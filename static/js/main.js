@@ -2,8 +2,10 @@
 let selectedFile = null;
 let currentTaskId = null;
 let statusInterval = null;
+let eventSource = null;
 let uploadedSubtitle = null;
 let isPaused = false;
+let currentUpload = null; // 进行中的分块上传 {id, promise, cancelled}
 
 // DOM元素
 const uploadArea = document.getElementById('uploadArea');
@@ -59,35 +61,86 @@ async function handleFileSelect(file) {
     fileInfo.style.display = 'block';
     processBtn.disabled = false;
     
-    // 分析音频文件获取分片信息
-    analyzeAudioFile(file);
+    // 选择文件后立即开始上传，上传完成时得到时长和分片信息
+    if (currentUpload) {
+        currentUpload.cancelled = true;
+    }
+    currentUpload = startChunkedUpload(file);
+    currentUpload.promise.catch((error) => console.error('上传失败:', error));
 }
 
-// 分析音频文件，获取分片信息
-async function analyzeAudioFile(file) {
-    const formData = new FormData();
-    formData.append('audio', file);
-    
-    try {
-        const response = await fetch('/analyze_audio', {
+// 分块上传：服务器边接收边解码，并用当前选择的模型预先识别已到达的片段；
+// 网络中断时从服务器已接收的位置继续
+function startChunkedUpload(file) {
+    const upload = { id: null, cancelled: false };
+    const chunkInfo = document.getElementById('chunkInfo');
+    
+    upload.promise = (async () => {
+        const initResponse = await fetch('/uploads', {
             method: 'POST',
-            body: formData
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                filename: file.name,
+                size: file.size,
+                model_size: document.getElementById('modelSize').value,
+                subtitle_format: document.getElementById('subtitleFormat').value
+            })
         });
+        const init = await initResponse.json();
+        if (!initResponse.ok) {
+            throw new Error(init.error);
+        }
+        upload.id = init.upload_id;
         
-        if (response.ok) {
+        let offset = 0;
+        let retries = 0;
+        while (offset < file.size) {
+            if (upload.cancelled) {
+                return null;
+            }
+            let response;
+            try {
+                response = await fetch(`/uploads/${upload.id}?offset=${offset}`, {
+                    method: 'PUT',
+                    body: file.slice(offset, offset + init.chunk_size)
+                });
+            } catch (error) {
+                response = null;
+            }
+            if (!response || response.status >= 500) {
+                // 网络错误：稍后查询服务器已接收的字节数再继续
+                if (++retries > 5) {
+                    throw new Error('网络错误，上传中断');
+                }
+                await new Promise((resolve) => setTimeout(resolve, 1000 * retries));
+                continue;
+            }
             const data = await response.json();
+            if (!response.ok && response.status !== 409) {
+                throw new Error(data.error);
+            }
+            offset = data.received; // 409时为服务器实际接收到的位置
+            retries = 0;
+            chunkInfo.textContent = `上传中: ${Math.floor(offset * 100 / file.size)}%`;
+            chunkInfo.style.display = 'block';
+        }
+        
+        const response = await fetch(`/uploads/${upload.id}/complete`, { method: 'POST' });
+        const data = await response.json();
+        if (!response.ok) {
+            throw new Error(data.error);
+        }
+        if (!upload.cancelled) {
             updateChunkSelector(data.chunks);
             
             // 显示音频总时长信息
             const minutes = Math.floor(data.duration / 60);
             const seconds = Math.floor(data.duration % 60);
-            document.getElementById('chunkInfo').textContent = 
-                `音频总时长: ${minutes}分${seconds}秒，共${data.chunks.length}个片段`;
-            document.getElementById('chunkInfo').style.display = 'block';
+            chunkInfo.textContent = `音频总时长: ${minutes}分${seconds}秒，共${data.chunks.length}个片段`;
         }
-    } catch (error) {
-        console.error('分析音频失败:', error);
-    }
+        return data;
+    })();
+    return upload;
 }
 
 // 更新分片选择器
@@ -108,36 +161,34 @@ function updateChunkSelector(chunks) {
 
 // 处理按钮
 processBtn.addEventListener('click', async () => {
-    if (!selectedFile) return;
-    
-    const formData = new FormData();
-    formData.append('audio', selectedFile);
-    formData.append('model_size', document.getElementById('modelSize').value);
-    formData.append('subtitle_format', document.getElementById('subtitleFormat').value);
-    formData.append('start_time', document.getElementById('startChunk').value || '0');
-    
-    // 如果有上传的字幕，也添加到表单
-    if (uploadedSubtitle) {
-        // 创建一个Blob对象来传递字幕内容
-        const subtitleBlob = new Blob([uploadedSubtitle], { type: 'text/plain' });
-        formData.append('existing_subtitle', subtitleBlob, 'subtitle.srt');
-    }
+    if (!selectedFile || !currentUpload) return;
+    const upload = currentUpload;
     
     processBtn.disabled = true;
     progressSection.style.display = 'block';
     resultSection.style.display = 'none';
     
     try {
-        const response = await fetch('/upload', {
+        // 文件在选择时已开始上传，这里只等待上传完成
+        statusMessage.textContent = '等待上传完成...';
+        await upload.promise;
+        
+        const response = await fetch(`/uploads/${upload.id}/process`, {
             method: 'POST',
-            body: formData
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                model_size: document.getElementById('modelSize').value,
+                subtitle_format: document.getElementById('subtitleFormat').value,
+                start_time: document.getElementById('startChunk').value || '0',
+                existing_subtitle: uploadedSubtitle  // 已上传的字幕内容
+            })
         });
         
         const data = await response.json();
         
         if (response.ok) {
             currentTaskId = data.task_id;
-            startStatusPolling();
+            startTaskEvents();
         } else {
             alert('上传失败: ' + data.error);
             resetUI();
@@ -148,6 +199,71 @@ processBtn.addEventListener('click', async () => {
     }
 });
 
+// 任务事件流（SSE）：服务器只推送新增的进度和字幕，不可用时退回轮询
+function startTaskEvents() {
+    if (!window.EventSource) {
+        startStatusPolling();
+        return;
+    }
+    
+    const taskId = currentTaskId;
+    eventSource = new EventSource(`/events/${taskId}`);
+    
+    eventSource.addEventListener('progress', (e) => {
+        updateProgress(JSON.parse(e.data));
+    });
+    
+    eventSource.addEventListener('segments', (e) => {
+        document.getElementById('subtitlePreview').style.display = 'block';
+        insertSubtitles(JSON.parse(e.data).segments);
+    });
+    
+    eventSource.addEventListener('queue', (e) => {
+        statusMessage.textContent = JSON.parse(e.data).status_message;
+    });
+    
+    eventSource.addEventListener('state', async (e) => {
+        const data = JSON.parse(e.data);
+        if (data.restart) {
+            // 暂停后重新排队：从检查点重新推送全部字幕
+            document.getElementById('subtitleContent').innerHTML = '';
+        }
+        if (data.status === 'completed') {
+            stopTaskEvents();
+            // 完成后获取一次完整结果
+            try {
+                const response = await fetch(`/status/${taskId}`);
+                showResults(await response.json());
+            } catch (error) {
+                alert('获取结果失败: ' + error.message);
+                resetUI();
+            }
+        } else if (data.status === 'error') {
+            stopTaskEvents();
+            alert('处理失败: ' + data.error);
+            resetUI();
+        } else if (data.status === 'cancelled') {
+            stopTaskEvents();
+        }
+    });
+    
+    eventSource.onerror = () => {
+        // 网络中断时浏览器会带Last-Event-ID自动重连；连接被拒绝时退回轮询
+        if (eventSource && eventSource.readyState === EventSource.CLOSED) {
+            stopTaskEvents();
+            document.getElementById('subtitleContent').innerHTML = '';
+            startStatusPolling();
+        }
+    };
+}
+
+function stopTaskEvents() {
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
+    }
+}
+
 // 状态轮询
 function startStatusPolling() {
     statusInterval = setInterval(async () => {
@@ -195,13 +311,25 @@ function updateProgress(data) {
         initAudioPlayer(); // 初始化音频播放器事件
     }
     
-    // 开始字幕预览轮询
-    if (progress > 10 && !window.subtitleInterval) {
+    // 已有完成的片段时，可以下载部分字幕
+    if (data.current_chunk > 0) {
+        document.getElementById('partialDownloadBtn').style.display = 'inline-block';
+    }
+    
+    // 开始字幕预览轮询（使用事件流时字幕由服务器推送）
+    if (progress > 10 && !window.subtitleInterval && !eventSource) {
         document.getElementById('subtitlePreview').style.display = 'block';
         startSubtitlePreview();
     }
 }
 
+// 下载处理中已完成部分的字幕
+function downloadPartialSubtitles() {
+    if (currentTaskId) {
+        window.location.href = `/download/${currentTaskId}`;
+    }
+}
+
 // 显示结果
 function showResults(data) {
     progressSection.style.display = 'none';
@@ -263,67 +391,92 @@ newTaskBtn.addEventListener('click', () => {
 });
 
 // 字幕预览
-let lastSegmentCount = 0; // 记录上次的字幕数量
+let subtitleCursor = null; // 字幕日志游标，null表示尚未取得完整预览
 
 function startSubtitlePreview() {
-    // 重置计数器
-    lastSegmentCount = 0;
+    // 第一次取完整预览，之后只取游标之后新增的字幕
+    subtitleCursor = null;
     
     window.subtitleInterval = setInterval(async () => {
         try {
-            const response = await fetch(`/preview_subtitles/${currentTaskId}`);
+            const query = subtitleCursor === null ? '' : `?since=${subtitleCursor}`;
+            const response = await fetch(`/preview_subtitles/${currentTaskId}${query}`);
             const data = await response.json();
             
-            if (data.segments && data.segments.length > 0) {
-                // 检查是否有新的字幕片段
-                if (data.segments.length > lastSegmentCount) {
-                    // 只添加新的片段
-                    const newSegments = data.segments.slice(lastSegmentCount);
-                    updateSubtitleDisplay(newSegments, true); // append模式
-                    lastSegmentCount = data.segments.length;
-                }
-            }
-            
             // 如果任务完成，停止轮询
             if (data.status === 'completed' || data.status === 'error') {
                 clearInterval(window.subtitleInterval);
                 window.subtitleInterval = null;
                 
-                // 如果是完成状态，确保显示所有字幕
-                if (data.status === 'completed' && data.segments) {
-                    updateSubtitleDisplay(data.segments, false); // 完整替换，确保顺序正确
+                // 如果是完成状态，显示最终的完整字幕
+                if (data.status === 'completed') {
+                    const finalResponse = await fetch(`/preview_subtitles/${currentTaskId}`);
+                    const finalData = await finalResponse.json();
+                    updateSubtitleDisplay(finalData.segments, false);
                 }
+                return;
+            }
+            
+            if (subtitleCursor === null) {
+                updateSubtitleDisplay(data.segments, false);
+            } else if (data.segments.length > 0) {
+                insertSubtitles(data.segments);
             }
+            subtitleCursor = data.cursor;
         } catch (error) {
             console.error('字幕预览错误:', error);
         }
     }, 2000); // 每2秒更新一次
 }
 
-// 更新字幕显示
-function updateSubtitleDisplay(segments, append = false) {
-    const container = document.getElementById('subtitleContent');
-    
-    // 获取现有的字幕数量，用于计算新的索引
-    const existingItems = container.querySelectorAll('.subtitle-item').length;
-    
-    // 生成新的字幕HTML
-    const newSubtitlesHtml = segments.map((segment, index) => {
-        const actualIndex = append ? existingItems + index : index;
-        return `
+// 单条字幕的HTML
+function subtitleItemHtml(segment, index) {
+    return `
         <div class="subtitle-item" 
              data-start="${segment.start}" 
              data-end="${segment.end}"
-             data-index="${actualIndex}">
+             data-index="${index}">
             <div class="subtitle-time" onclick="seekToTime(${segment.start})">${formatTime(segment.start)} - ${formatTime(segment.end)}</div>
             <div class="subtitle-text" 
                  contenteditable="true"
                  data-original-text="${segment.text}"
-                 onblur="handleSubtitleEdit(this, ${actualIndex})"
+                 onblur="handleSubtitleEdit(this, ${index})"
                  onclick="event.stopPropagation()"
                  onkeydown="handleSubtitleKeydown(event)">${segment.text}</div>
         </div>
     `;
+}
+
+// 插入推送来的新字幕（并行识别时片段可能乱序到达，按开始时间插入）
+function insertSubtitles(segments) {
+    const container = document.getElementById('subtitleContent');
+    
+    segments.forEach(segment => {
+        const template = document.createElement('template');
+        template.innerHTML = subtitleItemHtml(segment, container.children.length).trim();
+        
+        // 通常是追加到末尾，从后往前找插入位置
+        let before = null;
+        let node = container.lastElementChild;
+        while (node && parseFloat(node.dataset.start) > segment.start) {
+            before = node;
+            node = node.previousElementSibling;
+        }
+        container.insertBefore(template.content.firstChild, before);
+    });
+}
+
+// 更新字幕显示
+function updateSubtitleDisplay(segments, append = false) {
+    const container = document.getElementById('subtitleContent');
+    
+    // 获取现有的字幕数量，用于计算新的索引
+    const existingItems = container.querySelectorAll('.subtitle-item').length;
+    
+    // 生成新的字幕HTML
+    const newSubtitlesHtml = segments.map((segment, index) => {
+        const actualIndex = append ? existingItems + index : index;
+        return subtitleItemHtml(segment, actualIndex);
     }).join('');
     
     if (append) {
@@ -428,6 +581,10 @@ function formatTime(seconds) {
 
 // 重置UI
 function resetUI() {
+    if (currentUpload) {
+        currentUpload.cancelled = true;
+        currentUpload = null;
+    }
     selectedFile = null;
     currentTaskId = null;
     uploadedSubtitle = null;
@@ -446,9 +603,10 @@ function resetUI() {
     document.getElementById('subtitleContent').innerHTML = '';
     document.getElementById('resultSubtitleContent').innerHTML = '';
     document.getElementById('chunkInfo').textContent = '';
+    document.getElementById('partialDownloadBtn').style.display = 'none';
     
-    // 重置字幕计数器
-    lastSegmentCount = 0;
+    // 重置字幕游标
+    subtitleCursor = null;
     
     // 重置高级选项
     document.getElementById('subtitleFile').value = '';
@@ -460,6 +618,7 @@ function resetUI() {
     if (statusInterval) {
         clearInterval(statusInterval);
     }
+    stopTaskEvents();
     
     if (window.subtitleInterval) {
         clearInterval(window.subtitleInterval);
@@ -864,9 +1023,6 @@ function displayUploadedSubtitles(segments) {
     document.getElementById('subtitlePreview').style.display = 'block';
     document.getElementById('subtitleContent').innerHTML = '';
     
-    // 重置计数器
-    lastSegmentCount = segments.length;
-    
     // 显示所有上传的字幕
     updateSubtitleDisplay(segments, false);
     
@@ -1079,11 +1235,12 @@ async function cancelProcessing() {
         try {
             const response = await fetch(`/cancel/${currentTaskId}`, { method: 'POST' });
             if (response.ok) {
-                // 停止状态轮询
+                // 停止状态轮询和事件流
                 if (statusInterval) {
                     clearInterval(statusInterval);
                     statusInterval = null;
                 }
+                stopTaskEvents();
                 
                 // 重置UI
                 alert('处理已取消');
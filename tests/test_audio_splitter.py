@@ -0,0 +1,119 @@
+"""音频分割器测试"""
+import unittest
+import tempfile
+import shutil
+import wave
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.audio_splitter import AudioSplitter, SAMPLE_RATE
+from src.decoded_audio import DecodedAudioStore
+
+class TestAudioSplitter(unittest.TestCase):
+    def setUp(self):
+        """25秒的噪声，在8.5秒附近有0.5秒静音"""
+        rng = np.random.default_rng(0)
+        pcm = (rng.standard_normal(25 * SAMPLE_RATE) * 3000).astype(np.int16)
+        pcm[int(8.25 * SAMPLE_RATE):int(8.75 * SAMPLE_RATE)] = 0
+        self.pcm = pcm
+
+    def _splitter(self, **kwargs):
+        splitter = AudioSplitter(chunk_duration=10, mode="pcm", **kwargs)
+        splitter._pcm = self.pcm
+        splitter.total_duration = len(self.pcm) / SAMPLE_RATE
+        return splitter
+
+    def test_cut_moves_to_silence(self):
+        """切分点移到窗口内的静音处，片段不超过chunk_duration"""
+        cuts = self._splitter(boundary_window=2.0).plan_cuts(0.0, 25.0)
+        self.assertAlmostEqual(cuts[1], 8.5, delta=0.2)
+        self.assertEqual(cuts[-1], 25.0)
+        for start, end in zip(cuts[:-1], cuts[1:]):
+            self.assertLessEqual(end - start, 10)
+
+        # 不设窗口时保持固定边界
+        self.assertEqual(self._splitter().plan_cuts(0.0, 25.0), [0.0, 10.0, 20.0, 25.0])
+
+    def test_overlap_deduplicated(self):
+        """重叠区内的字幕只由一个片段保留"""
+        splitter = self._splitter(overlap=1.0)
+        chunks = splitter._spans_to_chunks([(0.0, 10.0), (10.0, 20.0)])
+        self.assertEqual((chunks[0]['start_time'], chunks[0]['end_time']), (0.0, 11.0))
+        self.assertEqual((chunks[1]['start_time'], chunks[1]['end_time']), (9.0, 20.0))
+
+        # 同一句话（绝对时间9.6-10.2秒）被两个片段都识别到
+        merged = splitter.merge_subtitles([
+            [{'start': 0.0, 'end': 5.0, 'text': 'a'}, {'start': 9.6, 'end': 10.2, 'text': 'b'}],
+            [{'start': 0.6, 'end': 1.2, 'text': 'b'}, {'start': 3.0, 'end': 6.0, 'text': 'c'}],
+        ], chunks)
+        self.assertEqual([seg['text'] for seg in merged], ['a', 'b', 'c'])
+
+    def test_pack_regions(self):
+        """相邻的语音区间合并到不超过chunk_duration，过长的区间按切分点切开"""
+        splitter = self._splitter()
+        self.assertEqual(
+            splitter._pack_regions([(0.0, 3.0), (5.0, 8.0), (12.0, 14.0), (15.0, 17.0)]),
+            [(0.0, 8.0), (12.0, 17.0)]
+        )
+        # 过长区间切出的最后一段与后面的区间合并
+        self.assertEqual(
+            splitter._pack_regions([(1.0, 2.0), (3.0, 25.0), (26.0, 28.0)]),
+            [(1.0, 2.0), (3.0, 13.0), (13.0, 23.0), (23.0, 28.0)]
+        )
+        self.assertEqual(splitter._pack_regions([]), [])
+
+@unittest.skipIf(shutil.which('ffmpeg') is None, "需要ffmpeg")
+class TestPcmSplitMatchesFile(unittest.TestCase):
+    """pcm模式与file模式的片段划分和时间偏移一致"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.audio_path = os.path.join(self.temp_dir, 'tone.wav')
+        t = np.arange(int(25.5 * SAMPLE_RATE)) / SAMPLE_RATE
+        self.pcm = (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+        with wave.open(self.audio_path, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(SAMPLE_RATE)
+            f.writeframes(self.pcm.tobytes())
+        self.decoded = DecodedAudioStore(os.path.join(self.temp_dir, 'decoded')).get(self.audio_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_boundaries_and_offsets(self):
+        file_splitter = AudioSplitter(chunk_duration=10, mode="file")
+        file_chunks = file_splitter.split_audio(self.audio_path, os.path.join(self.temp_dir, 'chunks'),
+                                                decoded=self.decoded)
+        pcm_splitter = AudioSplitter(chunk_duration=10, mode="pcm")
+        pcm_chunks = pcm_splitter.split_audio(self.audio_path, self.temp_dir)
+
+        def spans(chunks):
+            return [(c['index'], c['start_time'], c['end_time'], c['duration']) for c in chunks]
+
+        self.assertEqual(spans(pcm_chunks), spans(file_chunks))
+        self.assertEqual(spans(pcm_chunks), [(0, 0.0, 10.0, 10.0), (1, 10.0, 20.0, 10.0),
+                                             (2, 20.0, 25.5, 5.5)])
+
+        # pcm片段是原始采样的切片；file片段解码后时长相同（允许MP3编码的填充）
+        for pcm_chunk, file_chunk in zip(pcm_chunks, file_chunks):
+            start, end = pcm_chunk['samples']
+            self.assertEqual((start, end), (int(pcm_chunk['start_time'] * SAMPLE_RATE),
+                                            int(pcm_chunk['end_time'] * SAMPLE_RATE)))
+            np.testing.assert_allclose(pcm_splitter.load_chunk(pcm_chunk),
+                                       self.pcm[start:end].astype(np.float32) / 32768.0)
+            file_samples = len(file_splitter.decode_pcm(file_splitter.load_chunk(file_chunk)))
+            self.assertAlmostEqual(file_samples / SAMPLE_RATE, file_chunk['duration'], delta=0.1)
+
+        # 两种模式下字幕的时间偏移相同
+        segments = [[{'start': 1.0, 'end': 2.0, 'text': str(i)}] for i in range(3)]
+        for chunks, splitter in ((pcm_chunks, pcm_splitter), (file_chunks, file_splitter)):
+            merged = splitter.merge_subtitles(segments, chunks)
+            self.assertEqual([(seg['start'], seg['end']) for seg in merged],
+                             [(1.0, 2.0), (11.0, 12.0), (21.0, 22.0)])
+
+if __name__ == '__main__':
+    unittest.main()
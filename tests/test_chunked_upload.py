@@ -0,0 +1,81 @@
+"""分块上传测试"""
+import unittest
+import tempfile
+import shutil
+import wave
+import io
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.audio_splitter import SAMPLE_RATE
+from src.chunked_upload import ChunkedUpload, UploadOffsetError
+from src.decoded_audio import DecodedAudioStore
+
+@unittest.skipIf(shutil.which('ffmpeg') is None, "需要ffmpeg")
+class TestChunkedUpload(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        pcm = (np.sin(np.arange(3 * SAMPLE_RATE) * 0.05) * 8000).astype(np.int16)
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(SAMPLE_RATE)
+            f.writeframes(pcm.tobytes())
+        self.data = buffer.getvalue()
+        self.pcm = pcm
+        self.store = DecodedAudioStore(os.path.join(self.temp_dir, 'decoded'))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_resume_and_decode_while_uploading(self):
+        """分块按偏移续传，完成时边上传边解码的结果直接放入解码缓存"""
+        directory = os.path.join(self.temp_dir, 'chunked')
+        audio_path = os.path.join(self.temp_dir, 'speech.wav')
+        upload = ChunkedUpload.create(directory, 'u1', audio_path, len(self.data))
+        half = len(self.data) // 2
+        self.assertEqual(upload.write(0, io.BytesIO(self.data[:half])), half)
+
+        # 重复发送的分块被拒绝，并告知应继续的位置
+        with self.assertRaises(UploadOffsetError) as ctx:
+            upload.write(0, io.BytesIO(self.data[:half]))
+        self.assertEqual(ctx.exception.received, half)
+        with self.assertRaises(UploadOffsetError):
+            upload.finish(self.store)
+
+        upload.write(half, io.BytesIO(self.data[half:]))
+        decoded = upload.finish(self.store)
+        np.testing.assert_array_equal(decoded.pcm, self.pcm)
+        with open(audio_path, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+        # 与整体解码共用同一缓存项，不再调用ffmpeg
+        self.assertEqual(self.store.get(audio_path).path, decoded.path)
+
+        # 重新读取上传状态（例如服务重启后）
+        reloaded = ChunkedUpload.load(directory, 'u1')
+        self.assertTrue(reloaded.finished)
+        self.assertEqual(reloaded.received, len(self.data))
+        self.assertIsNone(ChunkedUpload.load(directory, '..'))
+
+    def test_remove_abandoned_upload(self):
+        """放弃的上传：按最后活动时间判断，删除时停止解码进程和未完成的数据"""
+        directory = os.path.join(self.temp_dir, 'chunked')
+        upload = ChunkedUpload.create(directory, 'u2', os.path.join(self.temp_dir, 'a.wav'),
+                                      len(self.data))
+        upload.write(0, io.BytesIO(self.data[:1000]))
+        self.assertEqual(ChunkedUpload.list_ids(directory), ['u2'])
+        self.assertGreater(upload.last_active(), 0)
+
+        process = upload._decoder._process
+        upload.remove()
+        self.assertIsNotNone(process.poll())
+        self.assertFalse(os.path.exists(upload.part_path))
+        self.assertEqual(ChunkedUpload.list_ids(directory), [])
+        self.assertEqual(upload.last_active(), 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
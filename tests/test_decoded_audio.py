@@ -0,0 +1,69 @@
+"""解码音频缓存测试"""
+import unittest
+import tempfile
+import shutil
+import wave
+import os
+import sys
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.audio_splitter import AudioSplitter, SAMPLE_RATE
+from src.decoded_audio import DecodedAudioStore
+
+@unittest.skipIf(shutil.which('ffmpeg') is None, "需要ffmpeg")
+class TestDecodedAudioStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.audio_path = os.path.join(self.temp_dir, 'speech.wav')
+        pcm = (np.sin(np.arange(3 * SAMPLE_RATE) * 0.05) * 8000).astype(np.int16)
+        with wave.open(self.audio_path, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(SAMPLE_RATE)
+            f.writeframes(pcm.tobytes())
+        self.pcm = pcm
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_decode_once_and_share(self):
+        """同一内容只解码一次，切分直接使用映射的PCM"""
+        store = DecodedAudioStore(os.path.join(self.temp_dir, 'decoded'))
+        decoded = store.get(self.audio_path)
+        self.assertEqual(decoded.duration, 3.0)
+        np.testing.assert_array_equal(decoded.pcm, self.pcm)
+
+        copy_path = os.path.join(self.temp_dir, 'copy.wav')
+        shutil.copy(self.audio_path, copy_path)
+        self.assertEqual(store.get(copy_path).path, decoded.path)
+        self.assertEqual(len(os.listdir(store.directory)), 1)
+
+        splitter = AudioSplitter(chunk_duration=2, mode="pcm")
+        chunks = splitter.split_audio(copy_path, self.temp_dir, decoded=decoded)
+        self.assertEqual([(c['start_time'], c['end_time']) for c in chunks], [(0.0, 2.0), (2.0, 3.0)])
+        np.testing.assert_allclose(splitter.load_chunk(chunks[1]), decoded.samples(2.0))
+
+    def test_evict_skips_files_in_use(self):
+        """无法删除的文件（Windows上仍被映射）跳过，不影响新的解码"""
+        store = DecodedAudioStore(os.path.join(self.temp_dir, 'decoded'), max_size_mb=0)
+        for name in ('old1.pcm', 'old2.pcm'):
+            with open(os.path.join(store.directory, name), 'wb') as f:
+                f.write(b'\0' * 100)
+        in_use = os.path.join(store.directory, 'old1.pcm')
+        real_remove = os.remove
+
+        def remove(path):
+            if path == in_use:
+                raise PermissionError(path)
+            real_remove(path)
+
+        with mock.patch('os.remove', side_effect=remove):
+            decoded = store.get(self.audio_path)
+        self.assertEqual(sorted(os.listdir(store.directory)),
+                         sorted(['old1.pcm', os.path.basename(decoded.path)]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""
+任务检查点测试
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.job_checkpoint import JobCheckpoint, chunk_key
+
+
+class TestJobCheckpoint(unittest.TestCase):
+    """测试检查点的保存、恢复和删除"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_record_and_reload(self):
+        checkpoint = JobCheckpoint(self.directory, 'job1')
+        checkpoint.save_meta({'filename': 'a.mp3', 'status': 'queued'})
+        checkpoint.save_meta({'status': 'processing'})
+        chunk = {'start_time': 0.0, 'end_time': 30.0}
+        checkpoint.record_chunk(chunk, {'segments': [{'start': 1.0, 'end': 2.0, 'text': 'こんにちは'}],
+                                        'language': 'ja'})
+
+        reloaded = JobCheckpoint.list_jobs(self.directory)
+        self.assertEqual([c.job_id for c in reloaded], ['job1'])
+        self.assertEqual(reloaded[0].load_meta(), {'filename': 'a.mp3', 'status': 'processing'})
+        completed = reloaded[0].completed_chunks()
+        self.assertEqual(completed[chunk_key(chunk)]['segments'][0]['text'], 'こんにちは')
+
+    def test_truncated_line_is_ignored(self):
+        checkpoint = JobCheckpoint(self.directory, 'job1')
+        checkpoint.record_chunk({'start_time': 0.0, 'end_time': 30.0}, {'segments': []})
+        with open(os.path.join(checkpoint.path, JobCheckpoint.CHUNKS_FILE), 'a') as f:
+            f.write('{"key": [30.0, 6')  # 写入中途崩溃
+        self.assertEqual(list(checkpoint.completed_chunks()), [(0.0, 30.0)])
+
+    def test_remove(self):
+        checkpoint = JobCheckpoint(self.directory, 'job1')
+        checkpoint.save_meta({'status': 'queued'})
+        checkpoint.remove()
+        self.assertEqual(JobCheckpoint.list_jobs(self.directory), [])
+        self.assertEqual(checkpoint.completed_chunks(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
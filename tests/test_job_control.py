@@ -0,0 +1,74 @@
+"""
+任务控制测试
+"""
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from src.job_control import JobCancelled, JobControl, JobPaused, controlled, install_cancel_hooks
+
+
+class _Model(torch.nn.Module):
+    """与Whisper相同，包含encoder和decoder两个子模块"""
+
+    def __init__(self):
+        super().__init__()
+        self.encoder = torch.nn.Linear(2, 2)
+        self.decoder = torch.nn.Linear(2, 2)
+
+
+class TestJobControl(unittest.TestCase):
+    """测试暂停、继续和取消"""
+
+    def test_pause_blocks_until_resume(self):
+        control = JobControl()
+        control.pause()
+        self.assertFalse(control.wait(timeout=0.01))
+
+        threading.Timer(0.05, control.resume).start()
+        started = time.time()
+        self.assertTrue(control.wait(timeout=5))
+        self.assertLess(time.time() - started, 1)
+
+    def test_cancel_wakes_paused_job(self):
+        control = JobControl()
+        control.pause()
+        threading.Timer(0.05, control.cancel).start()
+        with self.assertRaises(JobCancelled):
+            control.wait(timeout=5)
+
+    def test_release_on_pause_raises_instead_of_blocking(self):
+        control = JobControl(release_on_pause=True)
+        self.assertTrue(control.wait())
+        control.pause()
+        with self.assertRaises(JobPaused):
+            control.wait()
+        # 取消优先于暂停
+        control.cancel()
+        with self.assertRaises(JobCancelled):
+            control.wait()
+
+    def test_hooks_stop_forward_of_cancelled_thread_only(self):
+        model = _Model()
+        install_cancel_hooks(model)
+        install_cancel_hooks(model)  # 共享模型上重复安装无影响
+        self.assertEqual(len(model.decoder._forward_pre_hooks), 1)
+
+        control = JobControl()
+        control.cancel()
+        inputs = torch.zeros(1, 2)
+        with controlled(control):
+            with self.assertRaises(JobCancelled):
+                model.decoder(inputs)
+        # 其他线程（未取消的任务）不受影响
+        model.decoder(inputs)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""任务调度模块测试"""
+import unittest
+import threading
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.job_scheduler import JobScheduler, QueueFullError
+
+class TestJobScheduler(unittest.TestCase):
+    def setUp(self):
+        """单槽位调度器，先用一个阻塞任务占住槽位"""
+        self.scheduler = JobScheduler(max_concurrent=1, max_queue=2)
+        self.gate = threading.Event()
+        self.started = threading.Event()
+        self.order = []
+        
+        def blocker():
+            self.started.set()
+            self.gate.wait()
+        
+        self.scheduler.submit("blocker", blocker)
+        self.started.wait(1)
+    
+    def tearDown(self):
+        self.gate.set()
+        self.scheduler.shutdown()
+    
+    def test_priority_and_cancel(self):
+        """测试小任务优先、排队任务可直接取消、队列有界"""
+        done = threading.Event()
+        self.scheduler.submit("large", self.order.append, "large", priority=100)
+        self.scheduler.submit("small", self.order.append, "small", priority=1)
+        
+        self.assertEqual(self.scheduler.queue_info("small")["position"], 1)
+        self.assertEqual(self.scheduler.queue_info("large")["position"], 2)
+        with self.assertRaises(QueueFullError):
+            self.scheduler.submit("extra", self.order.append, "extra")
+        
+        self.assertTrue(self.scheduler.cancel("large"))
+        self.assertIsNone(self.scheduler.queue_info("large"))
+        
+        self.scheduler.submit("last", lambda: done.set(), priority=200)
+        self.gate.set()
+        self.assertTrue(done.wait(2))
+        self.assertEqual(self.order, ["small"])
+    
+    def test_resubmit_running_id(self):
+        """执行中的任务用同一ID再次提交，旧任务结束后新任务仍可查询和取消"""
+        running = threading.Event()
+        release = threading.Event()
+        self.addCleanup(release.set)
+        
+        def other():
+            running.set()
+            release.wait()
+        
+        self.scheduler.submit("other", other, priority=1)
+        self.scheduler.submit("blocker", self.order.append, "again", priority=2)
+        self.gate.set()
+        self.assertTrue(running.wait(2))
+        
+        # 旧的blocker已结束，other正在执行，新的blocker仍在排队
+        self.assertEqual(self.scheduler.queue_info("blocker")["state"], "queued")
+        self.assertTrue(self.scheduler.cancel("blocker"))
+        self.assertEqual(self.order, [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+"""模型缓存模块测试"""
+import unittest
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.model_registry import ModelRegistry
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        """使用假的加载函数，记录加载次数"""
+        self.loads = []
+        
+        def loader(model_size, device):
+            self.loads.append(model_size)
+            return FakeModel(model_size)
+        
+        self.registry = ModelRegistry(loader=loader)
+    
+    def test_shared_model(self):
+        """测试同一模型只加载一次"""
+        a = self.registry.acquire("medium", "cpu")
+        b = self.registry.acquire("medium", "cpu")
+        self.assertIs(a.model, b.model)
+        self.assertEqual(a.refcount, 2)
+        self.assertEqual(self.loads, ["medium"])
+    
+    def test_lru_eviction(self):
+        """测试超出预算时只淘汰空闲模型"""
+        self.registry.memory_budget = 100
+        small = self.registry.acquire("small", "cpu")
+        small.nbytes = 80
+        medium = self.registry.acquire("medium", "cpu")
+        medium.nbytes = 80
+        
+        # 两个模型都在使用中，不会被淘汰
+        self.assertEqual(len(self.registry.stats()), 2)
+        
+        self.registry.release(small)
+        self.assertEqual([s['model_size'] for s in self.registry.stats()], ["medium"])
+        
+        # 被淘汰的模型再次使用时重新加载
+        self.registry.acquire("small", "cpu")
+        self.assertEqual(self.loads, ["small", "medium", "small"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+"""预览音频测试"""
+import unittest
+import tempfile
+import shutil
+import wave
+import os
+import sys
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.audio_splitter import SAMPLE_RATE
+from src.decoded_audio import DecodedAudioStore
+from src.preview_audio import PreviewRenditions
+
+@unittest.skipIf(shutil.which('ffmpeg') is None, "需要ffmpeg")
+class TestPreviewRenditions(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        audio_path = os.path.join(self.temp_dir, 'speech.wav')
+        pcm = (np.sin(np.arange(3 * SAMPLE_RATE) * 0.05) * 8000).astype(np.int16)
+        with wave.open(audio_path, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(SAMPLE_RATE)
+            f.writeframes(pcm.tobytes())
+        store = DecodedAudioStore(os.path.join(self.temp_dir, 'decoded'))
+        self.decoded = store.get(audio_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_build_once_from_decoded_pcm(self):
+        """从解码结果编码，同一内容只编码一次"""
+        renditions = PreviewRenditions(os.path.join(self.temp_dir, 'preview'))
+        path = renditions.build(self.decoded)
+        self.assertTrue(path.endswith('.webm'))
+        self.assertGreater(os.path.getsize(path), 0)
+        self.assertEqual(renditions.get(path), path)
+
+        with mock.patch.object(renditions, '_encode') as encode:
+            self.assertEqual(renditions.build(self.decoded), path)
+            encode.assert_not_called()
+
+    def test_missing_rendition(self):
+        """尚未生成时返回None"""
+        renditions = PreviewRenditions(os.path.join(self.temp_dir, 'preview'), codec='aac')
+        self.assertIsNone(renditions.get(renditions.path_for(self.decoded)))
+        with self.assertRaises(ValueError):
+            PreviewRenditions(os.path.join(self.temp_dir, 'preview'), codec='flac')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""识别后端测试（不加载模型）"""
+import unittest
+from types import SimpleNamespace
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import whisper
+
+from src.recognizer_backends import _batch_log_mel, _tokens_to_segments, create_backend
+from src.speech_recognizer import SpeechRecognizer
+
+class TestBatchDecoding(unittest.TestCase):
+    def setUp(self):
+        self.tokenizer = whisper.tokenizer.get_tokenizer(True, language='ja', task='transcribe')
+        self.text = self.tokenizer.encode('こんにちは')
+
+    def decoded(self, tokens):
+        return SimpleNamespace(tokens=tokens, temperature=0.0, avg_logprob=-0.2,
+                               compression_ratio=1.0, no_speech_prob=0.1)
+
+    def ts(self, seconds):
+        return self.tokenizer.timestamp_begin + round(seconds / 0.02)
+
+    def test_tokens_to_segments(self):
+        """按时间戳token拆分片段；未闭合的最后一段丢弃，从最后的时间戳处继续"""
+        window = 30 * whisper.audio.SAMPLE_RATE
+        tokens = [self.ts(0.0)] + self.text + [self.ts(2.0), self.ts(2.5)] + self.text + [self.ts(4.0)]
+        segments, consumed = _tokens_to_segments(self.decoded(tokens), self.tokenizer, 10.0, window)
+        self.assertEqual([(s['start'], s['end']) for s in segments], [(10.0, 12.0), (12.5, 14.0)])
+        self.assertEqual(segments[0]['text'], 'こんにちは')
+        self.assertEqual(consumed, window)
+
+        tokens = tokens + [self.ts(5.0)] + self.text
+        segments, consumed = _tokens_to_segments(self.decoded(tokens), self.tokenizer, 0.0, window)
+        self.assertEqual(len(segments), 2)
+        self.assertEqual(consumed, 4 * whisper.audio.SAMPLE_RATE)
+
+    def test_batch_log_mel_matches_whisper(self):
+        """批量log-mel与whisper逐窗口计算一致"""
+        rng = np.random.default_rng(0)
+        windows = [rng.standard_normal(16000 * 3).astype(np.float32) * 0.1,
+                   rng.standard_normal(16000 * 7).astype(np.float32)]
+        mel = _batch_log_mel(windows, 80)
+        for row, window in enumerate(windows):
+            expected = whisper.log_mel_spectrogram(window, 80, padding=whisper.audio.N_SAMPLES)
+            expected = whisper.pad_or_trim(expected[:, :len(window) // whisper.audio.HOP_LENGTH],
+                                           whisper.audio.N_FRAMES)
+            self.assertTrue(np.allclose(mel[row].numpy(), expected.numpy(), atol=1e-5))
+
+class TestStubBackend(unittest.TestCase):
+    def test_deterministic_results(self):
+        """stub后端不加载模型，同一输入得到同一结果，格式与Whisper一致"""
+        recognizer = SpeechRecognizer('tiny', 'cpu', backend='stub')
+        audio = np.linspace(-0.5, 0.5, 16000 * 12, dtype=np.float32)
+        result = recognizer.transcribe(audio, word_timestamps=True)
+        self.assertEqual([(s['start'], s['end']) for s in result['segments']],
+                         [(0.0, 5.0), (5.0, 10.0), (10.0, 12.0)])
+        self.assertEqual(result['language'], 'ja')
+        self.assertEqual(''.join(w['word'] for w in result['segments'][0]['words']),
+                         result['segments'][0]['text'])
+        self.assertEqual(recognizer.transcribe_batch([audio, audio[:16000]])[0]['text'], result['text'])
+        self.assertNotIn('words', recognizer.transcribe(audio)['segments'][0])
+
+        with self.assertRaises(ValueError):
+            create_backend('unknown', 'tiny', 'cpu')
+
+if __name__ == '__main__':
+    unittest.main()
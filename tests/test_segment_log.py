@@ -0,0 +1,45 @@
+"""字幕日志测试"""
+import unittest
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.segment_log import SegmentLog
+
+def seg(start, end, text):
+    return {'start': start, 'end': end, 'text': text}
+
+class TestSegmentLog(unittest.TestCase):
+    def test_since_cursor(self):
+        """按游标读取增量"""
+        log = SegmentLog()
+        cursor = log.append([seg(30, 35, 'b')])
+        self.assertEqual(cursor, 1)
+        log.append([seg(0, 5, 'a'), seg(60, 65, 'c')])
+
+        segments, cursor = log.since(1)
+        self.assertEqual([s['text'] for s in segments], ['a', 'c'])
+        self.assertEqual(cursor, 3)
+        self.assertEqual(log.since(cursor), ([], 3))
+
+    def test_snapshot_merges_uncovered_background(self):
+        """完整预览合并尚未被重新识别覆盖的已有字幕"""
+        log = SegmentLog([seg(40, 42, 'old2'), seg(10, 12, 'old1'), seg(70, 72, 'old3')])
+        log.mark_done(0, 30)
+        log.append([seg(5, 8, 'new1')])
+        log.mark_done(60, 90)
+        log.mark_done(30, 60)  # 与前后范围相接，合并为一个范围
+        log.append([seg(65, 68, 'new2')])
+
+        segments, cursor = log.snapshot()
+        self.assertEqual([s['text'] for s in segments], ['new1', 'new2'])
+        self.assertEqual(cursor, 2)
+
+        log = SegmentLog([seg(40, 42, 'old2'), seg(10, 12, 'old1')])
+        log.mark_done(0, 30)
+        log.append([seg(5, 8, 'new1')])
+        segments, _ = log.snapshot()
+        self.assertEqual([s['text'] for s in segments], ['new1', 'old2'])
+
+if __name__ == '__main__':
+    unittest.main()
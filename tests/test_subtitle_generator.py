@@ -0,0 +1,66 @@
+"""字幕生成模块测试"""
+import unittest
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.subtitle_generator import SubtitleGenerator
+
+class TestSubtitleGenerator(unittest.TestCase):
+    def setUp(self):
+        self.generator = SubtitleGenerator()
+        self.segments = [
+            {'start': 0.0, 'end': 1.5, 'text': ' こんにちは '},
+            {'start': 59.9996, 'end': 3723.042, 'text': '一行目\n二行目'},
+        ]
+
+    def test_timestamps(self):
+        """整数毫秒格式化，进位不会出现60秒"""
+        self.assertEqual(self.generator._seconds_to_srt_time(59.9996), '00:01:00,000')
+        self.assertEqual(self.generator._seconds_to_vtt_time(3723.042), '01:02:03.042')
+
+        srt = self.generator.render(self.segments, 'srt')
+        self.assertEqual(srt, '1\n00:00:00,000 --> 00:00:01,500\nこんにちは\n\n'
+                              '2\n00:01:00,000 --> 01:02:03,042\n一行目\n二行目\n\n')
+        self.assertTrue(self.generator.render(self.segments, 'vtt').startswith(
+            'WEBVTT\n\n00:00:00.000 --> 00:00:01.500\n'))
+
+    def test_columnar_and_other_formats(self):
+        """列式输入与片段列表输出一致；ASS/JSON格式"""
+        starts = np.array([seg['start'] for seg in self.segments])
+        ends = np.array([seg['end'] for seg in self.segments])
+        texts = [seg['text'] for seg in self.segments]
+        self.assertEqual(
+            self.generator.render(subtitle_format='srt', starts=starts, ends=ends, texts=texts),
+            self.generator.render(self.segments, 'srt')
+        )
+
+        ass = self.generator.render(self.segments, 'ass')
+        self.assertIn('[Events]', ass)
+        self.assertIn('Dialogue: 0,0:01:00.00,1:02:03.04,Default,,0,0,0,,一行目\\N二行目\n', ass)
+
+        data = json.loads(self.generator.render(self.segments, 'json'))
+        self.assertEqual(data[0], {'start': 0.0, 'end': 1.5, 'text': 'こんにちは'})
+
+    def test_resegment_and_karaoke(self):
+        """按行长在词边界（优先标点后）拆分；卡拉OK格式带词级时间标签"""
+        words = [{'word': w, 'start': i * 0.5, 'end': i * 0.5 + 0.5}
+                 for i, w in enumerate(['今日は', '、', '会議を', '始めます', 'まず', '予算'])]
+        segment = {'start': 0.0, 'end': 3.0, 'text': '今日は、会議を始めますまず予算',
+                   'original_text': 'x', 'words': words}
+        lines = self.generator.resegment([segment, self.segments[0]], max_chars=8)
+        self.assertEqual([line['text'] for line in lines[:3]], ['今日は、', '会議を始めます', 'まず予算'])
+        self.assertIs(lines[3], self.segments[0])
+        self.assertEqual((lines[1]['start'], lines[1]['end']), (1.0, 2.0))
+        self.assertEqual(lines[1]['original_text'], 'x')
+
+        vtt = self.generator.render(lines[1:2], 'vtt_karaoke')
+        self.assertEqual(vtt, 'WEBVTT\n\n00:00:01.000 --> 00:00:02.000\n'
+                              '会議を<00:00:01.500>始めます\n\n')
+        self.assertEqual(self.generator.file_extension('vtt_karaoke'), 'vtt')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+"""字幕合并模块测试"""
+import unittest
+import random
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.subtitle_merger import SubtitleMerger
+
+def seg(start, end, text):
+    return {'start': start, 'end': end, 'text': text}
+
+class TestSubtitleMerger(unittest.TestCase):
+    def setUp(self):
+        """已有字幕中有一条完全包含新字幕"""
+        self.existing = [seg(0, 4, 'aaaa'), seg(10, 20, '0123456789'), seg(30, 32, 'cc')]
+        self.new = [seg(4, 6, 'new1'), seg(12, 14, 'new2')]
+
+    def test_prefer_new(self):
+        """完全包含新字幕的已有字幕也视为重叠；首尾相接不算重叠"""
+        merged = SubtitleMerger('prefer_new').merge(self.existing, self.new)
+        self.assertEqual([s['text'] for s in merged], ['aaaa', 'new1', 'new2', 'cc'])
+
+    def test_prefer_existing(self):
+        merged = SubtitleMerger('prefer_existing').merge(self.existing, self.new)
+        self.assertEqual([s['text'] for s in merged], ['aaaa', 'new1', '0123456789', 'cc'])
+
+    def test_split(self):
+        """已有字幕只保留未被覆盖的时间段"""
+        merged = SubtitleMerger('split').merge(self.existing, self.new)
+        self.assertEqual([(s['start'], s['end'], s['text']) for s in merged], [
+            (0, 4, 'aaaa'), (4, 6, 'new1'), (10, 12, '01'), (12, 14, 'new2'),
+            (14, 20, '456789'), (30, 32, 'cc')
+        ])
+
+    def test_matches_pairwise_check(self):
+        """与逐对比较的结果一致"""
+        rng = random.Random(1)
+        def make(n):
+            out = []
+            for i in range(n):
+                start = rng.uniform(0, 3600)
+                out.append(seg(start, start + rng.uniform(0.5, 15), str(i)))
+            return out
+        existing, new = make(2000), make(2000)
+
+        merged = SubtitleMerger('prefer_new').merge(existing, new)
+        expected = [e for e in existing
+                    if not any(e['start'] < n['end'] and n['start'] < e['end'] for n in new)]
+        self.assertEqual(len(merged), len(new) + len(expected))
+
+if __name__ == '__main__':
+    unittest.main()
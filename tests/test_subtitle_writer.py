@@ -0,0 +1,50 @@
+"""增量字幕写入测试"""
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.subtitle_generator import SubtitleGenerator, StreamingSubtitleWriter
+
+class TestStreamingSubtitleWriter(unittest.TestCase):
+    def setUp(self):
+        """创建临时输出目录"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.chunks = [
+            [{'start': 0.0, 'end': 2.0, 'text': '一'}, {'start': 3.0, 'end': 4.5, 'text': '二'}],
+            [{'start': 31.0, 'end': 33.0, 'text': '三'}],
+            [{'start': 61.0, 'end': 62.0, 'text': '四'}],
+        ]
+
+    def tearDown(self):
+        """清理临时目录"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_out_of_order_chunks(self):
+        """乱序完成的片段按顺序写入，部分内容合法，完成后与整体生成一致"""
+        path = os.path.join(self.temp_dir, 'out.srt')
+        writer = StreamingSubtitleWriter(path, 'srt')
+
+        writer.add_chunk(1, self.chunks[1])
+        self.assertEqual(writer.read_committed(), b'')  # 片段0尚未完成
+
+        writer.add_chunk(0, self.chunks[0])
+        partial = writer.read_committed().decode('utf-8')
+        self.assertEqual(writer.segments_written, 3)
+        self.assertTrue(partial.startswith('1\n00:00:00,000 --> 00:00:02,000\n一\n\n'))
+        self.assertTrue(partial.endswith('3\n00:00:31,000 --> 00:00:33,000\n三\n\n'))
+        self.assertFalse(os.path.exists(path))
+
+        writer.add_chunk(2, self.chunks[2])
+        writer.finish()
+        self.assertFalse(os.path.exists(writer.part_path))
+
+        expected = os.path.join(self.temp_dir, 'expected.srt')
+        SubtitleGenerator().generate_srt([seg for chunk in self.chunks for seg in chunk], expected)
+        with open(path, encoding='utf-8') as f, open(expected, encoding='utf-8') as g:
+            self.assertEqual(f.read(), g.read())
+
+if __name__ == '__main__':
+    unittest.main()
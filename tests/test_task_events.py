@@ -0,0 +1,40 @@
+"""任务事件流测试"""
+import unittest
+import threading
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.task_events import TaskEventStream
+
+class TestTaskEventStream(unittest.TestCase):
+    def test_read_since_cursor(self):
+        """按游标只读取新增事件，结束后不再追加"""
+        stream = TaskEventStream()
+        stream.publish('progress', {'progress': 10})
+        stream.publish('segments', {'segments': [{'start': 0, 'end': 1, 'text': 'a'}]})
+
+        events, closed = stream.read_since(0, timeout=0)
+        self.assertEqual([event[0] for event in events], [1, 2])
+        self.assertFalse(closed)
+
+        events, _ = stream.read_since(2, timeout=0)
+        self.assertEqual(events, [])
+
+        stream.close('state', {'status': 'completed'})
+        stream.publish('progress', {'progress': 100})
+        events, closed = stream.read_since(2, timeout=0)
+        self.assertEqual([(event[0], event[1]) for event in events], [(3, 'state')])
+        self.assertTrue(closed)
+
+    def test_wait_wakes_on_publish(self):
+        """等待中的订阅者在新事件到达时被唤醒"""
+        stream = TaskEventStream()
+        timer = threading.Timer(0.05, stream.publish, ('progress', {'progress': 50}))
+        timer.start()
+        events, _ = stream.read_since(0, timeout=5)
+        timer.join()
+        self.assertEqual(events[0][2], {'progress': 50})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+任务状态存储测试
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.task_store import TaskStore
+
+
+class TestTaskStore(unittest.TestCase):
+    """测试持久化、内存淘汰和过期"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'tasks.db')
+        self.segments_dir = os.path.join(self.temp_dir.name, 'segments')
+        self.evicted = []
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_store(self, **kwargs):
+        store = TaskStore(self.db_path, self.segments_dir, on_evict=self.evicted.append, **kwargs)
+        self.addCleanup(store.close)
+        return store
+
+    def test_state_survives_restart(self):
+        store = self.make_store()
+        store.create('a', {'status': 'processing', 'progress': 0})
+        store.update('a', {'progress': 50})
+        store.create('b', {'status': 'completed'})
+        store.save_segments('b', [{'start': 0.0, 'end': 1.0, 'text': 'はい'}])
+        store.close()
+
+        store = self.make_store()
+        self.assertEqual(store.mark_interrupted('中断'), ['a'])
+        self.assertEqual(store.get('a'), {'status': 'error', 'progress': 50, 'error': '中断'})
+        self.assertEqual(store.load_segments('b')[0]['text'], 'はい')
+        self.assertNotIn('c', store)
+
+    def test_evicts_finished_tasks_only(self):
+        store = self.make_store(max_cached=1)
+        store.create('active', {'status': 'processing'})
+        store.create('old', {'status': 'completed'})
+        store.create('new', {'status': 'completed'})
+        self.assertEqual(self.evicted, ['old'])
+        self.assertEqual(list(store._cache), ['active', 'new'])
+        # 移出内存后仍可从数据库读取
+        self.assertEqual(store.get('old'), {'status': 'completed'})
+
+    def test_expire(self):
+        store = self.make_store(ttl_seconds=60)
+        store.create('done', {'status': 'completed'})
+        store.save_segments('done', [])
+        store.create('running', {'status': 'processing'})
+        store.expire(now=store._last_expire + 3600)
+        self.assertNotIn('done', store)
+        self.assertIn('running', store)
+        self.assertFalse(os.path.exists(os.path.join(self.segments_dir, 'done.json')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""术语修正模块测试"""
+import unittest
+import tempfile
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.term_manager import TermManager
+from src.term_corrector import TermCorrector
+
+class TestTermCorrector(unittest.TestCase):
+    def setUp(self):
+        """创建临时术语库用于测试"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.manager = TermManager(
+            os.path.join(self.temp_dir, "test_terms.json"),
+            os.path.join(self.temp_dir, "test_log.json")
+        )
+        self.manager.add_correction("AI", "人工知能")
+        self.manager.add_correction("New York", "ニューヨーク")
+        self.manager.add_correction("York", "ヨーク")
+        self.corrector = TermCorrector(self.manager)
+
+    def test_whole_word_match(self):
+        """测试全词匹配，不修正单词内部"""
+        text, corrections = self.corrector.correct_text("AI and MAIL")
+        self.assertEqual(text, "人工知能 and MAIL")
+        self.assertEqual(corrections, [
+            {"original": "AI", "correct": "人工知能", "position": [(0, 2)]}
+        ])
+
+    def test_longest_match_and_positions(self):
+        """测试长词优先，位置与逐个替换后的文本一致"""
+        text, corrections = self.corrector.correct_text(
+            "AI in New York, York"
+        )
+        self.assertEqual(text, "人工知能 in ニューヨーク, ヨーク")
+        self.assertEqual([c["original"] for c in corrections], ["New York", "York", "AI"])
+        self.assertEqual(corrections[0]["position"], [(6, 14)])
+        self.assertEqual(corrections[1]["position"], [(14, 18)])
+        self.assertEqual(corrections[2]["position"], [(0, 2)])
+
+    def test_no_match(self):
+        """测试没有术语时原样返回"""
+        self.assertEqual(
+            self.corrector.correct_text("こんにちは"),
+            ("こんにちは", [])
+        )
+    def test_incremental_update(self):
+        """测试术语增删后修正器无需重建即可生效"""
+        version = self.corrector.index_version
+        self.manager.add_correction("GPU", "画像処理装置")
+        self.assertEqual(self.corrector.index_version, version + 1)
+        text, _ = self.corrector.correct_text("GPU and AI")
+        self.assertEqual(text, "画像処理装置 and 人工知能")
+
+        self.manager.remove_term("AI")
+        text, _ = self.corrector.correct_text("GPU and AI")
+        self.assertEqual(text, "画像処理装置 and AI")
+
+    def test_correct_words(self):
+        """跨多个词的术语合并为一个词，时间取首尾词的范围"""
+        words = [
+            {"word": " in", "start": 0.0, "end": 0.2, "probability": 0.9},
+            {"word": " New", "start": 0.2, "end": 0.5, "probability": 0.8},
+            {"word": " York", "start": 0.5, "end": 0.9, "probability": 0.6},
+            {"word": " now", "start": 0.9, "end": 1.2, "probability": 0.9},
+        ]
+        corrected = self.corrector.correct_words(words)
+        self.assertEqual([w["word"] for w in corrected], [" in", " ニューヨーク", " now"])
+        self.assertEqual((corrected[1]["start"], corrected[1]["end"]), (0.2, 0.9))
+        self.assertEqual(corrected[1]["probability"], 0.6)
+
+if __name__ == "__main__":
+    unittest.main()
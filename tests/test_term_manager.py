@@ -1,6 +1,9 @@
 """术语管理模块测试"""
 import unittest
 import tempfile
+import threading
+import time
+import json
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -58,6 +61,74 @@ class TestTermManager(unittest.TestCase):
         term = new_manager.get_term("テスト")
         self.assertIsNotNone(term)
         self.assertEqual(term["correct"], "测试")
+    
+    def test_journal_compaction(self):
+        """测试日志压缩为快照后仍能完整加载"""
+        self.manager.storage.compact_threshold = 3
+        for i in range(5):
+            self.manager.add_correction("AI", "人工知能", f"context{i}")
+        self.manager.compact()
+        
+        with open(self.term_file, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)["AI"]["frequency"], 5)
+        
+        new_manager = TermManager(self.term_file, self.log_file)
+        self.assertEqual(new_manager.get_term("AI")["frequency"], 5)
+        self.assertEqual(len(new_manager.corrections_log), 5)
+    
+    def test_batch_deferred_flush(self):
+        """测试批量模式下变更立即生效但只在退出时写入"""
+        journal = self.manager.storage.journal_file
+        with self.manager.batch():
+            for i in range(3):
+                self.manager.add_correction("AI", "人工知能", f"context{i}")
+            self.assertEqual(self.manager.get_term("AI")["frequency"], 3)
+            self.assertFalse(os.path.exists(journal))
+        
+        with open(journal, 'r', encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 3)
+    
+    def test_batch_is_per_thread(self):
+        """其他线程的批量模式不延迟当前线程的写入，超时的批量由定时器写入"""
+        journal = self.manager.storage.journal_file
+        self.manager.batch_max_delay = 0.2
+        entered, release = threading.Event(), threading.Event()
+        
+        def job():
+            with self.manager.batch():
+                self.manager.add_correction("AI", "人工知能")
+                entered.set()
+                release.wait(2)
+        
+        worker = threading.Thread(target=job)
+        worker.start()
+        self.assertTrue(entered.wait(2))
+        self.manager.add_correction("API", "エーピーアイ")
+        with open(journal, 'r', encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 2)
+        
+        with self.manager.batch():
+            self.manager.add_correction("GPU", "ジーピーユー")
+            time.sleep(0.4)
+            with open(journal, 'r', encoding='utf-8') as f:
+                self.assertEqual(len(f.readlines()), 3)
+        release.set()
+        worker.join()
+    
+    def test_legacy_json_files(self):
+        """测试加载原有格式的terms.json和纠正记录"""
+        with open(self.term_file, 'w', encoding='utf-8') as f:
+            json.dump({"AI": {"correct": "人工知能", "frequency": 2, "contexts": [],
+                              "confidence": 1.0}}, f)
+        with open(self.log_file, 'w', encoding='utf-8') as f:
+            json.dump([{"original": "AI", "corrected": "人工知能"}], f)
+        
+        manager = TermManager(self.term_file, self.log_file)
+        manager.add_correction("AI", "人工知能")
+        
+        reloaded = TermManager(self.term_file, self.log_file)
+        self.assertEqual(reloaded.get_term("AI")["frequency"], 3)
+        self.assertEqual(len(reloaded.corrections_log), 2)
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
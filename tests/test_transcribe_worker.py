@@ -0,0 +1,77 @@
+"""并行识别测试"""
+import unittest
+import tempfile
+import shutil
+import threading
+import time
+import wave
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.audio_splitter import SAMPLE_RATE
+from src.enhanced_pipeline import EnhancedPipeline
+from src.term_manager import TermManager
+
+class _StubRecognizer:
+    """按片段内容返回固定结果；越靠前的片段识别越慢，使结果乱序完成"""
+
+    def __init__(self, num_chunks: int):
+        self.num_chunks = num_chunks
+        self.completed = []
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio, **params):
+        index = int(round(audio[100] * 32768 / 1000)) - 1
+        time.sleep((self.num_chunks - index) * 0.1)
+        with self._lock:
+            self.completed.append(index)
+        return {'segments': [{'start': 0.5, 'end': 1.5, 'text': f'片段{index}'}], 'language': 'ja'}
+
+@unittest.skipIf(shutil.which('ffmpeg') is None, "需要ffmpeg")
+class TestParallelTranscription(unittest.TestCase):
+    def setUp(self):
+        """30秒音频，每10秒一个片段，片段i的采样值均为 (i+1)*1000"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.audio_path = os.path.join(self.temp_dir, 'meeting.wav')
+        pcm = np.repeat(np.arange(1, 4, dtype=np.int16) * 1000, 10 * SAMPLE_RATE)
+        with wave.open(self.audio_path, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(SAMPLE_RATE)
+            f.writeframes(pcm.tobytes())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_out_of_order_results_merged_in_chunk_order(self):
+        recognizer = _StubRecognizer(3)
+        pool = ThreadPoolExecutor(max_workers=2)  # 以线程代替工作进程
+        self.addCleanup(pool.shutdown)
+        term_manager = TermManager(os.path.join(self.temp_dir, 'terms.json'),
+                                   os.path.join(self.temp_dir, 'log.json'))
+        with mock.patch('src.enhanced_pipeline.get_worker_pool', return_value=pool), \
+                mock.patch('src.transcribe_worker._recognizer', recognizer), \
+                mock.patch.object(TermManager, 'shared', return_value=term_manager):
+            pipeline = EnhancedPipeline({'workers': 2, 'chunk_duration': 10, 'boundary_window': 0,
+                                         'cache': False})
+            result = pipeline.process_audio_chunked(self.audio_path,
+                                                    os.path.join(self.temp_dir, 'output'))
+
+        self.assertTrue(result['success'], result.get('error'))
+        self.assertNotEqual(recognizer.completed, [0, 1, 2])
+        self.assertEqual([(seg['start'], seg['end'], seg['text']) for seg in result['segments']],
+                         [(0.5, 1.5, '片段0'), (10.5, 11.5, '片段1'), (20.5, 21.5, '片段2')])
+
+        with open(result['subtitle_path'], 'r', encoding='utf-8') as f:
+            content = f.read()
+        self.assertLess(content.index('片段0'), content.index('片段1'))
+        self.assertLess(content.index('片段1'), content.index('片段2'))
+        self.assertIn('00:00:10,500 --> 00:00:11,500', content)
+
+if __name__ == '__main__':
+    unittest.main()
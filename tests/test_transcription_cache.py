@@ -0,0 +1,63 @@
+"""识别结果缓存测试"""
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.transcription_cache import TranscriptionCache
+
+class TestTranscriptionCache(unittest.TestCase):
+    def setUp(self):
+        """创建临时缓存目录"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.audio = np.linspace(-1, 1, 16000, dtype=np.float32)
+
+    def tearDown(self):
+        """清理临时目录"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_key_and_roundtrip(self):
+        """相同音频和参数命中缓存，参数或音频不同则不命中"""
+        cache = TranscriptionCache(self.temp_dir)
+        key = cache.make_key(self.audio, "medium", {"language": "ja"})
+        self.assertIsNone(cache.get(key))
+
+        result = {'text': 'テスト', 'segments': [{'start': np.float32(0.5), 'end': 1.0, 'text': 'テスト'}]}
+        cache.put(key, result)
+        cached = cache.get(key)
+        self.assertEqual(cached['text'], 'テスト')
+        self.assertEqual(cached['segments'][0]['start'], 0.5)
+
+        self.assertEqual(key, cache.make_key(self.audio.copy(), "medium", {"language": "ja"}))
+        self.assertNotEqual(key, cache.make_key(self.audio, "large-v3", {"language": "ja"}))
+        self.assertNotEqual(key, cache.make_key(self.audio, "medium", {"language": "en"}))
+        self.assertNotEqual(key, cache.make_key(self.audio[:-1], "medium", {"language": "ja"}))
+        # 解码方式和后端不同的结果分开缓存
+        self.assertNotEqual(key, cache.make_key(self.audio, "medium", {"language": "ja"},
+                                                decode_mode='batch'))
+        self.assertNotEqual(key, cache.make_key(self.audio, "medium", {"language": "ja"},
+                                                backend='whisper-int8'))
+
+    def test_lru_eviction(self):
+        """超出大小上限时淘汰最久未使用的结果"""
+        cache = TranscriptionCache(self.temp_dir, max_size_mb=0.01)  # 约10KB
+        payload = {'text': 'x' * 3000}
+        keys = [cache.make_key(self.audio, "medium", {"i": i}) for i in range(4)]
+
+        for key in keys[:3]:
+            cache.put(key, payload)
+            time.sleep(0.02)
+        cache.get(keys[0])  # 最近使用过，应保留
+        cache.put(keys[3], payload)
+
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[3]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+"""语音检测测试"""
+import unittest
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.audio_splitter import SAMPLE_RATE
+from src.vad import EnergyVAD, skipped_seconds
+
+def _noise(seconds: float, amplitude: float, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(int(seconds * SAMPLE_RATE)) * amplitude).astype(np.int16)
+
+class TestEnergyVAD(unittest.TestCase):
+    def test_skips_silence(self):
+        """静音超过min_silence时分为两个语音区间，两端保留padding"""
+        silence = np.zeros(3 * SAMPLE_RATE, dtype=np.int16)
+        pcm = np.concatenate([silence, _noise(5, 3000), silence, _noise(5, 3000, 1), silence])
+        regions = EnergyVAD().detect(pcm, SAMPLE_RATE)
+        self.assertEqual(len(regions), 2)
+        for (start, end), (speech_start, speech_end) in zip(regions, [(3, 8), (11, 16)]):
+            self.assertAlmostEqual(start, speech_start - 0.3, delta=0.05)
+            self.assertAlmostEqual(end, speech_end + 0.3, delta=0.05)
+
+    def test_quiet_speaker_without_silence(self):
+        """没有静音的录音中，音量低20dB的后半段不会被当作静音"""
+        pcm = np.concatenate([_noise(15, 10000), _noise(15, 1000, 1)])
+        self.assertEqual(EnergyVAD().detect(pcm, SAMPLE_RATE), [(0.0, 30.0)])
+
+    def test_empty_and_fixed_threshold(self):
+        self.assertEqual(EnergyVAD().detect(np.zeros(0, dtype=np.int16), SAMPLE_RATE), [])
+        pcm = np.concatenate([_noise(5, 10000), _noise(5, 1000, 1)])
+        regions = EnergyVAD(threshold_db=-20).detect(pcm, SAMPLE_RATE)
+        self.assertEqual(len(regions), 1)
+        self.assertAlmostEqual(regions[0][1], 5.3, delta=0.05)
+
+    def test_skipped_seconds(self):
+        """按保留区间统计，重叠部分不重复计算"""
+        chunks = [
+            {'start_time': 0.0, 'end_time': 11.0, 'keep_start': 0.0, 'keep_end': 10.0},
+            {'start_time': 9.0, 'end_time': 20.0, 'keep_start': 10.0, 'keep_end': 20.0},
+            {'start_time': 50.0, 'end_time': 55.0},
+        ]
+        self.assertAlmostEqual(skipped_seconds(chunks, 60.0), 35.0)
+        self.assertEqual(skipped_seconds([], 12.5), 12.5)
+        self.assertEqual(skipped_seconds(chunks, 20.0), 0.0)
+
+if __name__ == '__main__':
+    unittest.main()